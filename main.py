@@ -16,8 +16,8 @@
 
 import sys
 import os
+import signal
 import socket
-import tkinter as tk
 from gi.repository import GLib
 
 # Añadir el directorio 'vendor' a la ruta de búsqueda de Python para las dependencias empaquetadas
@@ -28,6 +28,8 @@ if vendor_dir not in sys.path:
 
 from ocamlfuse_manager_gui.gui import GoogleDriveManager
 from ocamlfuse_manager_gui.constants import MINIMIZED_FLAGS
+from ocamlfuse_manager_gui.eventloop import TkEventBridge
+from ocamlfuse_manager_gui.shutdown import shutdown_coordinator
 
 # Variable global para mantener el socket de bloqueo
 lock_socket = None
@@ -55,6 +57,19 @@ def setup_instance_messaging(app):
 
     GLib.io_add_watch(lock_socket, GLib.IO_IN, handle_new_connection)
 
+def setup_signal_handlers(app):
+    """
+    Al cerrar la sesión el sistema envía SIGTERM (o SIGHUP): se sale por el mismo cierre
+    ordenado que desde el menú, sin pedir confirmación.
+    """
+    def handle_signal(signum):
+        print(f"Recibida la señal {signal.Signals(signum).name}. Cerrando la aplicación.")
+        app.quit_application()
+        return GLib.SOURCE_REMOVE
+
+    for signum in (signal.SIGTERM, signal.SIGHUP, signal.SIGINT):
+        GLib.unix_signal_add(GLib.PRIORITY_HIGH, signum, handle_signal, signum)
+
 def main():
     """
     Punto de entrada principal. Maneja la lógica de instancia única
@@ -74,29 +89,25 @@ def main():
             
             # Configurar el listener para otras instancias
             setup_instance_messaging(app)
+            setup_signal_handlers(app)
             
             # Iniciar tareas en segundo plano después de que la UI esté lista
             app.root.after(100, app.start_background_tasks)
             
-            # Bucle principal de Tkinter gestionado por GLib con un pequeño retardo para ahorrar CPU
-            def tkinter_update():
-                try:
-                    if app.root.winfo_exists():
-                        app.root.update()
-                        return True  # Mantener el bucle
-                    else:
-                        if main_loop.is_running():
-                            main_loop.quit()
-                        return False  # Detener el bucle
-                except tk.TclError:
-                    if main_loop.is_running():
-                        main_loop.quit()
-                    return False  # Detener el bucle
-
-            # Usamos timeout_add en lugar de idle_add para no saturar el CPU
-            # 20ms da unos 50 FPS, suficiente para que la UI se sienta fluida
-            GLib.timeout_add(20, tkinter_update)
-            main_loop.run()
+            # Tk se procesa solo cuando hay trabajo (eventos de X, after() vencidos o
+            # cambios hechos desde GLib), sin despertar periódicamente el proceso
+            bridge = TkEventBridge(app.root, main_loop)
+            try:
+                bridge.install()
+                main_loop.run()
+            finally:
+                # Salga como salga el bucle, tk.Misc.after vuelve a ser el original
+                bridge.close()
+
+            # Si el bucle terminó sin pasar por quit_application (p. ej. se perdió la conexión
+            # con X al cerrar la sesión) el cierre ordenado se hace aquí; si ya se hizo, no repite
+            shutdown_coordinator.run()
+            shutdown_coordinator.arm_exit_watchdog()
 
         except Exception as e:
             print(f"Error inesperado al iniciar la aplicación: {e}")
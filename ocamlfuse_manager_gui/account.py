@@ -16,18 +16,19 @@
 import os
 import re
 import json
-import threading
-import subprocess
 import webbrowser
 import random
 import shutil
-import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import requests
 from .utils import centrar_ventana
-from .oauth import OAuthServer
-from .constants import GDFUSE_DIR, OAUTH_PORT
+from .backend import backend, CancelToken, run_blocking
+from .processes import process_manager
+from .mount_table import mount_table
+from .gdfuse_config import gdfuse_index
+from .dispatcher import ui_dispatcher
+from .constants import OAUTH_PORT
 from .i18n import i18n_instance
 from .encryption import EncryptionManager
 _ = i18n_instance.gettext
@@ -113,7 +114,8 @@ class AccountManager:
 
     
 
-    def complete_oauth_setup(self, label, client_id, client_secret, redirect_url, auth_code):
+    async def complete_oauth_setup(self, label, client_id, client_secret, redirect_url, auth_code):
+        """Corrutina (bucle del backend): canjea el código con google-drive-ocamlfuse. Devuelve (éxito, email)."""
         try:
             # Asegurarse de que el client_secret esté descifrado antes de usarlo
             try:
@@ -125,24 +127,18 @@ class AccountManager:
                 "-id", client_id, "-secret", client_secret_plain,
                 "-label", label, "-redirect_uri", redirect_url
             ]
-            proc = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            out, err = proc.communicate(input=auth_code + "\n", timeout=30)
-            if proc.returncode != 0:
-                print(f"Error OAuth: {err}")
+            result = await process_manager.run(cmd, timeout=30, input=auth_code + "\n")
+            if result.returncode != 0:
+                print(f"Error OAuth: {result.stderr}")
                 return False, None
+            gdfuse_index.invalidate()
             tokens_path = os.path.expanduser(f"~/.gdfuse/{label}/tokens.json")
             access_token = ""
             if os.path.isfile(tokens_path):
                 with open(tokens_path, "r") as f:
                     tokens = json.load(f)
                     access_token = tokens.get("access_token", "")
-            email = self.get_email_from_token(access_token) if access_token else None
+            email = await run_blocking(self.get_email_from_token, access_token) if access_token else None
             return True, email
         except Exception as e:
             print(f"Error OAuth: {e}")
@@ -165,29 +161,27 @@ class AccountManager:
             messagebox.showerror(_("Error de Cifrado"), _("No se pudo descifrar el client_secret. La clave de cifrado puede haber cambiado o el archivo estar corrupto."))
             return
 
-        try:
-            from . import oauth
-            cancel_evt = threading.Event()
-            dlg = self.show_progress_dialog(_("Reautorizando..."), cancel_evt)
-            
-            # Usamos un hilo para evitar congelar la GUI
-            results = {"auth_code": None, "error": None}
-            def auth_thread():
-                results["auth_code"], results["error"] = oauth.authenticate(
-                    data['client_id'], client_secret, OAUTH_PORT, cancel_evt, timeout=120
-                )
-
-            thread = threading.Thread(target=auth_thread, daemon=True)
-            thread.start()
+        from . import oauth
+        cancel_token = CancelToken()
+        dlg = self.show_progress_dialog(_("Reautorizando..."), cancel_token)
+        redirect_url = f"http://localhost:{OAUTH_PORT}"
 
-            # Mientras el hilo esté vivo y no se haya cancelado, mantenemos la GUI viva
-            while thread.is_alive():
-                self.root.update()
-                time.sleep(0.1)
+        async def reauthorize():
+            auth_code, error = await oauth.authenticate(
+                data['client_id'], client_secret, OAUTH_PORT, cancel_token, timeout=120
+            )
+            if error:
+                return error, False, None
+            ok, email = await self.complete_oauth_setup(
+                lbl, data['client_id'], client_secret, redirect_url, auth_code
+            )
+            return None, ok, email
 
-            dlg.destroy()
-            auth_code = results["auth_code"]
-            error = results["error"]
+        def on_done(result, exc):
+            # Continúa en el hilo de Tk cuando termina la autorización, sin bloquear la ventana
+            if dlg.winfo_exists():
+                dlg.destroy()
+            error, ok, email = result if exc is None else ("oauth_error", False, None)
 
             if error:
                 error_messages = {
@@ -200,10 +194,6 @@ class AccountManager:
                 messagebox.showerror(_("Error"), error_messages.get(error, _("Error desconocido")))
                 return
 
-            redirect_url = f"http://localhost:{OAUTH_PORT}"
-            ok, email = self.complete_oauth_setup(
-                lbl, data['client_id'], client_secret, redirect_url, auth_code
-            )
             if ok:
                 self.accounts[lbl] = self._account_to_dict(
                     lbl, data['client_id'], client_secret, configured=True, externally_detected=data.get('externally_detected', False), email=email
@@ -214,35 +204,27 @@ class AccountManager:
                 messagebox.showinfo(_("Éxito"), _("'La cuenta{lbl}' ha sido reautorizada").format(lbl=lbl))
             else:
                 messagebox.showerror(_("Error"), _("Reautorización falló"))
-        finally:
-            pass
+
+        backend.call_in_ui(reauthorize(), on_done)
 
     def refresh_accounts(self):
         """Lee ~/.gdfuse, fusiona con self.accounts, filtra blacklist, actualiza Treeview y sincroniza con la app principal."""
-        gdfp = os.path.expanduser(GDFUSE_DIR)
         ext = {}
         combinaciones = set()
-        if os.path.isdir(gdfp):
-            for lbl in os.listdir(gdfp):
-                cfg = os.path.join(gdfp, lbl, "config")
-                if os.path.isfile(cfg):
-                    client_id = ""
-                    client_secret = ""
-                    try:
-                        with open(cfg, "r") as f:
-                            for line in f:
-                                if line.startswith("client_id="):
-                                    client_id = line.split("=", 1)[1].strip()
-                                elif line.startswith("client_secret="):
-                                    client_secret = line.split("=", 1)[1].strip()
-                        if client_id and (lbl, client_id) not in combinaciones:
-                            # Solo marcar como importada si no existe ya como interna
-                            ext[lbl] = self._account_to_dict(
-                                lbl, client_id, client_secret, configured=True, externally_detected=True
-                            )
-                            combinaciones.add((lbl, client_id))
-                    except Exception as e:
-                        print(f"Error leyendo config de {lbl}: {e}")
+        # El índice solo relee los config de ~/.gdfuse cuyo mtime haya cambiado
+        for lbl in gdfuse_index.labels():
+            values = gdfuse_index.values(lbl)
+            client_id = values.get("client_id", "")
+            client_secret = values.get("client_secret", "")
+            try:
+                if client_id and (lbl, client_id) not in combinaciones:
+                    # Solo marcar como importada si no existe ya como interna
+                    ext[lbl] = self._account_to_dict(
+                        lbl, client_id, client_secret, configured=True, externally_detected=True
+                    )
+                    combinaciones.add((lbl, client_id))
+            except Exception as e:
+                print(f"Error leyendo config de {lbl}: {e}")
 
         # Filtrar blacklist en externas
         for lbl in list(ext):
@@ -260,6 +242,11 @@ class AccountManager:
                 data["configured"] = merged[lbl].get("configured", data.get("configured", True))
                 if merged[lbl].get("automount"):
                     data["automount"] = merged[lbl].get("automount")
+                if merged[lbl].get("auto_remount"):
+                    data["auto_remount"] = merged[lbl].get("auto_remount")
+                for key in ("pinned_folders", "prewarm_read", "cache_weight", "mount_options", "mount_timeout"):
+                    if key in merged[lbl]:
+                        data[key] = merged[lbl][key]
                 if merged[lbl].get("mount_point"):
                     data["mount_point"] = merged[lbl].get("mount_point")
             merged[lbl] = data
@@ -272,7 +259,7 @@ class AccountManager:
         self.accounts = merged
         self.main_app.accounts = self.accounts
         self.main_app.deleted_accounts = self.deleted_accounts
-        self.root.after(0, self.save_config)
+        ui_dispatcher.post(self.save_config, coalesce=True)
         self.main_app.root.update_idletasks()  
 
     def delete_account(self):
@@ -307,12 +294,10 @@ class AccountManager:
         if not mount_point_to_delete:
             #Intentar encontrarlo si está actualmente montado
             try:
-                result = subprocess.run(['mount'], capture_output=True, text=True, check=True)
-                for line in result.stdout.splitlines():
-                    if 'google-drive-ocamlfuse' in line and account in line:
-                        parts = line.split()
-                        if len(parts) > 2 and os.path.isdir(parts[2]):
-                            mount_point_to_delete = parts[2]
+                for entry in mount_table.snapshot().entries:
+                    if account in entry.mount_point or account in entry.source:
+                        if os.path.isdir(entry.mount_point):
+                            mount_point_to_delete = entry.mount_point
                             print(f"Punto de montaje encontrado en el sistema (activo): {mount_point_to_delete}")
                             break
             except Exception as e:
@@ -338,8 +323,9 @@ class AccountManager:
             if account in self.main_app.mounted_accounts:
                
                 active_mount_point = self.main_app.mounted_accounts[account]
-                if os.path.ismount(active_mount_point): 
-                    if not self.main_app.mount_mgr.unmount_account(account, active_mount_point):
+                if self.main_app.mount_mgr.is_mounted(active_mount_point):
+                    ok, _detail = self.main_app.mount_mgr.unmount_account(account, active_mount_point)
+                    if not ok:
                         messagebox.showwarning(_("Advertencia"), _("No se pudo desmontar la unidad. La carpeta de montaje podría estar en uso. Se intentará eliminar la carpeta de todas formas si confirmas."))
                 else:
                     # Si está en mounted_accounts pero no realmente montado, eliminarlo de mounted_accounts
@@ -366,6 +352,7 @@ class AccountManager:
                     try:
                         shutil.rmtree(gdfuse_path)
                         print(f"Carpeta {gdfuse_path} eliminada del sistema.")
+                        gdfuse_index.invalidate()
                     except Exception as e:
                         print(f"Error al eliminar carpeta {gdfuse_path}: {e}")
                         messagebox.showerror(_("Error"), _("No se pudo eliminar la carpeta:\n{}\n\n{}").format(gdfuse_path, e))
@@ -576,38 +563,45 @@ class AccountManager:
                     _( "Se han precargado los datos de la cuenta. Completa el flujo de configuración OAuth para restaurar completamente la cuenta."),
                     parent=self.root
                 )
-                success, email, error = self.setup_account_logic(
-                    account, cuenta.get("client_id", ""), cuenta.get("client_secret", ""), threading.Event()
-                )
-
-                if success:
-                    if account in self.deleted_accounts:
-                        del self.deleted_accounts[account]
-                    self.save_config()
-                    self.refresh_accounts_ui()
-                    self.main_app.root.update_idletasks()
-                    messagebox.showinfo(
-                        _( "Restaurada"),
-                        _( "La cuenta '{account}' ha sido restaurada completamente.").format(account=account)
-                    ) 
-                    self.refresh_accounts()
-                    self.main_app.limpiar_campos_credenciales()
-                    return
-                else:
-                    error_messages = {
-                        "server_error": _("No se pudo iniciar el servidor OAuth"),
-                        "cancelled": _("Restauración cancelada por el usuario."),
-                        "user_cancel": _("Restauración cancelada por el usuario."),
-                        "timeout": _("No se recibió el código de autorización a tiempo"),
-                        "oauth_error": _("Error al completar la restauración OAuth"),
-                        "duplicate_email": _("Ya existe una cuenta configurada con el correo '{email}'."),
-                    }
-                    messagebox.showwarning(
-                        _( "Restauración incompleta"),
-                        error_messages.get(error, _( "La cuenta no fue reconfigurada completamente. Sigue en la lista de eliminadas.")),
-                        parent=self.root
-                    )
-                    self.main_app.limpiar_campos_credenciales()
+                cancel_token = CancelToken()
+                dlg = self.show_progress_dialog(_("Esperando autorización..."), cancel_token)
+
+                def on_done(result, exc):
+                    # Continúa en el hilo de Tk cuando termina la autorización
+                    if dlg.winfo_exists():
+                        dlg.destroy()
+                    success, email, error = result if exc is None else (False, None, "oauth_error")
+                    if success:
+                        if account in self.deleted_accounts:
+                            del self.deleted_accounts[account]
+                        self.save_config()
+                        self.refresh_accounts_ui()
+                        self.main_app.root.update_idletasks()
+                        messagebox.showinfo(
+                            _( "Restaurada"),
+                            _( "La cuenta '{account}' ha sido restaurada completamente.").format(account=account)
+                        ) 
+                        self.refresh_accounts()
+                        self.main_app.limpiar_campos_credenciales()
+                    else:
+                        error_messages = {
+                            "server_error": _("No se pudo iniciar el servidor OAuth"),
+                            "cancelled": _("Restauración cancelada por el usuario."),
+                            "user_cancel": _("Restauración cancelada por el usuario."),
+                            "timeout": _("No se recibió el código de autorización a tiempo"),
+                            "oauth_error": _("Error al completar la restauración OAuth"),
+                            "duplicate_email": _("Ya existe una cuenta configurada con el correo '{email}'."),
+                        }
+                        messagebox.showwarning(
+                            _( "Restauración incompleta"),
+                            error_messages.get(error, _( "La cuenta no fue reconfigurada completamente. Sigue en la lista de eliminadas.")),
+                            parent=self.root
+                        )
+                        self.main_app.limpiar_campos_credenciales()
+
+                backend.call_in_ui(self.setup_account_logic(
+                    account, cuenta.get("client_id", ""), cuenta.get("client_secret", ""), cancel_token
+                ), on_done)
                 return
             else:
                 self.deleted_accounts[account]["configured"] = False
@@ -668,12 +662,12 @@ class AccountManager:
 
         # Intento 1: Zenity (GTK)
         try:
-            result = subprocess.run([
+            result = process_manager.run_sync([
                 'zenity', '--file-selection',
                 '--title=' + _("Seleccionar archivo de credenciales JSON"),
                 '--file-filter=' + _("Archivos JSON") + ' | *.json',
                 f'--filename={carpeta}/'
-            ], capture_output=True, text=True, timeout=60)
+            ])
             
             if result.returncode == 0:
                 file_path = result.stdout.strip()
@@ -688,11 +682,11 @@ class AccountManager:
         # Intento 2: KDialog (KDE)
         if not file_path:
             try:
-                result = subprocess.run([
+                result = process_manager.run_sync([
                     'kdialog', '--getopenfilename',
                     carpeta,
                     'Archivos JSON (*.json)'
-                ], capture_output=True, text=True, timeout=60)
+                ])
 
                 if result.returncode == 0:
                     file_path = result.stdout.strip()
@@ -858,18 +852,19 @@ class AccountManager:
             print("Error al obtener email:", e)
             return ""
 
-    def setup_account_logic(self, label, client_id, client_secret, cancel_event, timeout=120):
+    async def setup_account_logic(self, label, client_id, client_secret, cancel_token, timeout=120):
+        """Corrutina (bucle del backend) con el flujo OAuth completo. Devuelve (éxito, email, error)."""
         from . import oauth
         # nos aseguramos de que el client_secret esté descifrado antes de usarlo
         try:
             client_secret_plain = self.encryption_manager.decrypt(client_secret)
         except Exception:
             client_secret_plain = client_secret
-        auth_code, error = oauth.authenticate(client_id, client_secret_plain, OAUTH_PORT, cancel_event, timeout)
+        auth_code, error = await oauth.authenticate(client_id, client_secret_plain, OAUTH_PORT, cancel_token, timeout)
         if error:
             return False, None, error
         redirect_url = f"http://localhost:{OAUTH_PORT}"
-        success, email = self.complete_oauth_setup(label, client_id, client_secret_plain, redirect_url, auth_code)
+        success, email = await self.complete_oauth_setup(label, client_id, client_secret_plain, redirect_url, auth_code)
         if not success:
             return False, None, "oauth_error"
         for acc in self.accounts.values():
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+from .dispatcher import ui_dispatcher
+
+
+class CancelToken:
+    """
+    Sustituto de threading.Event para cancelar operaciones del backend: además de set() e
+    is_set(), avisa a quien se haya registrado con add_callback(), de modo que una corrutina
+    puede esperar la cancelación sin sondear. set() es seguro desde cualquier hilo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._set = False
+        self._callbacks = []
+
+    def set(self):
+        with self._lock:
+            if self._set:
+                return
+            self._set = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def is_set(self):
+        return self._set
+
+    def add_callback(self, callback):
+        with self._lock:
+            if not self._set:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait_async(self):
+        """asyncio.Event del bucle actual que se activa al cancelar (llamar desde una corrutina)."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        self.add_callback(lambda: loop.call_soon_threadsafe(event.set))
+        return event
+
+
+class BackendClosed(RuntimeError):
+    """Se lanzó una operación en el backend después de detenerlo (durante el cierre)."""
+
+
+class Backend:
+    """
+    Un único hilo con un bucle asyncio para las tareas de red y de procesos: montajes,
+    fusermount (ambos a través de process_manager), el servidor de la autorización OAuth
+    o la búsqueda de actualizaciones.
+    Las operaciones se lanzan con submit() (devuelve un concurrent.futures.Future), run()
+    (espera el resultado; nunca desde el hilo de Tk) o call_in_ui(), que entrega el
+    resultado a un callback en el hilo de Tk a través de ui_dispatcher. Tras stop() no
+    se vuelve a arrancar: cualquier operación posterior lanza BackendClosed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._tasks = set()
+        self._closed = False
+
+    @property
+    def loop(self):
+        self.start()
+        return self._loop
+
+    def start(self):
+        with self._lock:
+            if self._closed:
+                raise BackendClosed("El backend ya se detuvo")
+            if self._thread is not None and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name="backend", daemon=True)
+            self._thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            pending = [task for task in asyncio.all_tasks(self._loop) if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    def in_backend_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        """Programa la corrutina en el bucle del backend y devuelve su concurrent.futures.Future."""
+        try:
+            loop = self.loop
+        except BackendClosed:
+            coro.close()  # no dejar la corrutina sin esperar
+            raise
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro, timeout=None):
+        """Ejecuta la corrutina y espera su resultado desde un hilo de trabajo."""
+        if self.in_backend_thread():
+            raise RuntimeError("Backend.run() llamado desde el propio hilo del backend")
+        return self.submit(coro).result(timeout)
+
+    def call_in_ui(self, coro, on_done):
+        """
+        Ejecuta la corrutina y llama a `on_done(resultado, error)` en el hilo de Tk, con
+        `error` igual a la excepción si falló (o None). Devuelve el Future, que se puede cancelar.
+        """
+        future = self.submit(coro)
+
+        def done(fut):
+            if fut.cancelled():
+                ui_dispatcher.post(on_done, None, asyncio.CancelledError())
+            elif fut.exception() is not None:
+                ui_dispatcher.post(on_done, None, fut.exception())
+            else:
+                ui_dispatcher.post(on_done, fut.result(), None)
+
+        future.add_done_callback(done)
+        return future
+
+    def detach(self, coro_or_task):
+        """Deja una tarea corriendo en segundo plano guardando una referencia hasta que termine."""
+        task = asyncio.ensure_future(coro_or_task)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def stop(self, timeout=2):
+        """Cancela las tareas pendientes, detiene el bucle y espera al hilo. No se puede volver a arrancar."""
+        with self._lock:
+            self._closed = True
+            loop, thread = self._loop, self._thread
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+
+
+def decode(data):
+    return (data or b"").decode("utf-8", errors="replace")
+
+
+async def run_blocking(func, *args):
+    """Ejecuta una función bloqueante (p. ej. una petición con requests) en el ejecutor del bucle."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+# Instancia global compartida por toda la aplicación
+backend = Backend()
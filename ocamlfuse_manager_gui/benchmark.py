@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import shutil
+import threading
+import time
+from .constants import CONFIG_FILE, BENCHMARK_FILE_MB, BENCHMARK_SMALL_FILES, BENCHMARK_HISTORY
+from .cache_inspector import uncached_paths, CacheDbError
+
+BENCHMARKS_FILE = os.path.join(os.path.dirname(CONFIG_FILE), "benchmarks.json")
+BLOCK_SIZE = 1024 * 1024
+
+# Origen de las lecturas de un resultado: un archivo que no estaba en la caché de
+# google-drive-ocamlfuse (se descarga de Drive) o datos ya presentes en la caché local
+COLD = "cold"
+WARM = "warm"
+
+# Archivos de la raíz que se consideran al buscar uno sin cachear
+COLD_CANDIDATES = 200
+
+
+def _drop_page_cache(fd):
+    """Descarta las páginas del archivo de la caché del kernel (la de ocamlfuse no se toca)."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+class BenchmarkCancelled(Exception):
+    pass
+
+
+class MountBenchmark:
+    """
+    Mide un punto de montaje (o cualquier carpeta local, como referencia): escritura y
+    lectura secuencial en MB/s, operaciones por segundo de creación, stat y listado de
+    archivos pequeños y tiempo hasta el primer byte. Trabaja en una carpeta temporal
+    dentro del destino que se borra al terminar.
+    Con la etiqueta de la cuenta, la lectura y el primer byte se miden sobre un archivo de
+    la raíz cuyo contenido no está en la caché local (resultado "cold", rendimiento real de
+    Drive). Si no hay ninguno se lee lo recién escrito sin la caché del kernel, que sigue
+    saliendo de la caché de ocamlfuse (resultado "warm").
+    """
+
+    def __init__(self, path, file_size_mb=BENCHMARK_FILE_MB, small_files=BENCHMARK_SMALL_FILES, label=None):
+        self.path = path
+        self.label = label
+        self.file_size_mb = file_size_mb
+        self.small_files = small_files
+        self._cancel = threading.Event()
+        self._progress_callbacks = []
+
+    def cancel(self):
+        self._cancel.set()
+
+    def add_progress_callback(self, callback):
+        """Registra `callback(step)` con el nombre del paso que empieza."""
+        self._progress_callbacks.append(callback)
+
+    def _step(self, name):
+        if self._cancel.is_set():
+            raise BenchmarkCancelled()
+        for callback in self._progress_callbacks:
+            try:
+                callback(name)
+            except Exception as e:
+                print(f"Error en callback del benchmark: {e}")
+
+    def run(self):
+        """Ejecuta todas las pruebas y devuelve un dict con los resultados (bloquea)."""
+        work_dir = os.path.join(self.path, f".easyocamlfuse-bench-{os.getpid()}")
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            result = {"path": self.path, "timestamp": time.time()}
+            big_file = os.path.join(work_dir, "seq.bin")
+
+            self._step("ttfb")
+            cold_file = self._find_uncached_file()
+            if cold_file:
+                # Antes de escribir, para que la subida no compita con la descarga
+                result["cache"] = COLD
+                result["ttfb_ms"], result["seq_read_mbps"] = self._cold_read(cold_file)
+            else:
+                result["cache"] = WARM
+                result["ttfb_ms"] = self._time_to_first_byte()
+
+            self._step("write")
+            result["seq_write_mbps"] = self._sequential_write(big_file)
+
+            if not cold_file:
+                self._step("read")
+                result["seq_read_mbps"] = self._sequential_read(big_file)
+
+            small_dir = os.path.join(work_dir, "small")
+            os.makedirs(small_dir, exist_ok=True)
+            self._step("create")
+            result["create_ops"] = self._small_file_create(small_dir)
+            self._step("stat")
+            result["stat_ops"] = self._small_file_stat(small_dir)
+            self._step("listdir")
+            result["listdir_ops"] = self._listdir(small_dir)
+            return result
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _find_uncached_file(self):
+        """Un archivo no vacío de la raíz cuyo contenido no esté en la caché local, o None."""
+        if not self.label:
+            return None
+        sizes = {}
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if len(sizes) >= COLD_CANDIDATES:
+                        break
+                    if entry.name.startswith(".easyocamlfuse-bench-"):
+                        continue
+                    if entry.is_file() and entry.stat().st_size > 0:
+                        sizes[entry.name] = entry.stat().st_size
+            uncached = uncached_paths(self.label, list(sizes))
+        except (OSError, CacheDbError) as e:
+            print(f"Benchmark: no se pudo buscar un archivo sin cachear en {self.path}: {e}")
+            return None
+        if not uncached:
+            return None
+        # El mayor hasta el tamaño de la prueba: cuanto más se lea, más fiable la velocidad
+        limit = self.file_size_mb * BLOCK_SIZE
+        return os.path.join(self.path, max(uncached, key=lambda name: min(sizes[name], limit)))
+
+    def _cold_read(self, path):
+        """Primer byte (ms) y lectura secuencial (MB/s) de un archivo que se descarga de Drive."""
+        limit = self.file_size_mb * BLOCK_SIZE
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            _drop_page_cache(fd)
+            start = time.monotonic()
+            total = len(os.read(fd, 1))
+            ttfb_ms = (time.monotonic() - start) * 1000
+            while total < limit:
+                if self._cancel.is_set():
+                    raise BenchmarkCancelled()
+                chunk = os.read(fd, BLOCK_SIZE)
+                if not chunk:
+                    break
+                total += len(chunk)
+            elapsed = time.monotonic() - start
+        finally:
+            os.close(fd)
+        return ttfb_ms, total / BLOCK_SIZE / max(elapsed, 1e-6)
+
+    def _time_to_first_byte(self):
+        """Abre y lee un byte del primer archivo existente en la raíz (None si no hay ninguno)."""
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.startswith(".easyocamlfuse-bench-"):
+                        continue
+                    if entry.is_file() and entry.stat().st_size > 0:
+                        with open(entry.path, "rb") as f:
+                            _drop_page_cache(f.fileno())
+                            start = time.monotonic()
+                            f.read(1)
+                        return (time.monotonic() - start) * 1000
+        except OSError as e:
+            print(f"Benchmark: no se pudo medir el primer byte en {self.path}: {e}")
+        return None
+
+    def _sequential_write(self, path):
+        block = os.urandom(BLOCK_SIZE)
+        start = time.monotonic()
+        with open(path, "wb") as f:
+            for _ in range(self.file_size_mb):
+                if self._cancel.is_set():
+                    raise BenchmarkCancelled()
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        return self.file_size_mb / max(time.monotonic() - start, 1e-6)
+
+    def _sequential_read(self, path):
+        total = 0
+        with open(path, "rb") as f:
+            # Lo recién escrito sigue en la caché del kernel; sin ella se lee de la de ocamlfuse
+            _drop_page_cache(f.fileno())
+            start = time.monotonic()
+            while True:
+                if self._cancel.is_set():
+                    raise BenchmarkCancelled()
+                chunk = f.read(BLOCK_SIZE)
+                if not chunk:
+                    break
+                total += len(chunk)
+        return total / BLOCK_SIZE / max(time.monotonic() - start, 1e-6)
+
+    def _small_file_create(self, directory):
+        start = time.monotonic()
+        for i in range(self.small_files):
+            if self._cancel.is_set():
+                raise BenchmarkCancelled()
+            with open(os.path.join(directory, f"f{i:05d}"), "wb") as f:
+                f.write(b"x" * 512)
+        return self.small_files / max(time.monotonic() - start, 1e-6)
+
+    def _small_file_stat(self, directory):
+        start = time.monotonic()
+        for i in range(self.small_files):
+            if self._cancel.is_set():
+                raise BenchmarkCancelled()
+            os.stat(os.path.join(directory, f"f{i:05d}"))
+        return self.small_files / max(time.monotonic() - start, 1e-6)
+
+    def _listdir(self, directory, rounds=20):
+        start = time.monotonic()
+        for _ in range(rounds):
+            if self._cancel.is_set():
+                raise BenchmarkCancelled()
+            os.listdir(directory)
+        return rounds / max(time.monotonic() - start, 1e-6)
+
+
+class BenchmarkStore:
+    """Historial de resultados en ~/.gdrivemanagerconfig/benchmarks.json, por etiqueta."""
+
+    def __init__(self, path=BENCHMARKS_FILE, max_per_label=BENCHMARK_HISTORY):
+        self.path = path
+        self.max_per_label = max_per_label
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def history(self, label):
+        """Resultados de `label`, del más reciente al más antiguo."""
+        return list(reversed(self.load().get(label, [])))
+
+    def add(self, label, result):
+        with self._lock:
+            data = self.load()
+            results = data.setdefault(label, [])
+            results.append(result)
+            del results[:-self.max_per_label]
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+# Instancia global compartida por toda la aplicación
+benchmark_store = BenchmarkStore()
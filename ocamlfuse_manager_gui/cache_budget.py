@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from .constants import (
+    GDFUSE_DIR, CACHE_BUDGET_INTERVAL, CACHE_BUDGET_START_DELAY, CACHE_SCAN_BATCH, CACHE_FULL_RESCAN_PASSES
+)
+from .gdfuse_config import gdfuse_index
+from .processes import process_manager
+
+# Modos de recorte para las cuentas que superan su parte del presupuesto
+TRIM_LRU = "trim"     # borrar los archivos de caché usados hace más tiempo
+TRIM_CLEAR = "clear"  # vaciar la caché entera con google-drive-ocamlfuse -cc
+
+# Uso de caché de una cuenta: bytes ocupados y bytes asignados (None sin presupuesto)
+CacheUsage = namedtuple("CacheUsage", ["used", "budget"])
+
+MB = 1024 * 1024
+
+
+def cache_dir_for(label, gdfuse_dir=GDFUSE_DIR):
+    """Carpeta de caché de una cuenta: la de su config si la define, si no ~/.gdfuse/<etiqueta>/cache."""
+    custom = gdfuse_index.values(label).get("cache_directory")
+    if custom:
+        return os.path.expanduser(custom)
+    return os.path.join(os.path.expanduser(gdfuse_dir), label, "cache")
+
+
+def _is_protected(name):
+    # La base de datos de metadatos (cache.db y sus -journal/-wal) no se puede recortar
+    return ".db" in name
+
+
+class CacheBudgetManager:
+    """
+    Reparte un límite global de disco entre las cachés de todas las cuentas según su peso.
+    Un hilo mide el uso en segundo plano, por lotes y con pausas para no saturar el disco,
+    y recorta las cachés que se pasan de su parte. La medición es incremental: solo se
+    vuelven a listar las carpetas cuyo mtime cambió, y cada CACHE_FULL_RESCAN_PASSES
+    pasadas se hace una completa para recoger archivos que crecieron sin tocar su carpeta.
+    Solo se tocan cuentas desmontadas y nunca archivos con una subida pendiente: borrar
+    bajo un montaje vivo o contenido sin subir perdería datos.
+    """
+
+    def __init__(self, limit_mb=0, mode=TRIM_LRU, interval=CACHE_BUDGET_INTERVAL):
+        self.limit_mb = limit_mb    # 0 desactiva el recorte (solo se mide)
+        self.mode = mode
+        self.interval = interval
+        self.accounts = lambda: {}  # devuelve {etiqueta: datos de la cuenta}
+        self.is_busy = lambda label: True  # True si la cuenta está montada o montándose
+        self.on_update = None       # callback() tras cada medición
+        self._lock = threading.Lock()
+        self._usage = {}
+        self._dirs = {}             # etiqueta -> {carpeta: (mtime_ns, archivos, subcarpetas)}
+        self._guards = {}           # etiqueta -> Lock compartido con el montaje (ver mount_guard)
+        self._passes = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="cache-budget", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def trigger(self):
+        """Pide una medición (y recorte) inmediata, p. ej. tras desmontar una cuenta."""
+        self._wake.set()
+
+    def usage(self, label):
+        """Último CacheUsage conocido de `label`, o None si aún no se ha medido."""
+        with self._lock:
+            return self._usage.get(label)
+
+    def mount_guard(self, label):
+        """
+        Lock de la cuenta. El montaje lo mantiene mientras arranca y el recorte lo toma para
+        cada borrado (sin esperar: si está ocupado deja de recortar), así que ningún archivo
+        se borra bajo un google-drive-ocamlfuse que está arrancando.
+        """
+        with self._lock:
+            guard = self._guards.get(label)
+            if guard is None:
+                guard = self._guards[label] = threading.Lock()
+            return guard
+
+    def budgets(self, labels):
+        """Bytes asignados a cada cuenta: el límite global repartido por 'cache_weight'."""
+        if not self.limit_mb or not labels:
+            return {label: None for label in labels}
+        accounts = self.accounts()
+        weights = {label: max(0.0, float(accounts.get(label, {}).get("cache_weight", 1))) for label in labels}
+        total = sum(weights.values()) or 1.0
+        return {label: int(self.limit_mb * MB * weight / total) for label, weight in weights.items()}
+
+    def _run(self):
+        # Dejar que terminen los automontajes del arranque antes de la primera pasada
+        self._wake.wait(CACHE_BUDGET_START_DELAY)
+        self._wake.clear()
+        while self._running:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error en el presupuesto de caché: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self):
+        labels = [label for label in self.accounts() if label in gdfuse_index.labels()]
+        budgets = self.budgets(labels)
+        if self._passes % CACHE_FULL_RESCAN_PASSES == 0:
+            self._dirs = {}
+        self._passes += 1
+        for label in list(self._dirs):
+            if label not in labels:
+                del self._dirs[label]
+        usage = {}
+        for label in labels:
+            if not self._running:
+                return
+            files = self._scan(label, cache_dir_for(label))
+            used = sum(size for _path, size, _atime in files)
+            budget = budgets[label]
+            if budget is not None and used > budget and not self.is_busy(label):
+                used = self._trim(label, files, used, budget)
+            usage[label] = CacheUsage(used, budget)
+        with self._lock:
+            self._usage = usage
+        if self.on_update:
+            self.on_update()
+
+    def _scan(self, label, directory):
+        """
+        Lista (ruta, tamaño, último acceso) de los archivos de caché. Las carpetas cuyo mtime
+        no cambió desde la pasada anterior se toman de memoria; el resto se lista por lotes
+        y con pausas.
+        """
+        known = self._dirs.get(label, {})
+        tree = {}
+        files = []
+        stack = [directory]
+        seen = 0
+        while stack:
+            current = stack.pop()
+            try:
+                mtime = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            cached = known.get(current)
+            if cached is not None and cached[0] == mtime:
+                tree[current] = cached
+                files.extend(cached[1])
+                stack.extend(cached[2])
+                continue
+            dir_files, subdirs = [], []
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        seen += 1
+                        if seen % CACHE_SCAN_BATCH == 0:
+                            time.sleep(0.05)  # ceder el disco a los montajes activos
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False) and not _is_protected(entry.name):
+                                st = entry.stat(follow_symlinks=False)
+                                dir_files.append((entry.path, st.st_size, max(st.st_atime, st.st_mtime)))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            tree[current] = (mtime, dir_files, subdirs)
+            files.extend(dir_files)
+            stack.extend(subdirs)
+        self._dirs[label] = tree
+        return files
+
+    def _pending_uploads(self, label):
+        """remote_id con subida pendiente en `label`, o None si no se puede saber (no recortar)."""
+        # Importación local: cache_inspector depende de este módulo
+        from .cache_inspector import pending_upload_ids, CacheDbError
+        try:
+            return pending_upload_ids(label)
+        except CacheDbError as e:
+            print(f"No se recorta la caché de '{label}': no se pudieron leer sus subidas pendientes ({e})")
+            return None
+
+    def _trim(self, label, files, used, budget):
+        """Recorta la caché de `label` hasta su presupuesto. Devuelve los bytes que quedan ocupados."""
+        pending = self._pending_uploads(label)
+        if pending is None:
+            return used
+        guard = self.mount_guard(label)
+
+        if self.mode == TRIM_CLEAR:
+            if pending:
+                print(f"No se vacía la caché de '{label}': tiene {len(pending)} subidas pendientes")
+                return used
+            if not guard.acquire(blocking=False):
+                return used
+            try:
+                if self.is_busy(label):
+                    return used
+                process_manager.run_sync(["google-drive-ocamlfuse", "-cc", "-label", label])
+            except (OSError, subprocess.TimeoutExpired) as e:
+                print(f"Error al vaciar la caché de '{label}': {e}")
+                return used
+            finally:
+                guard.release()
+            return sum(size for _path, size, _atime in self._scan(label, cache_dir_for(label)))
+
+        for path, size, _atime in sorted(files, key=lambda f: f[2]):
+            if used <= budget:
+                break
+            if os.path.basename(path) in pending:
+                continue
+            # Un montaje que arranca tiene el lock; una cuenta montada se ve en is_busy
+            if not guard.acquire(blocking=False):
+                break
+            try:
+                if self.is_busy(label):
+                    break
+                os.remove(path)
+                used -= size
+            except OSError:
+                continue
+            finally:
+                guard.release()
+        return used
+
+
+# Instancia global compartida por toda la aplicación
+cache_budget = CacheBudgetManager()
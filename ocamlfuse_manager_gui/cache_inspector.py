@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import sqlite3
+import time
+import urllib.parse
+from collections import namedtuple
+from .cache_budget import cache_dir_for
+from .gdfuse_config import gdfuse_index
+
+CACHE_DB_NAME = "cache.db"
+
+# Estados de la tabla `resource` de google-drive-ocamlfuse
+SYNCHRONIZED = "Synchronized"
+UPLOAD_STATES = ("ToUpload", "Uploading")
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+# Metadatos por defecto de google-drive-ocamlfuse (segundos) si el config no lo define
+DEFAULT_METADATA_CACHE_TIME = 60
+
+CacheDbStats = namedtuple("CacheDbStats", [
+    "entries",          # filas de la tabla resource
+    "cached_files",     # archivos con contenido sincronizado en la caché local
+    "cached_bytes",     # suma de sus tamaños
+    "stale_entries",    # metadatos más antiguos que metadata_cache_time
+    "pending_uploads",  # recursos esperando subida (más la cola asíncrona si existe)
+    "db_bytes",         # tamaño del propio cache.db
+])
+
+
+class CacheDbError(Exception):
+    pass
+
+
+def cache_db_path(label):
+    return os.path.join(cache_dir_for(label), CACHE_DB_NAME)
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _connect_ro(path):
+    """
+    Abre cache.db con una URI `mode=ro` y en modo query_only, con un timeout corto para no
+    esperar nunca detrás de google-drive-ocamlfuse si está escribiendo.
+    """
+    if not os.path.exists(path):
+        raise CacheDbError(f"No existe {path}")
+    uri = "file:{}?mode=ro".format(urllib.parse.quote(path))
+    try:
+        conn = sqlite3.connect(uri, uri=True, timeout=0.2, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+    except sqlite3.Error as e:
+        raise CacheDbError(str(e))
+    return conn
+
+
+def inspect_cache_db(label, now=None):
+    """
+    Lee estadísticas agregadas del cache.db de `label` sin pasar por FUSE. La base se abre
+    con una URI `mode=ro` y en modo query_only, y todos los agregados se calculan en una
+    única consulta: un solo bloqueo compartido muy breve, con un timeout corto para no
+    esperar nunca detrás de google-drive-ocamlfuse si está escribiendo.
+    """
+    path = cache_db_path(label)
+    now = time.time() if now is None else now
+    try:
+        metadata_cache_time = int(gdfuse_index.values(label).get("metadata_cache_time", DEFAULT_METADATA_CACHE_TIME))
+    except ValueError:
+        metadata_cache_time = DEFAULT_METADATA_CACHE_TIME
+
+    conn = _connect_ro(path)
+    try:
+        resource_columns = _columns(conn, "resource")
+        if not resource_columns:
+            raise CacheDbError("cache.db sin tabla resource")
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+        # Las columnas cambian entre versiones de google-drive-ocamlfuse: solo se usan las que existen
+        is_file = "mime_type IS NOT ?" if "mime_type" in resource_columns else "1"
+        has_state = "state" in resource_columns
+        size = "COALESCE(size, 0)" if "size" in resource_columns else "0"
+        synced = f"state = ? AND {is_file}" if has_state else "0"
+        stale = "last_update < ?" if "last_update" in resource_columns else "0"
+        pending = "state IN (?, ?)" if has_state else "0"
+        queue = "(SELECT COUNT(*) FROM upload_queue)" if "upload_queue" in tables else "0"
+
+        params = []
+        if has_state:
+            params.append(SYNCHRONIZED)
+            if "mime_type" in resource_columns:
+                params.append(FOLDER_MIME)
+            # El mismo filtro aparece dos veces (conteo y suma)
+            params = params * 2
+        if "last_update" in resource_columns:
+            params.append(now - metadata_cache_time)
+        if has_state:
+            params.extend(UPLOAD_STATES)
+
+        query = f"""
+            SELECT COUNT(*),
+                   COALESCE(SUM(CASE WHEN {synced} THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN {synced} THEN {size} ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN {stale} THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN {pending} THEN 1 ELSE 0 END), 0) + {queue}
+            FROM resource
+        """
+        entries, cached_files, cached_bytes, stale_entries, pending_uploads = conn.execute(query, params).fetchone()
+    except sqlite3.OperationalError as e:
+        # "database is locked": ocamlfuse está escribiendo; mejor fallar que esperarle
+        raise CacheDbError(str(e))
+    finally:
+        conn.close()
+
+    return CacheDbStats(entries, cached_files, cached_bytes, stale_entries, pending_uploads, os.path.getsize(path))
+
+
+def pending_upload_ids(label):
+    """
+    Nombres (remote_id) de los archivos de la caché de `label` que esperan subida: recursos
+    en estado ToUpload/Uploading y los que estén en upload_queue. Se leen igual que en
+    inspect_cache_db. Lanza CacheDbError si la base no se puede leer o si hay algún
+    pendiente cuyo archivo no se puede identificar; quien recorta debe entonces no tocar
+    la caché.
+    """
+    conn = _connect_ro(cache_db_path(label))
+    try:
+        resource_columns = _columns(conn, "resource")
+        if not {"state", "remote_id"} <= resource_columns:
+            raise CacheDbError("cache.db sin columnas state/remote_id")
+        rows = conn.execute(
+            "SELECT remote_id FROM resource WHERE state IN (?, ?)", UPLOAD_STATES
+        ).fetchall()
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "upload_queue" in tables:
+            if "resource_id" in _columns(conn, "upload_queue"):
+                rows += conn.execute(
+                    "SELECT r.remote_id FROM upload_queue q LEFT JOIN resource r ON r.id = q.resource_id"
+                ).fetchall()
+            elif conn.execute("SELECT COUNT(*) FROM upload_queue").fetchone()[0]:
+                raise CacheDbError("upload_queue con un formato desconocido")
+    except sqlite3.Error as e:
+        raise CacheDbError(str(e))
+    finally:
+        conn.close()
+
+    pending = set()
+    for (remote_id,) in rows:
+        if not remote_id:
+            raise CacheDbError("subida pendiente sin remote_id")
+        pending.add(remote_id)
+    return pending
+
+
+def uncached_paths(label, paths):
+    """
+    De `paths` (rutas relativas a la raíz del montaje), las que google-drive-ocamlfuse ya
+    conoce pero cuyo contenido no está en la caché local: leerlas obliga a descargarlas de
+    Drive. Lanza CacheDbError si cache.db no se puede leer.
+    """
+    wanted = {"/" + path.lstrip("/"): path for path in paths}
+    conn = _connect_ro(cache_db_path(label))
+    try:
+        if not {"path", "remote_id"} <= _columns(conn, "resource"):
+            raise CacheDbError("cache.db sin columnas path/remote_id")
+        rows = []
+        items = list(wanted)
+        # SQLite limita el número de parámetros por consulta
+        for i in range(0, len(items), 500):
+            chunk = items[i:i + 500]
+            rows += conn.execute(
+                "SELECT path, remote_id FROM resource WHERE path IN ({})".format(", ".join("?" * len(chunk))), chunk
+            ).fetchall()
+    except sqlite3.Error as e:
+        raise CacheDbError(str(e))
+    finally:
+        conn.close()
+
+    cache_dir = cache_dir_for(label)
+    return [
+        wanted[path] for path, remote_id in rows
+        if remote_id and not os.path.exists(os.path.join(cache_dir, remote_id))
+    ]
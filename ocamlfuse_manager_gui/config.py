@@ -3,6 +3,7 @@ import os
 import json
 import shutil
 from .i18n import _
+from .constants import AUTOMOUNT_MAX_WORKERS
 
 class ConfigManager:
     def __init__(self, config_dir="~/.gdrivemanagerconfig", config_name="config.json", key_subdir=".secure_key"):
@@ -41,7 +42,12 @@ class ConfigManager:
                         "deleted_accounts": config.get("deleted_accounts", {}),
                         "autostart_enabled": config.get("autostart_enabled", False),
                         "ask_before_delete": config.get("ask_before_delete", True),
-                        "language": config.get("language", "es")
+                        "language": config.get("language", "es"),
+                        "automount_max_workers": config.get("automount_max_workers", AUTOMOUNT_MAX_WORKERS),
+                        "metrics_read_sample": config.get("metrics_read_sample", False),
+                        "cache_budget_mb": config.get("cache_budget_mb", 0),
+                        "cache_budget_mode": config.get("cache_budget_mode", "trim"),
+                        "unmount_on_exit": config.get("unmount_on_exit", False)
                     }
             return self._get_default_config()
         except Exception as e:
@@ -49,12 +55,20 @@ class ConfigManager:
             return self._get_default_config()
 
     def save_config(self, data):
+        """Guarda la configuración. Devuelve True si se escribió en disco."""
         try:
-           
-            with open(self.config_file, 'w') as f:
+            # Se escribe en un temporal y se renombra: un cierre a medio guardar no deja
+            # el archivo de configuración truncado
+            tmp_file = self.config_file + ".tmp"
+            with open(tmp_file, 'w') as f:
                 json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.config_file)
+            return True
         except Exception as e:
             print(_("Error al guardar configuración: {}").format(e))
+            return False
 
     def _get_default_config(self):
         return {
@@ -63,5 +77,10 @@ class ConfigManager:
             "deleted_accounts": {},
             "autostart_enabled": False,
             "ask_before_delete": True,
-            "language": "es"
+            "language": "es",
+            "automount_max_workers": AUTOMOUNT_MAX_WORKERS,
+            "metrics_read_sample": False,
+            "cache_budget_mb": 0,
+            "cache_budget_mode": "trim",
+            "unmount_on_exit": False
         }
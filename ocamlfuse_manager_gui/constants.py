@@ -15,3 +15,100 @@ CONFIG_FILE = os.path.expanduser("~/.gdrivemanagerconfig/config.json")
 GDFUSE_DIR   = "~/.gdfuse"
 OAUTH_PORT   = 8080
 MINIMIZED_FLAGS = ["--minimized", "--hide", "--tray", "--background"]
+
+# Automontaje en paralelo: número máximo de montajes simultáneos y timeout por cuenta (segundos)
+AUTOMOUNT_MAX_WORKERS = 4
+AUTOMOUNT_TIMEOUT = 30
+
+# Desmontaje en paralelo: hilos simultáneos, timeout por cuenta (segundos) y
+# reintento con desmontaje diferido (fusermount -uz) si el montaje está ocupado
+UNMOUNT_MAX_WORKERS = 8
+UNMOUNT_TIMEOUT = 15
+UNMOUNT_LAZY_FALLBACK = True
+
+# Métricas de latencia por montaje: segundos entre muestras, muestras por ventana
+# y bytes leídos en la muestra opcional de lectura
+METRICS_INTERVAL = 15
+METRICS_WINDOW = 240
+METRICS_READ_BYTES = 64 * 1024
+
+# Supervisor de remontaje: retardo base y máximo del retroceso exponencial (segundos),
+# intentos permitidos por ventana, tiempo que debe aguantar un montaje para considerarlo
+# estable y caídas rápidas seguidas que se consideran un bucle
+REMOUNT_BASE_DELAY = 2
+REMOUNT_MAX_DELAY = 300
+REMOUNT_MAX_ATTEMPTS = 5
+REMOUNT_WINDOW = 600
+REMOUNT_STABLE_AFTER = 120
+REMOUNT_CRASH_LOOP_LIMIT = 3
+
+# Presupuesto global de caché: segundos entre mediciones, espera antes de la primera
+# y archivos por lote antes de hacer una pausa al recorrer las cachés
+CACHE_BUDGET_INTERVAL = 300
+CACHE_BUDGET_START_DELAY = 60
+CACHE_SCAN_BATCH = 500
+# Cada cuántas pasadas se vuelve a listar toda la caché (entre medias solo las carpetas
+# que cambiaron): con el intervalo anterior, una vez por hora
+CACHE_FULL_RESCAN_PASSES = 12
+
+# Precalentamiento de carpetas fijadas: hilos por cuenta, ancho de banda total (MB/s),
+# tamaño máximo de archivo que se lee entero (MB) y tamaño de cada lectura (bytes)
+PREWARM_MAX_WORKERS = 4
+PREWARM_BANDWIDTH_MB = 8
+PREWARM_MAX_FILE_MB = 64
+PREWARM_CHUNK_SIZE = 1024 * 1024
+# Segundos que se espera a que los hilos de un precalentamiento cancelado suelten el
+# montaje antes de desmontarlo
+PREWARM_CANCEL_TIMEOUT = 5
+
+# Benchmark de montajes: tamaño del archivo secuencial (MB), archivos pequeños por
+# prueba y resultados que se guardan por cuenta
+BENCHMARK_FILE_MB = 32
+BENCHMARK_SMALL_FILES = 200
+BENCHMARK_HISTORY = 20
+
+# Seguimiento de gdfuse.log: líneas en memoria por cuenta, bytes del final que se leen
+# al abrir el log y segundos máximos de espera entre comprobaciones
+LOG_BUFFER_LINES = 5000
+LOG_INITIAL_TAIL_BYTES = 256 * 1024
+LOG_POLL_INTERVAL = 1.0
+
+# Analítica de uso de la API de Drive: minutos de historial por cuenta
+ANALYTICS_WINDOW_MINUTES = 180
+
+# Cola de trabajo de la interfaz: milisegundos que se agrupan las peticiones de los
+# hilos antes de ejecutarlas en el hilo de Tk (un fotograma)
+UI_FRAME_MS = 16
+
+# Refresco de las tablas de montajes y cuentas: milisegundos durante los que se agrupan
+# las peticiones de refresco en una sola pasada
+REFRESH_DEBOUNCE_MS = 200
+
+# Vigilancia de desmontajes externos: intervalo mínimo tras un cambio y máximo cuando
+# todo está estable (segundos); entre ambos el intervalo se duplica en cada ronda tranquila
+MONITOR_MIN_INTERVAL = 1
+MONITOR_MAX_INTERVAL = 30
+
+# Procesos externos: por programa, instancias simultáneas y timeout por defecto en
+# segundos (None = sin límite); bytes de salida que se guardan por tubería y segundos
+# de gracia entre SIGTERM y SIGKILL al cerrar la aplicación
+PROCESS_LIMITS = {
+    "google-drive-ocamlfuse": (8, 60),
+    "fusermount": (UNMOUNT_MAX_WORKERS, UNMOUNT_TIMEOUT),
+    "fusermount3": (UNMOUNT_MAX_WORKERS, UNMOUNT_TIMEOUT),
+    "xdg-open": (4, 10),
+    "open": (4, 10),
+    "zenity": (1, 60),
+    "kdialog": (1, 60),
+    "pkexec": (1, None),
+    "sh": (1, None),
+}
+PROCESS_DEFAULT_LIMIT = (4, 60)
+PROCESS_OUTPUT_LIMIT = 64 * 1024
+PROCESS_KILL_GRACE = 1
+
+# Cierre de la aplicación: plazo total de todas las etapas, duración a partir de la cual
+# una etapa se registra como lenta y margen tras el cierre antes de forzar la salida (segundos)
+SHUTDOWN_DEADLINE = 5
+SHUTDOWN_SLOW_STAGE = 0.5
+SHUTDOWN_EXIT_GRACE = 2
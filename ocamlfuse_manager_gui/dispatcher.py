@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import itertools
+import threading
+from collections import OrderedDict
+from gi.repository import GLib
+from .constants import UI_FRAME_MS
+
+
+class UiDispatcher:
+    """
+    Única vía para que los hilos de trabajo lleven acciones a la interfaz. Las acciones se
+    encolan con post() desde cualquier hilo y se ejecutan por lotes, una vez por fotograma,
+    en el hilo de Tk (el del GMainLoop). Las acciones con `coalesce=True` se fusionan: si
+    la misma acción ya está en cola solo se actualizan sus argumentos, de modo que veinte
+    peticiones de refresh_mounts en el mismo fotograma acaban en una sola ejecución.
+    """
+
+    def __init__(self, frame_ms=UI_FRAME_MS):
+        self.frame_ms = frame_ms
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # clave -> (función, argumentos)
+        self._counter = itertools.count()
+        self._scheduled = False
+        self._closed = False
+
+    def post(self, func, *args, coalesce=False, key=None):
+        """
+        Encola `func(*args)` para el hilo de Tk. Con `coalesce=True` la clave de fusión es la
+        propia función; `key` permite fusionar por otra cosa (p. ej. una por cuenta).
+        """
+        if key is None:
+            key = func if coalesce else ("once", next(self._counter))
+        with self._lock:
+            if self._closed:
+                return
+            # Si ya estaba en cola conserva su posición y toma los argumentos más recientes
+            self._pending[key] = (func, args)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        GLib.timeout_add(self.frame_ms, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            batch = list(self._pending.values())
+            self._pending.clear()
+            self._scheduled = False
+        for func, args in batch:
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error en acción de interfaz {getattr(func, '__name__', func)}: {e}")
+        return False
+
+    def close(self):
+        """Descarta lo pendiente y deja de aceptar acciones (al cerrar la aplicación)."""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+
+
+# Instancia global compartida por toda la aplicación
+ui_dispatcher = UiDispatcher()
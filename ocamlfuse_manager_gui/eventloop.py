@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import socket
+import tkinter as tk
+import _tkinter
+from gi.repository import GLib
+
+# Puertos TCP de los displays X11 (:0 -> 6000, :1 -> 6001, ...)
+X11_TCP_PORTS = range(6000, 6064)
+
+# Sondeo de reserva para lo que Tk no anuncia por el socket ni por `after` de Python
+# (p. ej. la animación de una ttk.Progressbar): empieza rápido y se espacia si no hay trabajo
+FALLBACK_MIN_MS = 20
+FALLBACK_MAX_MS = 1000
+
+
+def find_x11_fds():
+    """Descriptores de los sockets del proceso conectados a un servidor X11."""
+    fds = []
+    for name in os.listdir("/proc/self/fd"):
+        try:
+            fd = int(name)
+            if not os.readlink(f"/proc/self/fd/{name}").startswith("socket:"):
+                continue
+            sock = socket.socket(fileno=os.dup(fd))
+        except (ValueError, OSError):
+            continue
+        try:
+            peer = sock.getpeername()
+            if sock.family == socket.AF_UNIX:
+                if ".X11-unix" in (peer.decode(errors="replace") if isinstance(peer, bytes) else peer):
+                    fds.append(fd)
+            elif sock.family in (socket.AF_INET, socket.AF_INET6) and peer[1] in X11_TCP_PORTS:
+                fds.append(fd)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+    return fds
+
+
+class _AfterIterationSource(GLib.Source):
+    """
+    Fuente de GLib que se despacha al final de cada iteración del bucle, sea cual sea el
+    motivo por el que despertó. No adelanta nunca el despertar (prepare no fija timeout),
+    así que no añade ninguna activación por sí misma.
+    """
+
+    def __init__(self, callback):
+        super().__init__()
+        self._callback = callback
+
+    def prepare(self):
+        return False, -1
+
+    def check(self):
+        return True
+
+    def dispatch(self, callback, args):
+        self._callback()
+        return GLib.SOURCE_CONTINUE
+
+
+class TkEventBridge:
+    """
+    Integra el bucle de eventos de Tk en el GMainLoop sin sondeo periódico. Tk solo se
+    procesa cuando hay trabajo:
+      * llega algo por la conexión con el servidor X (vigilancia de E/S de GLib),
+      * vence un `after()` programado desde Python (se programa a la vez un timeout de GLib),
+      * cualquier otra fuente de GLib despertó el bucle (una acción de ui_dispatcher
+        suele cambiar widgets, y Tk necesita repintar).
+    Si no se encuentra el socket de X, o Tcl tiene temporizadores propios pendientes (los
+    que no pasaron por el after() de Python, que ya tienen su timeout de GLib), se recurre
+    a un sondeo de reserva que se espacia hasta FALLBACK_MAX_MS mientras no haya trabajo.
+    """
+
+    def __init__(self, root, main_loop):
+        self.root = root
+        self.main_loop = main_loop
+        self._tk = root.tk
+        self._draining = False
+        self._closed = False
+        self._watches = []
+        self._source = None
+        self._fallback_id = None
+        self._fallback_ms = FALLBACK_MIN_MS
+        self._original_after = None
+        self._bridged_afters = set()   # ids de after() con su propio timeout de GLib
+
+    def install(self):
+        """Sustituye al antiguo GLib.timeout_add(20, tkinter_update)."""
+        fds = find_x11_fds()
+        for fd in fds:
+            self._watches.append(GLib.io_add_watch(
+                fd, GLib.PRIORITY_DEFAULT, GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR, self._on_x11_ready
+            ))
+        if not fds:
+            print("No se encontró la conexión X11 de Tk; se usará sondeo adaptativo")
+
+        self._source = _AfterIterationSource(self.drain)
+        self._source.set_priority(GLib.PRIORITY_LOW)
+        self._source.attach(GLib.MainContext.default())
+        self._patch_after()
+
+        # Procesar lo que ya estuviera pendiente (creación de la ventana, after() previos)
+        self.drain()
+        if not fds:
+            self._schedule_fallback()
+
+    def _patch_after(self):
+        """Cada after() de Tkinter programa también el despertar de GLib para ese instante."""
+        bridge = self
+        original_after = self._original_after = tk.Misc.after
+
+        def after(widget, ms, func=None, *args):
+            ident = original_after(widget, ms, func, *args)
+            if func is not None and not bridge._closed:
+                bridge._bridged_afters.add(ident)
+                if ms == "idle":
+                    GLib.idle_add(bridge._wake)
+                else:
+                    GLib.timeout_add(max(0, int(ms)), bridge._wake)
+            return ident
+
+        tk.Misc.after = after
+
+    def _wake(self):
+        self.drain()
+        return False
+
+    def _on_x11_ready(self, fd, condition):
+        if condition & (GLib.IO_HUP | GLib.IO_ERR):
+            self.close()
+            return False
+        self.drain()
+        return not self._closed
+
+    def drain(self):
+        """Procesa todos los eventos pendientes de Tk sin bloquear. Devuelve cuántos procesó."""
+        if self._closed or self._draining:
+            return 0
+        self._draining = True
+        processed = 0
+        try:
+            while self._tk.dooneevent(_tkinter.ALL_EVENTS | _tkinter.DONT_WAIT):
+                processed += 1
+            self.root.winfo_exists()
+        except tk.TclError:
+            # La ventana se destruyó: fin de la aplicación
+            self.close()
+        finally:
+            self._draining = False
+        if processed and self._fallback_id is None and not self._closed and self._tcl_timers_pending():
+            self._schedule_fallback()
+        return processed
+
+    def _tcl_timers_pending(self):
+        """True si Tcl tiene temporizadores que no programó el after() de Python."""
+        try:
+            pending = set(self._tk.splitlist(self._tk.call("after", "info")))
+        except tk.TclError:
+            return False
+        # Olvidar los ids que ya vencieron o se cancelaron
+        self._bridged_afters &= pending
+        return bool(pending - self._bridged_afters)
+
+    def _schedule_fallback(self):
+        self._fallback_id = GLib.timeout_add(self._fallback_ms, self._on_fallback)
+
+    def _on_fallback(self):
+        self._fallback_id = None
+        if self._closed:
+            return False
+        processed = self.drain()
+        if processed:
+            self._fallback_ms = FALLBACK_MIN_MS
+        else:
+            self._fallback_ms = min(FALLBACK_MAX_MS, self._fallback_ms * 2)
+        # Sin socket X el sondeo es permanente; con él, solo mientras Tcl tenga temporizadores
+        if self._fallback_id is None and (not self._watches or self._tcl_timers_pending()):
+            self._schedule_fallback()
+        return False
+
+    def close(self):
+        """Retira las fuentes de GLib y devuelve tk.Misc.after a su versión original."""
+        if self._closed:
+            return
+        self._closed = True
+        for watch in self._watches:
+            GLib.source_remove(watch)
+        self._watches = []
+        if self._fallback_id is not None:
+            GLib.source_remove(self._fallback_id)
+            self._fallback_id = None
+        if self._source is not None:
+            self._source.destroy()
+        if self._original_after is not None:
+            tk.Misc.after = self._original_after
+            self._original_after = None
+        if self.main_loop.is_running():
+            self.main_loop.quit()
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from .constants import GDFUSE_DIR
+
+
+def parse_config_values(path):
+    """Lee un archivo config de google-drive-ocamlfuse y devuelve sus pares clave=valor."""
+    values = {}
+    with open(path, "r") as f:
+        for line in f:
+            if "=" in line and not line.lstrip().startswith("#"):
+                key, value = line.split("=", 1)
+                values[key.strip()] = value.strip()
+    return values
+
+
+# Claves de ~/.gdfuse/<etiqueta>/config que afectan al rendimiento. `kind` indica cómo
+# validar el valor: "bool" (true/false), "int" (entero >= 0)
+PerformanceKey = namedtuple("PerformanceKey", ["name", "kind"])
+
+PERFORMANCE_KEYS = (
+    PerformanceKey("max_cache_size_mb", "int"),
+    PerformanceKey("stream_large_files", "bool"),
+    PerformanceKey("large_file_threshold_mb", "int"),
+    PerformanceKey("metadata_cache_time", "int"),
+    PerformanceKey("max_download_speed", "int"),
+    PerformanceKey("max_upload_speed", "int"),
+    PerformanceKey("async_upload_queue", "bool"),
+    PerformanceKey("async_upload_threads", "int"),
+    PerformanceKey("memory_buffer_size", "int"),
+    PerformanceKey("max_memory_cache_size", "int"),
+    PerformanceKey("read_ahead_buffers", "int"),
+)
+
+# Perfiles predefinidos. Solo tocan las claves que listan; el resto del config se conserva.
+PRESETS = {
+    "media_streaming": {
+        "stream_large_files": "true",
+        "large_file_threshold_mb": "16",
+        "memory_buffer_size": "4194304",
+        "max_memory_cache_size": "104857600",
+        "read_ahead_buffers": "5",
+        "metadata_cache_time": "300",
+    },
+    "bulk_upload": {
+        "async_upload_queue": "true",
+        "async_upload_threads": "10",
+        "max_upload_speed": "0",
+        "max_cache_size_mb": "2048",
+        "metadata_cache_time": "120",
+    },
+    "low_memory": {
+        "stream_large_files": "false",
+        "memory_buffer_size": "1048576",
+        "max_memory_cache_size": "10485760",
+        "read_ahead_buffers": "0",
+        "async_upload_threads": "2",
+        "max_cache_size_mb": "256",
+    },
+}
+
+
+def validate_value(key, value):
+    """Normaliza el valor de una clave de rendimiento. Lanza ValueError si no es válido."""
+    kinds = {perf_key.name: perf_key.kind for perf_key in PERFORMANCE_KEYS}
+    value = str(value).strip()
+    kind = kinds.get(key)
+    if kind == "bool":
+        lowered = value.lower()
+        if lowered not in ("true", "false"):
+            raise ValueError(f"{key}: se esperaba true o false")
+        return lowered
+    if kind == "int":
+        if not value.isdigit():
+            raise ValueError(f"{key}: se esperaba un entero no negativo")
+        return str(int(value))
+    return value
+
+
+class GdfuseConfig:
+    """
+    Lector/escritor de un archivo config de google-drive-ocamlfuse que conserva el resto
+    del archivo tal cual: comentarios, orden y claves desconocidas. Solo se reescriben las
+    líneas de las claves modificadas y las nuevas se añaden al final.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "r") as f:
+            self._lines = f.read().splitlines()
+        self._dirty = False
+
+    @classmethod
+    def for_label(cls, label, gdfuse_dir=GDFUSE_DIR):
+        return cls(os.path.join(os.path.expanduser(gdfuse_dir), label, "config"))
+
+    def _find(self, key):
+        for i, line in enumerate(self._lines):
+            if "=" in line and not line.lstrip().startswith("#"):
+                if line.split("=", 1)[0].strip() == key:
+                    return i
+        return None
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        if i is None:
+            return default
+        return self._lines[i].split("=", 1)[1].strip()
+
+    def values(self, keys):
+        return {key: self.get(key) for key in keys}
+
+    def set(self, key, value):
+        line = f"{key}={value}"
+        i = self._find(key)
+        if i is None:
+            self._lines.append(line)
+        elif self._lines[i] != line:
+            self._lines[i] = line
+        else:
+            return
+        self._dirty = True
+
+    def update(self, values):
+        for key, value in values.items():
+            self.set(key, validate_value(key, value))
+
+    def save(self):
+        """Escribe el archivo de forma atómica conservando sus permisos (contiene secretos)."""
+        if not self._dirty:
+            return False
+        directory = os.path.dirname(self.path)
+        mode = os.stat(self.path).st_mode & 0o777
+        fd, tmp_path = tempfile.mkstemp(prefix=".config.", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write("\n".join(self._lines) + "\n")
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._dirty = False
+        return True
+
+
+def apply_values(labels, values, index=None):
+    """
+    Aplica `values` al config de cada etiqueta de `labels`. Devuelve {etiqueta: error o None}.
+    Los cambios se notan en el siguiente montaje de cada cuenta.
+    """
+    results = {}
+    for label in labels:
+        try:
+            config = GdfuseConfig.for_label(label)
+            config.update(values)
+            config.save()
+            results[label] = None
+        except (OSError, ValueError) as e:
+            results[label] = str(e)
+    (index or gdfuse_index).invalidate()
+    return results
+
+
+def apply_preset(labels, preset, index=None):
+    """Aplica el perfil `preset` (clave de PRESETS) a varias cuentas a la vez."""
+    return apply_values(labels, PRESETS[preset], index)
+
+
+class GdfuseConfigIndex:
+    """
+    Índice en memoria de ~/.gdfuse: etiqueta -> archivo config (con sus valores ya leídos)
+    y punto de montaje -> etiqueta. Solo se vuelve a leer un config cuando cambia su mtime
+    y solo se vuelve a listar el directorio cuando cambia el mtime de ~/.gdfuse, así que
+    resolver etiquetas en cada refresco no hace E/S de archivos en el caso normal.
+    """
+
+    def __init__(self, gdfuse_dir=GDFUSE_DIR, max_age=2.0):
+        self.gdfuse_dir = os.path.expanduser(gdfuse_dir)
+        self.max_age = max_age  # segundos durante los que se confía en el índice sin hacer stat
+        self._lock = threading.Lock()
+        self._dir_mtime = None
+        self._labels = []
+        self._configs = {}        # etiqueta -> (ruta, mtime_ns, valores)
+        self._mount_points = {}   # punto de montaje -> etiqueta
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        """Fuerza la revalidación en la próxima consulta (p. ej. tras escribir un config)."""
+        with self._lock:
+            self._checked_at = 0.0
+            self._dir_mtime = None
+
+    def labels(self):
+        self._revalidate()
+        return list(self._configs)
+
+    def config_path(self, label):
+        self._revalidate()
+        entry = self._configs.get(label)
+        return entry[0] if entry else None
+
+    def values(self, label):
+        """Devuelve una copia de los valores del config de `label` ({} si no existe)."""
+        self._revalidate()
+        entry = self._configs.get(label)
+        return dict(entry[2]) if entry else {}
+
+    def label_for_mount_point(self, mount_point):
+        self._revalidate()
+        return self._mount_points.get(mount_point)
+
+    def _revalidate(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.max_age:
+                return
+            self._checked_at = now
+
+            try:
+                dir_mtime = os.stat(self.gdfuse_dir).st_mtime_ns
+            except OSError:
+                self._dir_mtime = None
+                self._labels = []
+                self._configs = {}
+                self._mount_points = {}
+                return
+
+            if dir_mtime != self._dir_mtime:
+                self._dir_mtime = dir_mtime
+                self._labels = sorted(os.listdir(self.gdfuse_dir))
+
+            changed = False
+            configs = {}
+            for label in self._labels:
+                path = os.path.join(self.gdfuse_dir, label, "config")
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    changed = changed or label in self._configs
+                    continue
+                cached = self._configs.get(label)
+                if cached and cached[1] == mtime:
+                    configs[label] = cached
+                    continue
+                try:
+                    configs[label] = (path, mtime, parse_config_values(path))
+                    changed = True
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Error leyendo config de {label}: {e}")
+
+            if changed or configs.keys() != self._configs.keys():
+                self._configs = configs
+                self._mount_points = {
+                    values["mount_point"]: label
+                    for label, (_path, _mtime, values) in configs.items()
+                    if values.get("mount_point")
+                }
+
+
+# Instancia global compartida por toda la aplicación
+gdfuse_index = GdfuseConfigIndex()
@@ -13,21 +13,24 @@
 # junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
 
 import os
+import re
+import json
 import sys
-import subprocess
 import notify2
 import webbrowser
 import threading
 import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk
 import shutil
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import GLib
 
-from .constants import LOGO_FILE, GDFUSE_DIR, CONFIG_FILE, APP_VERSION, MINIMIZED_FLAGS
+from .constants import (
+    LOGO_FILE, GDFUSE_DIR, CONFIG_FILE, APP_VERSION, MINIMIZED_FLAGS, AUTOMOUNT_MAX_WORKERS, METRICS_INTERVAL,
+    BENCHMARK_FILE_MB, REFRESH_DEBOUNCE_MS
+)
 from .utils import (
     ToolTip,
     centrar_ventana,
@@ -38,9 +41,29 @@ from .utils import (
     check_for_updates
 )
 from .config    import ConfigManager
-from .mount     import MountManager
+from .mount     import MountManager, parse_mount_options
+from .mount_jobs import (
+    SPAWNING, WAITING_FOR_FUSE, RETRYING_LAZY_UNMOUNT, RETRYING_NONEMPTY, MOUNTED, FAILED
+)
+from .mount_table import mount_table
+from .probe import mount_probe, HEALTHY, SLOW, STALE, HUNG
+from .metrics import mount_metrics, LISTDIR
+from .supervisor import GAVE_UP_CRASH_LOOP
+from .cache_budget import cache_budget, MB, TRIM_LRU, TRIM_CLEAR
+from .prewarm import prewarmer
+from .benchmark import MountBenchmark, BenchmarkCancelled, benchmark_store, COLD, WARM
+from .logtail import log_tailers, LEVELS, ERROR, WARNING, SOURCE_MOUNT
+from .cache_inspector import inspect_cache_db, CacheDbError
+from .log_analytics import (
+    api_usage, REQUESTS, RETRIES, BACKOFFS, HTTP_403, HTTP_429, UPLOAD_BYTES, DOWNLOAD_BYTES
+)
+from .gdfuse_config import gdfuse_index, GdfuseConfig, PERFORMANCE_KEYS, apply_values, apply_preset
 from .account   import AccountManager
 from .tray      import TrayIconManager
+from .dispatcher import ui_dispatcher
+from .backend import backend, CancelToken, run_blocking
+from .processes import process_manager
+from .shutdown import shutdown_coordinator
 from .i18n      import _, i18n_instance
 from .encryption import EncryptionManager
 ICON_SIZE = (28, 28)
@@ -63,6 +86,13 @@ class GoogleDriveManager:
         minimized = any(flag in sys.argv for flag in MINIMIZED_FLAGS)
         self.root = tk.Tk(className="easy-ocamlfuse")
         self.root.withdraw()
+
+        # Refresco incremental de las tablas: filas mostradas por tabla, refrescos
+        # diferidos pendientes y último estado guardado en disco
+        self._tree_rows = {}
+        self._refresh_pending = {}
+        self._last_saved_state = None
+        self._tk_state = {}  # último valor leído de cada variable de Tk que se guarda
         
         self.root.title(_("Easy Ocamlfuse"))
         self.root.geometry("930x620")
@@ -107,6 +137,12 @@ class GoogleDriveManager:
         self.deleted_accounts = config_data.get("deleted_accounts", {})
         self.autostart_enabled = config_data.get("autostart_enabled", False)
         self.ask_before_delete = config_data.get("ask_before_delete", True)
+        self.automount_max_workers = config_data.get("automount_max_workers", AUTOMOUNT_MAX_WORKERS)
+        self.metrics_read_sample = config_data.get("metrics_read_sample", False)
+        mount_metrics.read_sample = self.metrics_read_sample
+        self.cache_budget_mb = config_data.get("cache_budget_mb", 0)
+        self.cache_budget_mode = config_data.get("cache_budget_mode", "trim")
+        self.unmount_on_exit = config_data.get("unmount_on_exit", False)
         self.do_not_show_gnome_tray_warning = tk.BooleanVar(value=config_data.get("do_not_show_gnome_tray_warning", False))
 
         # Inicializar autostart_var ANTES de cualquier save_config
@@ -138,10 +174,21 @@ class GoogleDriveManager:
         # Managers
         self.mount_mgr = MountManager(self.mounted_accounts)
         self.mount_mgr.main_app = self
-        self.mount_mgr.start_mount_monitor(
-            interval=5,
-            on_unmount_callback=self.on_external_unmount
-        )
+        self.mount_mgr.supervisor.on_remounted = self.on_supervisor_remounted
+        self.mount_mgr.supervisor.on_give_up = self.on_supervisor_give_up
+
+        # Presupuesto global de caché: mide en segundo plano y recorta cuentas desmontadas
+        cache_budget.limit_mb = self.cache_budget_mb
+        cache_budget.mode = self.cache_budget_mode
+        # El hilo del presupuesto recibe una copia: el de Tk sustituye y modifica las cuentas a la vez
+        cache_budget.accounts = lambda: {label: dict(data) for label, data in list(self.accounts.items())}
+        cache_budget.is_busy = self._cache_is_busy
+        cache_budget.on_update = lambda: ui_dispatcher.post(self._update_cache_column, coalesce=True)
+        cache_budget.start()
+
+        # Precalentar las carpetas fijadas de cada cuenta en cuanto se monta
+        self.mount_mgr.add_mounted_listener(self._on_account_mounted)
+        self.mount_mgr.start_mount_monitor(on_unmount_callback=self.on_external_unmount)
         self.account_mgr = AccountManager(
             self,            self.accounts,
             self.deleted_accounts,
@@ -166,6 +213,12 @@ class GoogleDriveManager:
         self._update_accounts_tab_button_states()
         self.root.update_idletasks() 
         self.is_quitting = False # Nueva bandera de estado
+        # Mantener al día la copia de las variables de Tk que se guardan (ver _tk_value)
+        for name, var in (("autostart_enabled", self.autostart_var),
+                          ("do_not_show_gnome_tray_warning", self.do_not_show_gnome_tray_warning)):
+            self._tk_value(name, var)
+            var.trace_add("write", lambda *_args, name=name, var=var: self._tk_value(name, var))
+        self._register_shutdown_stages()
 
         
        
@@ -175,6 +228,7 @@ class GoogleDriveManager:
 
         # Iniciar el icono de la bandeja de forma robusta después de que la UI esté lista
         self.root.after(100, self.start_tray_icon)
+        self.root.after(METRICS_INTERVAL * 1000, self._update_metrics_column)
 
         self.check_for_updates_on_startup()
 
@@ -191,9 +245,13 @@ class GoogleDriveManager:
     def _cargar_datos_pesados(self):
         """Carga datos de cuentas y montajes de forma asíncrona."""
         # Primero actualizamos cuentas registradas (de forma segura en hilo principal)
-        GLib.idle_add(self.refresh_accounts)
-        GLib.idle_add(self.refresh_mounts)
+        ui_dispatcher.post(self.request_refresh_accounts, coalesce=True)
+        ui_dispatcher.post(self.request_refresh_mounts, coalesce=True)
         
+        # Analizar desde ya el log de cada cuenta para tener la serie de uso de la API
+        for label in list(self.accounts):
+            api_usage.watch(label)
+
         # Pequeño retardo inicial para dar tiempo a que la red esté estable
         time.sleep(1)
         
@@ -201,7 +259,7 @@ class GoogleDriveManager:
         self.automount_accounts()
         
         # Un último refresco final tras el automontaje para asegurar la sincronización
-        GLib.idle_add(self.refresh_mounts)
+        ui_dispatcher.post(self.request_refresh_mounts, coalesce=True)
     def _load_icon(self, path, size=ICON_SIZE, bg_color=None):
         try:
             full_path = os.path.join(os.path.dirname(__file__), path)
@@ -233,17 +291,40 @@ class GoogleDriveManager:
       
         return sys.platform != "linux" or "wayland" in os.environ.get("XDG_SESSION_TYPE", "").lower()
 
+    def _tk_value(self, name, var):
+        """
+        Valor de una variable de Tk, o el último que se leyó si ya no se puede leer: cuando
+        el cierre llega con la ventana destruida (se perdió la conexión con X) el estado
+        se sigue guardando con los valores reales y no con los de por defecto.
+        """
+        try:
+            self._tk_state[name] = var.get()
+        except (tk.TclError, RuntimeError, ValueError):
+            pass
+        return self._tk_state.get(name, False)
+
     def _save_state(self):
         config = {
             "accounts": self.accounts,
             "mounted_accounts": self.mounted_accounts,
             "deleted_accounts": self.deleted_accounts,
-            "autostart_enabled": self.autostart_var.get(),
+            "autostart_enabled": self._tk_value("autostart_enabled", self.autostart_var),
             "ask_before_delete": self.ask_before_delete,
             "language": i18n_instance.lang,
-            "do_not_show_gnome_tray_warning": self.do_not_show_gnome_tray_warning.get()
+            "automount_max_workers": self.automount_max_workers,
+            "metrics_read_sample": self.metrics_read_sample,
+            "cache_budget_mb": self.cache_budget_mb,
+            "cache_budget_mode": self.cache_budget_mode,
+            "unmount_on_exit": self.unmount_on_exit,
+            "do_not_show_gnome_tray_warning": self._tk_value("do_not_show_gnome_tray_warning", self.do_not_show_gnome_tray_warning)
         }
-        self.config_mgr.save_config(config)
+        # Solo se escribe el archivo si algo cambió desde el último guardado
+        serialized = json.dumps(config, sort_keys=True)
+        if serialized == self._last_saved_state:
+            return
+        # Solo se recuerda lo que llegó a disco: tras un fallo el siguiente guardado reintenta
+        if self.config_mgr.save_config(config):
+            self._last_saved_state = serialized
 
     def on_closing(self):
         """Maneja el evento de cierre de la ventana principal"""
@@ -418,20 +499,41 @@ class GoogleDriveManager:
 
     def on_external_unmount(self, label, mount_point):
         """Callback cuando se detecta un desmontaje externo"""
-        GLib.idle_add(self.handle_unmount_notification, label, mount_point)
+        ui_dispatcher.post(self.handle_unmount_notification, label, mount_point)
 
     def handle_unmount_notification(self, label, mount_point):
         self.refresh_mounts()
+        if label in self.mount_mgr.supervisor.pending():
+            body = _("La cuenta '{label}' fue desmontada externamente. Se volverá a montar automáticamente.").format(label=label)
+        else:
+            body = _("La cuenta '{label}' fue desmontada externamente.").format(label=label)
+        self._show_notification(_("Desmontaje Detectado"), body)
+        return False
+
+    def on_supervisor_remounted(self, label, mount_point):
+        """Callback del supervisor (desde su hilo) cuando consigue remontar una cuenta."""
+        ui_dispatcher.post(self.request_refresh_mounts, coalesce=True)
+        ui_dispatcher.post(
+            self._show_notification, _("Cuenta remontada"),
+            _("La cuenta '{label}' se volvió a montar en {mount_point}.").format(label=label, mount_point=mount_point)
+        )
+
+    def on_supervisor_give_up(self, label, reason):
+        """Callback del supervisor (desde su hilo) cuando deja de reintentar una cuenta."""
+        if reason == GAVE_UP_CRASH_LOOP:
+            body = _("La cuenta '{label}' se desmonta repetidamente nada más montarse. Se deja de remontar automáticamente.").format(label=label)
+        else:
+            body = _("No se pudo volver a montar la cuenta '{label}' tras varios intentos.").format(label=label)
+        ui_dispatcher.post(self.request_refresh_mounts, coalesce=True)
+        ui_dispatcher.post(self._show_notification, _("Remontaje abandonado"), body, notify2.URGENCY_CRITICAL)
+
+    def _show_notification(self, title, body, urgency=None):
         try:
             if not hasattr(self, '_notify_inited'):
                 notify2.init("EasyOcamlfuse")
                 self._notify_inited = True
-            n = notify2.Notification(
-                _("Desmontaje Detectado"),
-                _("La cuenta '{label}' fue desmontada externamente.").format(label=label),
-                icon=LOGO_FILE
-            )
-            n.set_urgency(notify2.URGENCY_NORMAL)
+            n = notify2.Notification(title, body, icon=LOGO_FILE)
+            n.set_urgency(notify2.URGENCY_NORMAL if urgency is None else urgency)
             n.show()
         except Exception as e:
             print(f"Error al mostrar la notificación: {e}")
@@ -466,7 +568,7 @@ class GoogleDriveManager:
         self.mounted_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Configuración del Treeview
-        columns = (_("Cuenta"), _( "Etiqueta"), _( "Punto de Montaje"), _( "Estado"))
+        columns = (_("Cuenta"), _( "Etiqueta"), _( "Punto de Montaje"), _( "Estado"), _( "Latencia p50/p99"))
         self.mounted_tree = ttk.Treeview(self.mounted_frame, columns=columns, show="headings", height=8)
         for col in columns:
             self.mounted_tree.heading(col, text=col, anchor="center")
@@ -509,6 +611,10 @@ class GoogleDriveManager:
         self.btn_refresh_mounts.pack(side=tk.LEFT, padx=8, pady=2)
         self.btn_open_folder = tk.Button(bottom_buttons, text=_("Abrir Carpeta"), image=self.open_folder_icon, compound=tk.LEFT, command=self.open_mount_folder)
         self.btn_open_folder.pack(side=tk.LEFT, padx=8, pady=2)
+        self.btn_pinned_folders = tk.Button(bottom_buttons, text=_("Carpetas Fijadas"), command=self.show_pinned_folders_dialog)
+        self.btn_pinned_folders.pack(side=tk.LEFT, padx=8, pady=2)
+        self.btn_benchmark = tk.Button(bottom_buttons, text=_("Benchmark"), command=self.show_benchmark_dialog)
+        self.btn_benchmark.pack(side=tk.LEFT, padx=8, pady=2)
 
     def create_accounts_tab(self):
         """Crear la pestaña de gestión de cuentas"""
@@ -570,11 +676,11 @@ class GoogleDriveManager:
         self.accounts_list_frame = ttk.LabelFrame(self.accounts_frame, text=_("Cuentas Configuradas"))
         self.accounts_list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        acc_columns = (_("Etiqueta"), _( "Client ID"), _( "Estado"), _( "Montar al iniciar"))
+        acc_columns = (_("Etiqueta"), _( "Client ID"), _( "Estado"), _( "Caché"), _( "Montar al iniciar"), _( "Remontar si cae"))
         self.accounts_tree = ttk.Treeview(self.accounts_list_frame, columns=acc_columns, show="headings", height=10)
         for col in acc_columns:
             self.accounts_tree.heading(col, text=col, anchor="center")
-            if col == _( "Montar al iniciar"):
+            if col in (_( "Caché"), _( "Montar al iniciar"), _( "Remontar si cae")):
                 self.accounts_tree.column(col, width=120, anchor="center")
             else:
                 self.accounts_tree.column(col, width=200, anchor="center")
@@ -589,12 +695,17 @@ class GoogleDriveManager:
             region = self.accounts_tree.identify('region', event.x, event.y)
             if region != 'cell': return
             col = self.accounts_tree.identify_column(event.x)
-            if col != f"#{len(acc_columns)}": return
+            # Columnas con casilla: montar al iniciar y remontar automáticamente si se cae
+            toggles = {f"#{len(acc_columns) - 1}": 'automount', f"#{len(acc_columns)}": 'auto_remount'}
+            if col not in toggles: return
             row_id = self.accounts_tree.identify_row(event.y)
             if not row_id: return
             label = self.accounts_tree.item(row_id, 'values')[0]
-            current = self.accounts.get(label, {}).get('automount', False)
-            self.accounts[label]['automount'] = not current
+            key = toggles[col]
+            current = self.accounts.get(label, {}).get(key, False)
+            self.accounts[label][key] = not current
+            if key == 'auto_remount' and current:
+                self.mount_mgr.supervisor.cancel(label)
             self._save_state()
             self.refresh_accounts()
         self.accounts_tree.bind('<Button-1>', on_automount_click)
@@ -619,6 +730,18 @@ class GoogleDriveManager:
         self.btn_restore_account = tk.Button(center_frame, text=_("Restaurar Cuenta"), image=self.restore_account_icon, compound=tk.LEFT, command=self.account_mgr.restore_account)
         self.btn_restore_account.pack(side=tk.LEFT, padx=10, pady=2)
 
+        self.btn_performance = tk.Button(center_frame, text=_("Rendimiento"), command=self.show_performance_dialog)
+        self.btn_performance.pack(side=tk.LEFT, padx=10, pady=2)
+
+        self.btn_view_log = tk.Button(center_frame, text=_("Ver Log"), command=self.show_log_viewer)
+        self.btn_view_log.pack(side=tk.LEFT, padx=10, pady=2)
+
+        self.btn_api_usage = tk.Button(center_frame, text=_("Uso de API"), command=self.show_api_usage)
+        self.btn_api_usage.pack(side=tk.LEFT, padx=10, pady=2)
+
+        self.btn_inspect_cache = tk.Button(center_frame, text=_("Inspeccionar Caché"), command=self.inspect_cache)
+        self.btn_inspect_cache.pack(side=tk.LEFT, padx=10, pady=2)
+
         def on_account_select(event):
             selection = self.accounts_tree.selection()
             if not selection:
@@ -703,6 +826,7 @@ class GoogleDriveManager:
             if os.path.exists(old_gdfuse_path):
                 try:
                     shutil.move(old_gdfuse_path, new_gdfuse_path)
+                    gdfuse_index.invalidate()
                 except Exception as e:
                     messagebox.showerror(_("Error"), _('''No se pudo renombrar la carpeta de configuración de ocamlfuse:\n{} a {}\n\nError: {}\n\nLa etiqueta se ha actualizado en la aplicación, pero es posible que necesites corregir la carpeta manualmente para evitar problemas.''').format(old_gdfuse_path, new_gdfuse_path, e))
                     return
@@ -743,6 +867,7 @@ class GoogleDriveManager:
             variable=self.autostart_var,
             command=self.toggle_autostart
         )
+        preferences_menu.add_command(label=_("Límite de caché..."), command=self.set_cache_budget)
         preferences_menu.add_separator()
         preferences_menu.add_command(label=_("Restaurar configuración"), command=self.restore_config)
 
@@ -941,14 +1066,16 @@ class GoogleDriveManager:
 
         # --- Define aquí los callbacks antes de llamar a instalar_ocamlfuse_async ---
         def output_callback(line):
-            GLib.idle_add(lambda: output_text.insert('end', line))
-            GLib.idle_add(lambda: output_text.see('end'))
+            def append():
+                output_text.insert('end', line)
+                output_text.see('end')
+            ui_dispatcher.post(append)
 
         def status_callback(text):
-            GLib.idle_add(lambda: status_label.config(text=text))
+            ui_dispatcher.post(lambda: status_label.config(text=text))
 
         def finish_callback(returncode):
-            GLib.idle_add(lambda: progress.stop())
+            ui_dispatcher.post(progress.stop)
             print(f"Código de retorno de la instalación: {returncode}")
 
             def handle_success():
@@ -974,9 +1101,9 @@ class GoogleDriveManager:
                 ttk.Button(dialog, text=_("Cerrar"), command=dialog.destroy).pack(pady=10)
 
             if returncode == 0:
-                GLib.idle_add(handle_success)
+                ui_dispatcher.post(handle_success)
             else:
-                GLib.idle_add(handle_error)
+                ui_dispatcher.post(handle_error)
 
        # llama a la función de utilidades
         instalar_ocamlfuse_async(install_cmd, output_callback, status_callback, finish_callback, use_pkexec=use_pkexec)
@@ -995,29 +1122,17 @@ class GoogleDriveManager:
             messagebox.showerror(_("Error"), msg)
             return
 
-        try:
-            cancel_event = threading.Event()
-            progress_dialog = self.show_progress_dialog(_("Esperando autorización..."), cancel_event)
-
-            # Ejecutar en un hilo para no congelar la GUI
-            results = {"success": False, "email": None, "error": None}
-            def run_setup():
-                results["success"], results["email"], results["error"] = self.account_mgr.setup_account_logic(
-                    label, client_id, client_secret, cancel_event
-                )
-            
-            setup_thread = threading.Thread(target=run_setup, daemon=True)
-            setup_thread.start()
+        cancel_token = CancelToken()
+        progress_dialog = self.show_progress_dialog(_("Esperando autorización..."), cancel_token)
 
-            # Esperar a que el hilo termine manteniendo la GUI viva
-            while setup_thread.is_alive():
-                self.root.update()
-                time.sleep(0.1)
-
-            progress_dialog.destroy()
-            success = results["success"]
-            email = results["email"]
-            error = results["error"]
+        def on_done(result, exc):
+            # El flujo OAuth corre en el backend; aquí se continúa en el hilo de Tk
+            if progress_dialog.winfo_exists():
+                progress_dialog.destroy()
+            if exc is not None:
+                messagebox.showerror(_("Error inesperado"), str(exc))
+                return
+            success, email, error = result
 
             if not success:
                 error_messages = {
@@ -1033,30 +1148,22 @@ class GoogleDriveManager:
                     error_messages.get(error, _( "La cuenta no fue configurada completamente.")),
                     parent=self.root
                 )
-            else:
-                # Configuración exitosa: Guardar y refrescar en el hilo principal
-                self._save_state()
-                self.refresh_accounts()
-                self.limpiar_campos_credenciales()
-                
-                msg = _("La cuenta '{account}' ha sido configurada correctamente.").format(account=label)
-                if email:
-                    msg = _("La cuenta '{account}' ({email}) ha sido configurada correctamente.").format(account=label, email=email)
-                
-                messagebox.showinfo(_("Éxito"), msg, parent=self.root)
                 return
 
-            if success:
-                messagebox.showinfo(_("Éxito"), _( "Cuenta '{label}' configurada correctamente").format(label=label))
-                # Limpiar y resetear el formulario para la siguiente cuenta
-                self.label_entry.delete(0, tk.END)
-                self._update_credential_fields_state(locked=False)
-                self.account_mgr.refresh_accounts()
-                self.refresh_accounts()  
-                self.refresh_mounts() # Actualizar también la primera pestaña
+            # Configuración exitosa: Guardar y refrescar en el hilo principal
+            self._save_state()
+            self.refresh_accounts()
+            self.limpiar_campos_credenciales()
 
-        except Exception as e:
-            messagebox.showerror(_("Error inesperado"), str(e))
+            msg = _("La cuenta '{account}' ha sido configurada correctamente.").format(account=label)
+            if email:
+                msg = _("La cuenta '{account}' ({email}) ha sido configurada correctamente.").format(account=label, email=email)
+
+            messagebox.showinfo(_("Éxito"), msg, parent=self.root)
+
+        backend.call_in_ui(
+            self.account_mgr.setup_account_logic(label, client_id, client_secret, cancel_token), on_done
+        )
 
     def show_progress_dialog(self, message, cancel_event=None):
         dialog = tk.Toplevel(self.root)
@@ -1168,7 +1275,7 @@ class GoogleDriveManager:
             )            
             return
 
-        if account in self.mounted_accounts and os.path.ismount(self.mounted_accounts[account]):
+        if account in self.mounted_accounts and self.mount_mgr.is_mounted(self.mounted_accounts[account]):
             messagebox.showinfo(
                 _("Información"),
                 _("La cuenta '{account}' ya está montada en {mount_point}").format(account=account, mount_point=self.mounted_accounts[account])
@@ -1183,16 +1290,36 @@ class GoogleDriveManager:
             self.accounts[account]['mount_point'] = mount_point
             self._save_state()
 
-        # Delegar el montaje al MountManager
-        success = self.mount_mgr.mount_account(account, mount_point)
-        
-        if success:
-            # Esperar un breve momento para que el SO registre el montaje antes de refrescar
-            self.root.after(1000, self.refresh_mounts)
-            
+        # Delegar el montaje al MountManager en segundo plano para no congelar la ventana
+        open_folder = open_folder_var.get()
+        # El montaje manual sustituye a cualquier remontaje automático pendiente
+        self.mount_mgr.supervisor.cancel(account)
+        job = self.mount_mgr.submit_mount(account, mount_point)
+        job.add_progress_callback(lambda j: ui_dispatcher.post(self.request_refresh_mounts, coalesce=True))
+        job.add_done_callback(lambda j: ui_dispatcher.post(self._on_mount_job_done, j, open_folder))
+        self.refresh_mounts()
+
+    def _on_mount_job_done(self, job, open_folder):
+        """Muestra el resultado de un montaje lanzado desde la ventana (hilo de Tk)."""
+        self.refresh_mounts()
+        if job.state == MOUNTED:
+            messagebox.showinfo(_("Éxito"), job.message)
             # --- Abrir carpeta solo si el checkbox está marcado ---
-            if open_folder_var.get():
-                self.open_folder(mount_point)
+            if open_folder:
+                self.open_folder(job.mount_point)
+        elif job.state == FAILED:
+            messagebox.showerror(_("Error"), job.message)
+        return False
+
+    def _mount_job_status_text(self, job):
+        """Texto de la columna Estado para un montaje todavía en curso."""
+        texts = {
+            SPAWNING: _("Iniciando..."),
+            WAITING_FOR_FUSE: _("Esperando a FUSE..."),
+            RETRYING_LAZY_UNMOUNT: _("Reintentando (desmontaje forzado)..."),
+            RETRYING_NONEMPTY: _("Reintentando (nonempty)..."),
+        }
+        return texts.get(job.state, job.state)
 
     def unmount_selected(self):
         """Desmontar cuenta seleccionada"""
@@ -1205,8 +1332,35 @@ class GoogleDriveManager:
         account = item['values'][0]
         mount_point = item['values'][2]
 
-        self.mount_mgr.unmount_account(account, mount_point)
+        # Si la cuenta todavía se está montando, desmontar equivale a cancelar el montaje
+        job = self.mount_mgr.active_jobs().get(account)
+        if job:
+            job.cancel()
+            return
+        # Igual con un remontaje automático que todavía está esperando su turno
+        if account in self.mount_mgr.supervisor.pending():
+            self.mount_mgr.supervisor.cancel(account)
+            self.refresh_mounts()
+            return
+
+        # Como en unmount_all: fusermount corre en segundo plano para no congelar la ventana
+        def worker():
+            ok, detail = self.mount_mgr.unmount_account(account, mount_point)
+            ui_dispatcher.post(self._on_unmount_done, account, mount_point, ok, detail)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_unmount_done(self, account, mount_point, ok, detail):
+        """Muestra el resultado de unmount_selected cuando termina el desmontaje."""
+        if ok:
+            cache_budget.trigger()
+        else:
+            messagebox.showerror(
+                _("Error al desmontar"),
+                _("No se pudo desmontar '{}' en '{}':\nAsegúrate de que ningún archivo esté usando la carpeta.\n\nDetalle: {}").format(account, mount_point, detail)
+            )
         self.refresh_mounts()
+        return False
 
     def unmount_all(self):
         """Desmontar todas las cuentas y actualizar tabla"""
@@ -1215,21 +1369,30 @@ class GoogleDriveManager:
             return
 
         if messagebox.askyesno(_("Confirmar"), _("¿Desmontar todas las cuentas?")):
-            errores = []
-            for account, mount_point in list(self.mounted_accounts.items()):
-                ok = self.mount_mgr.unmount_account(account, mount_point)
-                if not ok:
-                    errores.append(account)
-            self.refresh_mounts()
+            # Se desmontan todas a la vez en segundo plano; un montaje colgado ya no congela la ventana
+            mounts = dict(self.mounted_accounts)
 
-            if errores:
-                messagebox.showwarning(
-                    _("Algunas cuentas no se desmontaron"),
-                    _("No se pudieron desmontar las siguientes cuentas:\n{errores_str}\n" 
-                      "Verifica que no estén en uso.").format(errores_str=', '.join(errores))
-                )
-            else:
-                messagebox.showinfo(_("Éxito"), _("Todas las cuentas fueron desmontadas correctamente."))
+            def worker():
+                report = self.mount_mgr.unmount_many(mounts)
+                ui_dispatcher.post(self._on_unmount_all_done, report)
+
+            threading.Thread(target=worker, daemon=True).start()
+
+    def _on_unmount_all_done(self, report):
+        """Muestra un único resumen cuando termina el desmontaje en paralelo."""
+        self.refresh_mounts()
+        cache_budget.trigger()
+        errores = sorted(account for account, (ok, _detail) in report.items() if not ok)
+        if errores:
+            detalles = "\n".join(f"{account}: {report[account][1]}" for account in errores)
+            messagebox.showwarning(
+                _("Algunas cuentas no se desmontaron"),
+                _("No se pudieron desmontar las siguientes cuentas:\n{errores_str}\n" 
+                  "Verifica que no estén en uso.").format(errores_str=detalles)
+            )
+        else:
+            messagebox.showinfo(_("Éxito"), _("Todas las cuentas fueron desmontadas correctamente."))
+        return False
 
     def open_mount_folder(self):
         """Abrir carpeta de montaje seleccionada"""
@@ -1246,7 +1409,7 @@ class GoogleDriveManager:
         """Abrir carpeta con el gestor de archivos del sistema"""
         try:
             if sys.platform == "linux":
-                subprocess.run(['xdg-open', path], check=True, timeout=10)
+                process_manager.start(['xdg-open', path])
         except Exception as e:
             print(_("Error al abrir la carpeta {}: {}").format(path, e))
 
@@ -1281,42 +1444,75 @@ class GoogleDriveManager:
     def reauthorize_account(self):
         self.account_mgr.reauthorize_account()
 
-    def complete_oauth_setup(self, label, client_id, client_secret, redirect_url, auth_code):
-        try:
-            cmd = [
-                "google-drive-ocamlfuse",
-                "-headless",
-                "-id", client_id,
-                "-secret", client_secret,
-                "-label", label,
-                "-redirect_uri", redirect_url
-            ]
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = process.communicate(input=auth_code + '\n', timeout=30)
-            
-            if process.returncode == 0:
-                print(f"OAuth completado para {label}")
-                return True
+    def request_refresh_accounts(self):
+        """Refresco diferido de la tabla de cuentas (ver _debounce)."""
+        self._debounce("accounts", self.refresh_accounts)
+
+    def request_refresh_mounts(self):
+        """Refresco diferido de la tabla de montajes (ver _debounce)."""
+        self._debounce("mounts", self.refresh_mounts)
+
+    def _debounce(self, name, func):
+        """
+        Agrupa en una sola ejecución de `func` todas las peticiones que llegan durante
+        REFRESH_DEBOUNCE_MS (p. ej. la cascada de avisos del automontaje). Solo desde el hilo de Tk.
+        """
+        if name in self._refresh_pending:
+            return
+
+        def run():
+            self._refresh_pending.pop(name, None)
+            func()
+
+        self._refresh_pending[name] = self.root.after(REFRESH_DEBOUNCE_MS, run)
+
+    def _cancel_debounce(self, name):
+        after_id = self._refresh_pending.pop(name, None)
+        if after_id:
+            self.root.after_cancel(after_id)
+
+    def _sync_tree(self, tree, rows):
+        """
+        Lleva `tree` al contenido de `rows` ({iid: valores}, en orden) tocando solo las filas
+        que cambian: borra las que sobran, inserta las nuevas y actualiza las distintas.
+        Las filas conservan su iid, así que la selección sobrevive al refresco.
+        Devuelve True si cambió alguna fila.
+        """
+        shown = self._tree_rows.setdefault(str(tree), {})
+        changed = False
+        for iid in list(shown):
+            if iid not in rows:
+                if tree.exists(iid):
+                    tree.delete(iid)
+                del shown[iid]
+                changed = True
+        for index, (iid, values) in enumerate(rows.items()):
+            if iid not in shown:
+                tree.insert("", index, iid=iid, values=values)
+                changed = True
             else:
-                print(f"Error en OAuth: {stderr}")
-                return False
-        except Exception as e:
-            print(f"Error al completar OAuth: {e}")
-            return False
+                if shown[iid] != values:
+                    tree.item(iid, values=values)
+                    changed = True
+                if tree.index(iid) != index:
+                    tree.move(iid, "", index)
+            shown[iid] = values
+        return changed
+
+    def _set_cell(self, tree, iid, column_index, text):
+        """Actualiza una sola celda (y la copia de _sync_tree) si su texto cambió."""
+        values = self._tree_rows.get(str(tree), {}).get(iid)
+        if values is None or values[column_index] == text:
+            return
+        values = values[:column_index] + (text,) + values[column_index + 1:]
+        self._tree_rows[str(tree)][iid] = values
+        tree.set(iid, tree["columns"][column_index], text)
 
     def refresh_accounts(self):
         """Actualiza la lista de cuentas en la UI llamando al AccountManager."""
+        self._cancel_debounce("accounts")
         self.account_mgr.refresh_accounts()
-        # Limpiar y reconstruir el Treeview de cuentas
-        for item in self.accounts_tree.get_children():
-            self.accounts_tree.delete(item)
-
+        rows = {}
         for lbl, data in self.accounts.items():
             if not data.get("configured", False):
                 st = _("Pendiente")
@@ -1326,13 +1522,15 @@ class GoogleDriveManager:
                 st = _("Configurada")
             cid_s = data.get("client_id", "")[:20] + ("..." if len(data.get("client_id", "")) > 20 else "")
             chk = "✓" if data.get("automount", False) else "□"
-            self.accounts_tree.insert("", tk.END, values=(lbl, cid_s, st, chk))
-        self._update_accounts_tab_button_states()
+            remount_chk = "✓" if data.get("auto_remount", False) else "□"
+            rows[lbl] = (lbl, cid_s, st, self._cache_usage_text(lbl), chk, remount_chk)
+        if self._sync_tree(self.accounts_tree, rows):
+            self._update_accounts_tab_button_states()
 
     def refresh_mounts(self):
         """Actualizar lista de montajes sin duplicados"""
-        for item in self.mounted_tree.get_children():
-            self.mounted_tree.delete(item)
+        self._cancel_debounce("mounts")
+        previous_mounts = dict(self.mounted_accounts)
 
         # Crear un mapa de puntos de montaje a etiquetas desde la configuración
         mount_point_to_label_map = {
@@ -1340,56 +1538,299 @@ class GoogleDriveManager:
             for label, data in self.accounts.items() if data.get('mount_point')
         }
 
-        seen_mount_points = set()
-        active_mounts = {}
+        def label_for(entry):
+            # 1. Buscar la etiqueta en nuestro mapa de configuración
+            label = mount_point_to_label_map.get(entry.mount_point)
+
+            # 2. Si no se encuentra, intentar extraerla del dispositivo (device)
+            if not label:
+                device = entry.source
+                # Formato común: google-drive-ocamlfuse@label
+                if '@' in device:
+                    label = device.split('@')[1] if device.split('@')[1] else device.split('@')[0]
+                else:
+                    label = self.mount_mgr.get_label_from_mount_point(entry.mount_point)
+            return label or _("Desconocido")
+
+        # Solo se aplica lo que cambió en la tabla de montajes desde el último refresco;
+        # mounted_accounts se actualiza en sitio porque el hilo del monitor lo lee a la vez
+        self.mount_mgr.refresh_mounts(label_for)
+
+        rows = {}
+        for label, mount_point in self.mounted_accounts.items():
+            # El estado sale del último sondeo de salud; el sondeo nunca bloquea el hilo de Tk
+            status = self._probe_status_text(mount_probe.status(mount_point)) + self._prewarm_text(label)
+            latency = self._metrics_text(mount_point)
+            rows[label] = (label, label, mount_point, status, latency)
+        mount_probe.probe_all(self.mounted_accounts.values(), callback=self._on_probe_status_changed)
+        mount_metrics.track(self.mounted_accounts.values())
+
+        # Montajes todavía en curso: se muestran con su estado para poder seguirlos o cancelarlos
+        active_jobs = self.mount_mgr.active_jobs()
+        for label, job in active_jobs.items():
+            if label not in rows:
+                rows[label] = (label, label, job.mount_point, self._mount_job_status_text(job), "")
+
+        # Cuentas caídas que el supervisor volverá a montar
+        for label, remaining in self.mount_mgr.supervisor.pending().items():
+            if label in rows:
+                continue
+            mount_point = self.accounts.get(label, {}).get('mount_point', "")
+            status = _("Remontando en {:.0f} s").format(remaining)
+            rows[label] = (label, label, mount_point, status, "")
+
+        if self._sync_tree(self.mounted_tree, rows):
+            self._update_main_tab_button_states()
+
+        # Guardar y repintar la bandeja solo si cambió el conjunto de montajes
+        if self.mounted_accounts != previous_mounts:
+            self._save_state()
+            if self.tray_mgr:
+                self.tray_mgr.update_menu(self.mounted_accounts)
+
+    def _probe_status_text(self, result):
+        """Texto de la columna Estado según la clasificación del sondeo de salud."""
+        if result is None or result.status == HEALTHY:
+            return _("Montado")
+        texts = {
+            SLOW: _("Lento ({:.1f} s)").format(result.latency),
+            STALE: _("Sin conexión"),
+            HUNG: _("Bloqueado"),
+        }
+        return texts.get(result.status, _("Error"))
+
+    def _on_account_mounted(self, label, mount_point):
+        """Aviso de MountManager (desde el hilo del montaje): lanza el precalentamiento si hay carpetas fijadas."""
+        data = self.accounts.get(label, {})
+        folders = data.get("pinned_folders", [])
+        if folders:
+            self._start_prewarm(label, mount_point, folders, data.get("prewarm_read", False))
+
+    def _start_prewarm(self, label, mount_point, folders, read_contents):
+        prewarmer.start(
+            label, mount_point, folders, read_contents,
+            progress_callback=lambda job: ui_dispatcher.post(self._update_prewarm_status, job, key=("prewarm", job.label))
+        )
 
-        try:
-            result = subprocess.run(["mount"], capture_output=True, text=True, timeout=10)
-            mount_lines = result.stdout.split('\n')
-
-            for line in mount_lines:
-                # Detección más flexible para diferentes distribuciones (gdfuse, google-drive-ocamlfuse, etc.)
-                if 'google-drive-ocamlfuse' in line or 'gdfuse' in line:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        mount_point = parts[2]
-                        # Asegurarnos de que es un punto de montaje real
-                        if os.path.ismount(mount_point):
-                            seen_mount_points.add(mount_point)
-
-                            # 1. Buscar la etiqueta en nuestro mapa de configuración
-                            label = mount_point_to_label_map.get(mount_point)
-
-                            # 2. Si no se encuentra, intentar extraerla del dispositivo (device)
-                            if not label:
-                                device = parts[0]
-                                if 'google-drive-ocamlfuse' in device or 'gdfuse' in device:
-                                    # Formato común: google-drive-ocamlfuse@label
-                                    if '@' in device:
-                                        label = device.split('@')[1] if device.split('@')[1] else device.split('@')[0]
-                                    else:
-                                        label = self.mount_mgr.get_label_from_mount_point(mount_point)
-
-                            active_mounts[mount_point] = label or _("Desconocido")
+    def _prewarm_text(self, label):
+        job = prewarmer.job(label)
+        if job is None:
+            return ""
+        return " · " + _("precalentando ({} carpetas, {} archivos, {:.0f} MB)").format(
+            job.dirs, job.files, job.bytes_read / MB)
+
+    def _update_prewarm_status(self, job):
+        """Actualiza en sitio la columna Estado de la cuenta que se está precalentando."""
+        status = self._probe_status_text(mount_probe.status(job.mount_point))
+        if not job.done():
+            status += self._prewarm_text(job.label)
+        self._set_cell(self.mounted_tree, job.label, 3, status)
+        return False
 
-        except Exception as e:
-            print(f"Error al ejecutar el comando 'mount': {e}")
+    def show_pinned_folders_dialog(self):
+        """Gestiona las carpetas fijadas (precalentadas al montar) de la cuenta montada seleccionada."""
+        selection = self.mounted_tree.selection()
+        if not selection:
+            messagebox.showwarning(_("Advertencia"), _("Selecciona una cuenta montada"))
+            return
+        label = self.mounted_tree.item(selection[0], 'values')[0]
+        if label not in self.accounts or label not in self.mounted_accounts:
+            messagebox.showwarning(_("Advertencia"), _("Selecciona una cuenta montada"))
+            return
+        mount_point = self.mounted_accounts[label]
+        data = self.accounts[label]
 
-        # Limpiar y reconstruir self.mounted_accounts
-        self.mounted_accounts.clear()
-        for mount_point, label in active_mounts.items():
-            self.mounted_accounts[label] = mount_point
+        dialog = tk.Toplevel(self.root)
+        dialog.title(_("Carpetas fijadas de '{}'").format(label))
+        dialog.resizable(False, False)
+        dialog.withdraw()
 
-        for label, mount_point in self.mounted_accounts.items():
-            status = _("Montado") if os.path.ismount(mount_point) else _("Error")
-            self.mounted_tree.insert("", tk.END, values=(label, label, mount_point, status))
+        tk.Label(dialog, text=_("Estas carpetas se precargan en la caché cada vez que se monta la cuenta:")).pack(padx=12, pady=(12, 4))
+        folders_list = tk.Listbox(dialog, width=50, height=8)
+        folders_list.pack(padx=12, fill=tk.BOTH)
+        for folder in data.get("pinned_folders", []):
+            folders_list.insert(tk.END, folder)
+
+        read_var = tk.BooleanVar(value=data.get("prewarm_read", False))
+        ttk.Checkbutton(dialog, text=_("Descargar también el contenido de los archivos"), variable=read_var).pack(pady=4)
+
+        def save():
+            # Releer la cuenta: un refresco mientras el diálogo estaba abierto la sustituye
+            current = self.accounts.get(label)
+            if current is None:
+                return None
+            current["pinned_folders"] = list(folders_list.get(0, tk.END))
+            current["prewarm_read"] = read_var.get()
+            self._save_state()
+            return current
 
-        self._save_state()
-        self._update_main_tab_button_states()
+        def add_folder():
+            path = filedialog.askdirectory(parent=dialog, initialdir=mount_point)
+            if not path:
+                return
+            relative = os.path.relpath(path, mount_point)
+            if relative.startswith(os.pardir):
+                messagebox.showerror(_("Error"), _("La carpeta debe estar dentro de {}").format(mount_point), parent=dialog)
+                return
+            if relative not in folders_list.get(0, tk.END):
+                folders_list.insert(tk.END, relative)
+                save()
+
+        def remove_folder():
+            for index in reversed(folders_list.curselection()):
+                folders_list.delete(index)
+            save()
+
+        def prewarm_now():
+            current = save()
+            if current and current["pinned_folders"]:
+                self._start_prewarm(label, mount_point, current["pinned_folders"], current["prewarm_read"])
+                self.refresh_mounts()
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(pady=(4, 12))
+        ttk.Button(buttons, text=_("Añadir"), command=add_folder).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text=_("Quitar"), command=remove_folder).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text=_("Precalentar ahora"), command=prewarm_now).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text=_("Cerrar"), command=lambda: (save(), dialog.destroy())).pack(side=tk.LEFT, padx=4)
 
-        # Actualizar menú del icono de la bandeja
-        if self.tray_mgr:
-            self.tray_mgr.update_menu(self.mounted_accounts)
+        centrar_ventana(dialog, self.root)
+        dialog.deiconify()
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+    def show_benchmark_dialog(self):
+        """Ventana de benchmark de la cuenta montada seleccionada, con su historial."""
+        selection = self.mounted_tree.selection()
+        label = mount_point = None
+        if selection:
+            label = self.mounted_tree.item(selection[0], 'values')[0]
+            mount_point = self.mounted_accounts.get(label)
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(_("Benchmark de montajes"))
+        dialog.withdraw()
+
+        target = {"label": label, "path": mount_point}
+        target_label = tk.Label(dialog)
+        target_label.pack(padx=12, pady=(12, 4))
+        progress_label = tk.Label(dialog, fg="gray")
+        progress_label.pack(padx=12)
+
+        history_columns = ("fecha", "cache", "escritura", "lectura", "crear", "stat", "listado", "ttfb")
+        history = ttk.Treeview(dialog, columns=history_columns, show="headings", height=8)
+        headings = (_("Fecha"), _("Lectura de"), _("Escritura MB/s"), _("Lectura MB/s"), _("Crear/s"), _("Stat/s"), _("Listado/s"), _("Primer byte ms"))
+        for col, text in zip(history_columns, headings):
+            history.heading(col, text=text, anchor="center")
+            history.column(col, width=105, anchor="center")
+        history.pack(padx=12, pady=8, fill=tk.BOTH, expand=True)
+
+        def fmt(value):
+            return "—" if value is None else "{:.1f}".format(value)
+
+        cache_names = {COLD: _("Drive (frío)"), WARM: _("Caché (caliente)")}
+
+        def show_target():
+            if target["path"]:
+                target_label.config(text=_("Destino: {} ({})").format(target["label"], target["path"]))
+            else:
+                target_label.config(text=_("Selecciona una cuenta montada o una carpeta local"))
+            for item in history.get_children():
+                history.delete(item)
+            for result in benchmark_store.history(target["label"]) if target["label"] else []:
+                history.insert("", tk.END, values=(
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(result["timestamp"])),
+                    cache_names.get(result.get("cache"), "—"),
+                    fmt(result.get("seq_write_mbps")), fmt(result.get("seq_read_mbps")),
+                    fmt(result.get("create_ops")), fmt(result.get("stat_ops")),
+                    fmt(result.get("listdir_ops")), fmt(result.get("ttfb_ms")),
+                ))
+
+        running = {"bench": None}
+
+        def on_done(result, error):
+            running["bench"] = None
+            if not dialog.winfo_exists():
+                return False
+            start_button.config(state="normal")
+            progress_label.config(text=error or _("Benchmark terminado"))
+            show_target()
+            return False
+
+        def worker(bench, label, path):
+            try:
+                result = bench.run()
+                # Guardar junto a la configuración con la que se midió, para poder comparar
+                if label in self.accounts:
+                    result["mount_options"] = self.accounts[label].get("mount_options", "")
+                    values = gdfuse_index.values(label)
+                    result["config"] = {key.name: values.get(key.name) for key in PERFORMANCE_KEYS}
+                benchmark_store.add(label, result)
+                ui_dispatcher.post(on_done, result, None)
+            except BenchmarkCancelled:
+                ui_dispatcher.post(on_done, None, _("Benchmark cancelado"))
+            except OSError as e:
+                ui_dispatcher.post(on_done, None, _("Error en el benchmark: {}").format(e))
+
+        def start():
+            if not target["path"]:
+                return
+            if target["label"] in self.accounts and not messagebox.askyesno(
+                    _("Confirmar"),
+                    _("El benchmark escribirá y borrará unos {} MB en '{}', que se subirán a Google Drive. ¿Continuar?").format(
+                        BENCHMARK_FILE_MB, target["label"]),
+                    parent=dialog):
+                return
+            # Solo una cuenta tiene cache.db en el que buscar un archivo sin cachear
+            bench = MountBenchmark(target["path"], label=target["label"] if target["label"] in self.accounts else None)
+            bench.add_progress_callback(lambda step: ui_dispatcher.post(
+                lambda: progress_label.config(text=_("Midiendo: {}").format(step)) if dialog.winfo_exists() else None))
+            running["bench"] = bench
+            start_button.config(state="disabled")
+            threading.Thread(target=worker, args=(bench, target["label"], target["path"]), daemon=True).start()
+
+        def choose_local():
+            path = filedialog.askdirectory(parent=dialog)
+            if path:
+                target["label"] = "local:" + path
+                target["path"] = path
+                show_target()
+
+        def close():
+            if running["bench"]:
+                running["bench"].cancel()
+            dialog.destroy()
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(pady=(0, 12))
+        start_button = ttk.Button(buttons, text=_("Iniciar"), command=start)
+        start_button.pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text=_("Medir carpeta local"), command=choose_local).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text=_("Cerrar"), command=close).pack(side=tk.LEFT, padx=4)
+        dialog.protocol("WM_DELETE_WINDOW", close)
+
+        show_target()
+        centrar_ventana(dialog, self.root)
+        dialog.deiconify()
+        dialog.transient(self.root)
+
+    def _metrics_text(self, mount_point):
+        """Texto de la columna de latencia: percentiles del listado de la raíz del montaje."""
+        summary = mount_metrics.summary(mount_point, LISTDIR)
+        if summary is None:
+            return "—"
+        return "{:.0f} / {:.0f} ms".format(summary.p50 * 1000, summary.p99 * 1000)
+
+    def _update_metrics_column(self):
+        """Actualiza en sitio la columna de latencia sin reconstruir la tabla."""
+        for label, values in list(self._tree_rows.get(str(self.mounted_tree), {}).items()):
+            if label in self.mounted_accounts:
+                self._set_cell(self.mounted_tree, label, 4, self._metrics_text(values[2]))
+        self.root.after(METRICS_INTERVAL * 1000, self._update_metrics_column)
+
+    def _on_probe_status_changed(self, mount_point, result):
+        """Llamado desde el hilo del sondeo cuando cambia la salud de un montaje."""
+        ui_dispatcher.post(self.request_refresh_mounts, coalesce=True)
 
     def _update_main_tab_button_states(self):
         """Habilita o deshabilita los botones de la pestaña principal según si hay cuentas montadas."""
@@ -1404,10 +1845,12 @@ class GoogleDriveManager:
             self.btn_unmount_selected.config(state="normal")
             self.btn_unmount_all.config(state="normal")
             self.btn_open_folder.config(state="normal")
+            self.btn_pinned_folders.config(state="normal")
         else:
             self.btn_unmount_selected.config(state="disabled")
             self.btn_unmount_all.config(state="disabled")
             self.btn_open_folder.config(state="disabled")
+            self.btn_pinned_folders.config(state="disabled")
 
     def _update_accounts_tab_button_states(self):
         """Habilita o deshabilita el botón de restaurar cuenta según si hay cuentas eliminadas."""
@@ -1423,10 +1866,440 @@ class GoogleDriveManager:
         
 
 
+    def _cache_is_busy(self, label):
+        """Una caché solo se recorta si su cuenta no está montada ni montándose."""
+        if label in self.mounted_accounts or label in self.mount_mgr.active_jobs():
+            return True
+        if label in self.mount_mgr.supervisor.pending():
+            return True
+        mount_point = self.accounts.get(label, {}).get('mount_point')
+        return bool(mount_point) and self.mount_mgr.is_mounted(mount_point)
+
+    def _cache_usage_text(self, label):
+        usage = cache_budget.usage(label)
+        if usage is None:
+            return "—"
+        if usage.budget is None:
+            return "{:.0f} MB".format(usage.used / MB)
+        return "{:.0f} / {:.0f} MB".format(usage.used / MB, usage.budget / MB)
+
+    def _update_cache_column(self):
+        """Actualiza en sitio la columna de caché de la pestaña de cuentas."""
+        for label in list(self._tree_rows.get(str(self.accounts_tree), {})):
+            self._set_cell(self.accounts_tree, label, 3, self._cache_usage_text(label))
+        return False
+
+    def set_cache_budget(self):
+        """Límite global de caché en MB (0 lo desactiva), modo de recorte y peso de cada cuenta."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(_("Límite de caché"))
+        dialog.resizable(False, False)
+        dialog.withdraw()
+
+        tk.Label(dialog, text=_("Espacio total en MB para las cachés de todas las cuentas (0 = sin límite):")).pack(padx=12, pady=(12, 4))
+        limit_var = tk.StringVar(value=str(self.cache_budget_mb))
+        ttk.Spinbox(dialog, from_=0, to=10 ** 7, increment=256, textvariable=limit_var, width=12).pack(pady=4)
+
+        mode_var = tk.StringVar(value=self.cache_budget_mode)
+        ttk.Radiobutton(dialog, text=_("Borrar primero los archivos usados hace más tiempo"), value=TRIM_LRU, variable=mode_var).pack(anchor="w", padx=12)
+        ttk.Radiobutton(dialog, text=_("Vaciar la caché entera de la cuenta (-cc)"), value=TRIM_CLEAR, variable=mode_var).pack(anchor="w", padx=12)
+
+        tk.Label(dialog, text=_("Peso de cada cuenta en el reparto del límite:")).pack(padx=12, pady=(8, 4))
+        weights_frame = tk.Frame(dialog)
+        weights_frame.pack(padx=12)
+        weight_vars = {}
+        for row, label in enumerate(sorted(self.accounts)):
+            tk.Label(weights_frame, text=label).grid(row=row, column=0, sticky="w", padx=(0, 8))
+            var = weight_vars[label] = tk.StringVar(value=str(self.accounts[label].get("cache_weight", 1)))
+            ttk.Spinbox(weights_frame, from_=0, to=100, increment=0.5, textvariable=var, width=6).grid(row=row, column=1, pady=1)
+
+        def save():
+            try:
+                limit = int(limit_var.get())
+                weights = {label: float(var.get()) for label, var in weight_vars.items()}
+                if limit < 0 or any(weight < 0 for weight in weights.values()):
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror(_("Error"), _("El límite y los pesos deben ser números no negativos"), parent=dialog)
+                return
+            self.cache_budget_mb = cache_budget.limit_mb = limit
+            self.cache_budget_mode = cache_budget.mode = mode_var.get()
+            for label, weight in weights.items():
+                # Releer la cuenta: un refresco mientras el diálogo estaba abierto la sustituye
+                if label in self.accounts:
+                    self.accounts[label]["cache_weight"] = weight
+            self._save_state()
+            cache_budget.trigger()
+            dialog.destroy()
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(pady=12)
+        ttk.Button(buttons, text=_("Guardar"), command=save).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text=_("Cancelar"), command=dialog.destroy).pack(side=tk.LEFT, padx=4)
+
+        centrar_ventana(dialog, self.root)
+        dialog.deiconify()
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+    def show_log_viewer(self):
+        """Visor en vivo del gdfuse.log de la cuenta seleccionada, con filtros por regex y nivel."""
+        selection = self.accounts_tree.selection()
+        if not selection:
+            messagebox.showwarning(_("Advertencia"), _("Selecciona una cuenta"))
+            return
+        label = self.accounts_tree.item(selection[0], 'values')[0]
+        tailer = log_tailers.get(label)
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(_("Log de '{}'").format(label))
+        dialog.geometry("860x480")
+
+        filters = tk.Frame(dialog)
+        filters.pack(fill=tk.X, padx=8, pady=6)
+        tk.Label(filters, text=_("Filtro (regex):")).pack(side=tk.LEFT)
+        regex_entry = ttk.Entry(filters, width=40)
+        regex_entry.pack(side=tk.LEFT, padx=4)
+        level_names = {"": _("Todos"), ERROR: _("Errores"), WARNING: _("Avisos y errores")}
+        level_var = tk.StringVar(value=level_names[""])
+        ttk.Combobox(filters, textvariable=level_var, values=list(level_names.values()), state="readonly", width=18).pack(side=tk.LEFT, padx=4)
+        follow_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(filters, text=_("Seguir"), variable=follow_var).pack(side=tk.LEFT, padx=4)
+        error_label = tk.Label(filters, fg="red")
+        error_label.pack(side=tk.LEFT, padx=4)
+
+        text = tk.Text(dialog, wrap="none", state="disabled")
+        text.tag_configure(ERROR, foreground="red")
+        text.tag_configure(WARNING, foreground="darkorange")
+        scrollbar = ttk.Scrollbar(dialog, orient=tk.VERTICAL, command=text.yview)
+        text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(fill=tk.BOTH, expand=True, padx=(8, 0), pady=(0, 8))
+
+        state = {"seq": 0, "regex": None, "min_level": ""}
+
+        def accepts(line):
+            if state["min_level"] and LEVELS.index(line.level) > LEVELS.index(state["min_level"]):
+                return False
+            return state["regex"] is None or state["regex"].search(line.text)
+
+        def append(lines):
+            shown = [line for line in lines if accepts(line)]
+            if not shown:
+                return
+            text.config(state="normal")
+            for line in shown:
+                stamp = time.strftime("%H:%M:%S", time.localtime(line.timestamp))
+                prefix = "[mount] " if line.source == SOURCE_MOUNT else ""
+                text.insert(tk.END, f"{stamp} {prefix}{line.text}\n", line.level)
+            # El widget también se mantiene acotado, igual que el búfer del tailer
+            excess = int(text.index("end-1c").split(".")[0]) - tailer.maxlen
+            if excess > 0:
+                text.delete("1.0", f"{excess + 1}.0")
+            text.config(state="disabled")
+            if follow_var.get():
+                text.see(tk.END)
+
+        def apply_filters(event=None):
+            pattern = regex_entry.get()
+            try:
+                state["regex"] = re.compile(pattern, re.IGNORECASE) if pattern else None
+                error_label.config(text="")
+            except re.error as e:
+                error_label.config(text=str(e))
+                return
+            state["min_level"] = next((key for key, name in level_names.items() if name == level_var.get()), "")
+            text.config(state="normal")
+            text.delete("1.0", tk.END)
+            text.config(state="disabled")
+            lines = tailer.lines_since(0)
+            state["seq"] = lines[-1].seq if lines else state["seq"]
+            append(lines)
+
+        def poll():
+            if not dialog.winfo_exists():
+                return
+            lines = tailer.lines_since(state["seq"])
+            if lines:
+                state["seq"] = lines[-1].seq
+                append(lines)
+            dialog.after(500, poll)
+
+        regex_entry.bind("<Return>", apply_filters)
+        level_var.trace_add("write", lambda *args: apply_filters())
+        apply_filters()
+        poll()
+
+    def inspect_cache(self):
+        """Muestra las estadísticas del cache.db de la cuenta seleccionada (lectura en segundo plano)."""
+        selection = self.accounts_tree.selection()
+        if not selection:
+            messagebox.showwarning(_("Advertencia"), _("Selecciona una cuenta"))
+            return
+        label = self.accounts_tree.item(selection[0], 'values')[0]
+
+        def worker():
+            try:
+                ui_dispatcher.post(self._show_cache_stats, label, inspect_cache_db(label), None)
+            except CacheDbError as e:
+                ui_dispatcher.post(self._show_cache_stats, label, None, str(e))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_cache_stats(self, label, stats, error):
+        if error:
+            messagebox.showerror(_("Error"), _("No se pudo leer la caché de '{}':\n{}").format(label, error))
+            return False
+        messagebox.showinfo(
+            _("Caché de '{}'").format(label),
+            _("Entradas de metadatos: {}\n"
+              "Archivos en caché: {} ({:.1f} MB)\n"
+              "Metadatos caducados: {}\n"
+              "Subidas pendientes: {}\n"
+              "Tamaño de cache.db: {:.1f} MB").format(
+                stats.entries, stats.cached_files, stats.cached_bytes / MB,
+                stats.stale_entries, stats.pending_uploads, stats.db_bytes / MB)
+        )
+        return False
+
+    def show_api_usage(self, minutes=60):
+        """Peticiones, errores 403/429 y tráfico por cuenta en la última hora, a partir de gdfuse.log."""
+        for label in self.accounts:
+            api_usage.watch(label)
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(_("Uso de la API de Google Drive"))
+        dialog.geometry("860x440")
+
+        tk.Label(dialog, text=_("Totales de los últimos {} minutos:").format(minutes)).pack(padx=8, pady=(8, 2), anchor="w")
+        usage_columns = ("cuenta", REQUESTS, HTTP_403, HTTP_429, RETRIES, BACKOFFS, UPLOAD_BYTES, DOWNLOAD_BYTES)
+        headings = (_("Cuenta"), _("Peticiones"), "403", "429", _("Reintentos"), _("Retrocesos"), _("Subido MB"), _("Descargado MB"))
+        tree = ttk.Treeview(dialog, columns=usage_columns, show="headings", height=6)
+        for col, text in zip(usage_columns, headings):
+            tree.heading(col, text=text, anchor="center")
+            tree.column(col, width=100, anchor="center")
+        tree.pack(fill=tk.X, padx=8)
+
+        tk.Label(dialog, text=_("Peticiones por minuto (en rojo, respuestas 403/429) de la cuenta seleccionada:")).pack(padx=8, pady=(10, 2), anchor="w")
+        canvas = tk.Canvas(dialog, height=180, background="white")
+        canvas.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+
+        def draw_chart(label):
+            canvas.delete("all")
+            if not label:
+                return
+            now = time.time()
+            requests = api_usage.series(label, REQUESTS, minutes, now)
+            limited = [
+                a[1] + b[1] for a, b in zip(api_usage.series(label, HTTP_403, minutes, now),
+                                           api_usage.series(label, HTTP_429, minutes, now))
+            ]
+            width = max(canvas.winfo_width(), 200)
+            height = max(canvas.winfo_height(), 100) - 16
+            peak = max([value for _ts, value in requests] + limited + [1])
+            bar = width / minutes
+            for i, ((_ts, count), errors) in enumerate(zip(requests, limited)):
+                x = i * bar
+                canvas.create_rectangle(x, height - count * height / peak, x + bar - 1, height, fill="steelblue", width=0)
+                if errors:
+                    canvas.create_rectangle(x, height - errors * height / peak, x + bar - 1, height, fill="red", width=0)
+            canvas.create_text(4, 4, anchor="nw", text=_("máx. {}/min").format(peak))
+            canvas.create_text(4, height + 2, anchor="nw", text=_("-{} min").format(minutes))
+            canvas.create_text(width - 4, height + 2, anchor="ne", text=_("ahora"))
+
+        def refresh():
+            if not dialog.winfo_exists():
+                return
+            now = time.time()
+            selected = tree.selection()
+            selected_label = tree.item(selected[0], 'values')[0] if selected else None
+            for item in tree.get_children():
+                tree.delete(item)
+            for label in sorted(api_usage.labels()):
+                totals = api_usage.totals(label, minutes, now)
+                item = tree.insert("", tk.END, values=(
+                    label, totals[REQUESTS], totals[HTTP_403], totals[HTTP_429], totals[RETRIES], totals[BACKOFFS],
+                    "{:.1f}".format(totals[UPLOAD_BYTES] / MB), "{:.1f}".format(totals[DOWNLOAD_BYTES] / MB),
+                ))
+                if label == selected_label:
+                    tree.selection_set(item)
+            draw_chart(selected_label)
+            dialog.after(5000, refresh)
+
+        tree.bind("<<TreeviewSelect>>", lambda e: draw_chart(
+            tree.item(tree.selection()[0], 'values')[0] if tree.selection() else None))
+        refresh()
+
+    def _preset_names(self):
+        return {
+            "media_streaming": _("Streaming multimedia"),
+            "bulk_upload": _("Subida masiva"),
+            "low_memory": _("Poca memoria"),
+        }
+
+    def show_performance_dialog(self):
+        """Editor de las claves de rendimiento de google-drive-ocamlfuse para una o varias cuentas."""
+        labels = [label for label in gdfuse_index.labels() if label in self.accounts]
+        if not labels:
+            messagebox.showwarning(_("Advertencia"), _("No hay cuentas con configuración de google-drive-ocamlfuse"))
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(_("Perfil de rendimiento"))
+        dialog.resizable(False, False)
+        dialog.withdraw()
+
+        tk.Label(dialog, text=_("Cuentas a las que se aplican los cambios:")).grid(row=0, column=0, columnspan=2, padx=12, pady=(12, 4), sticky="w")
+        accounts_list = tk.Listbox(dialog, selectmode=tk.MULTIPLE, height=min(6, len(labels)), exportselection=False)
+        for label in labels:
+            accounts_list.insert(tk.END, label)
+        selected = [self.accounts_tree.item(item, 'values')[0] for item in self.accounts_tree.selection()]
+        for i, label in enumerate(labels):
+            if label in selected or (not selected and i == 0):
+                accounts_list.selection_set(i)
+        accounts_list.grid(row=1, column=0, columnspan=2, padx=12, sticky="ew")
+
+        # --- Perfiles predefinidos ---
+        preset_names = self._preset_names()
+        preset_var = tk.StringVar(value=preset_names["media_streaming"])
+        preset_frame = ttk.LabelFrame(dialog, text=_("Perfil predefinido"))
+        preset_frame.grid(row=2, column=0, columnspan=2, padx=12, pady=8, sticky="ew")
+        ttk.Combobox(preset_frame, textvariable=preset_var, values=list(preset_names.values()), state="readonly", width=28).pack(side=tk.LEFT, padx=6, pady=6)
+
+        # --- Valores individuales ---
+        values_frame = ttk.LabelFrame(dialog, text=_("Valores"))
+        values_frame.grid(row=3, column=0, columnspan=2, padx=12, pady=4, sticky="ew")
+        entries = {}
+        for row, perf_key in enumerate(PERFORMANCE_KEYS):
+            tk.Label(values_frame, text=perf_key.name).grid(row=row, column=0, padx=6, pady=1, sticky="w")
+            entry = ttk.Entry(values_frame, width=16)
+            entry.grid(row=row, column=1, padx=6, pady=1)
+            entries[perf_key.name] = entry
+        loaded = {}
+
+        # --- Opciones de montaje (FUSE y google-drive-ocamlfuse) ---
+        options_frame = ttk.LabelFrame(dialog, text=_("Opciones de montaje"))
+        options_frame.grid(row=4, column=0, columnspan=2, padx=12, pady=4, sticky="ew")
+        options_entry = ttk.Entry(options_frame, width=44)
+        options_entry.pack(padx=6, pady=(6, 2), fill=tk.X)
+        tk.Label(options_frame, text=_("Ej.: -m -o max_read=131072,max_readahead=131072,big_writes,allow_other"),
+                 fg="gray").pack(padx=6, anchor="w")
+        timeout_frame = tk.Frame(options_frame)
+        timeout_frame.pack(padx=6, pady=(4, 0), anchor="w")
+        tk.Label(timeout_frame, text=_("Timeout de montaje (s, vacío = por defecto):")).pack(side=tk.LEFT)
+        timeout_var = tk.StringVar()
+        ttk.Spinbox(timeout_frame, from_=5, to=600, increment=5, textvariable=timeout_var, width=6).pack(side=tk.LEFT, padx=4)
+
+        def selected_labels():
+            return [labels[i] for i in accounts_list.curselection()]
+
+        def load_values(event=None):
+            """Muestra los valores de la primera cuenta seleccionada."""
+            chosen = selected_labels()
+            loaded.clear()
+            if chosen:
+                try:
+                    loaded.update(GdfuseConfig.for_label(chosen[0]).values(entries))
+                except OSError as e:
+                    print(f"Error leyendo config de {chosen[0]}: {e}")
+            for key, entry in entries.items():
+                entry.delete(0, tk.END)
+                entry.insert(0, loaded.get(key) or "")
+            options_entry.delete(0, tk.END)
+            timeout_var.set("")
+            if chosen:
+                options_entry.insert(0, self.accounts.get(chosen[0], {}).get("mount_options", ""))
+                timeout_var.set(str(self.accounts.get(chosen[0], {}).get("mount_timeout", "")))
+
+        def report(results):
+            errors = {label: error for label, error in results.items() if error}
+            if errors:
+                messagebox.showerror(
+                    _("Error"),
+                    _("No se pudo actualizar la configuración de:\n{}").format(
+                        "\n".join(f"{label}: {error}" for label, error in errors.items())),
+                    parent=dialog
+                )
+                return
+            mounted = [label for label in results if label in self.mounted_accounts]
+            message = _("Configuración guardada. Los cambios se aplicarán la próxima vez que se monte la cuenta.")
+            if mounted:
+                message += "\n\n" + _("Cuentas montadas que hay que volver a montar: {}").format(", ".join(mounted))
+            messagebox.showinfo(_("Éxito"), message, parent=dialog)
+            load_values()
+
+        def on_apply_preset():
+            chosen = selected_labels()
+            if not chosen:
+                messagebox.showwarning(_("Advertencia"), _("Selecciona al menos una cuenta"), parent=dialog)
+                return
+            preset = next(key for key, name in preset_names.items() if name == preset_var.get())
+            report(apply_preset(chosen, preset))
+
+        def on_save_values():
+            chosen = selected_labels()
+            if not chosen:
+                messagebox.showwarning(_("Advertencia"), _("Selecciona al menos una cuenta"), parent=dialog)
+                return
+            # Solo se escriben los campos que el usuario cambió respecto a la cuenta mostrada
+            changed = {
+                key: entry.get().strip() for key, entry in entries.items()
+                if entry.get().strip() and entry.get().strip() != (loaded.get(key) or "")
+            }
+            if not changed:
+                return
+            report(apply_values(chosen, changed))
+
+        def on_save_options():
+            chosen = selected_labels()
+            if not chosen:
+                messagebox.showwarning(_("Advertencia"), _("Selecciona al menos una cuenta"), parent=dialog)
+                return
+            mount_options = options_entry.get().strip()
+            try:
+                parse_mount_options(mount_options)
+            except ValueError as e:
+                messagebox.showerror(_("Error"), str(e), parent=dialog)
+                return
+            timeout_text = timeout_var.get().strip()
+            if timeout_text and (not timeout_text.isdigit() or int(timeout_text) < 1):
+                messagebox.showerror(_("Error"), _("El timeout de montaje debe ser un número de segundos"), parent=dialog)
+                return
+            for label in chosen:
+                self.accounts[label]["mount_options"] = mount_options
+                if timeout_text:
+                    self.accounts[label]["mount_timeout"] = int(timeout_text)
+                else:
+                    self.accounts[label].pop("mount_timeout", None)
+            self._save_state()
+            report({label: None for label in chosen})
+
+        ttk.Button(options_frame, text=_("Guardar opciones"), command=on_save_options).pack(padx=6, pady=6, anchor="e")
+        ttk.Button(preset_frame, text=_("Aplicar perfil"), command=on_apply_preset).pack(side=tk.LEFT, padx=6, pady=6)
+        ttk.Button(dialog, text=_("Guardar valores"), command=on_save_values).grid(row=5, column=0, padx=12, pady=(8, 12), sticky="e")
+        ttk.Button(dialog, text=_("Cerrar"), command=dialog.destroy).grid(row=5, column=1, padx=12, pady=(8, 12), sticky="w")
+
+        accounts_list.bind("<<ListboxSelect>>", load_values)
+        load_values()
+
+        centrar_ventana(dialog, self.root)
+        dialog.deiconify()
+        dialog.transient(self.root)
+        dialog.grab_set()
+
     def automount_accounts(self):
         """Montar automáticamente las cuentas marcadas como 'automount' al iniciar la app."""
         # Se delega la lógica al manager para mantener gui.py enfocado en la interfaz
-        self.mount_mgr.automount_accounts(self.accounts, self.deleted_accounts)
+        results = self.mount_mgr.automount_accounts(
+            self.accounts,
+            self.deleted_accounts,
+            max_workers=self.automount_max_workers
+        )
+        failed = {label: message for label, (ok, message) in results.items() if not ok}
+        if failed:
+            body = _("No se pudieron montar al iniciar:\n{}").format(
+                "\n".join(f"{label}: {message}" if message else label for label, message in sorted(failed.items())))
+            ui_dispatcher.post(self._show_notification, _("Error en el automontaje"), body, notify2.URGENCY_CRITICAL)
 
     def show_about_dialog(self):
         """Mostrar información de la aplicación y enlaces en pestañas."""
@@ -1609,12 +2482,11 @@ class GoogleDriveManager:
             messagebox.showinfo(_("Sin actualizaciones"), _("Tu versión está actualizada."), parent=p)
 
     def check_for_updates_on_startup(self):
-        threading.Thread(target=self._check_for_updates_background, daemon=True).start()
+        backend.call_in_ui(run_blocking(check_for_updates), self._on_update_check_done)
 
-    def _check_for_updates_background(self):
-        update_info = check_for_updates()
+    def _on_update_check_done(self, update_info, error):
         if update_info:
-            GLib.idle_add(self.show_update_notification, update_info)
+            self.show_update_notification(update_info)
 
     def show_update_notification(self, update_info):
         msg_update = _('Hay una nueva versión disponible:')
@@ -1698,27 +2570,63 @@ class GoogleDriveManager:
                 self.root.withdraw() 
                 self.is_quitting = False # Cancelar el cierre
                 return
-        
-        
-        self._save_state()
 
-        # Detener el icono de la bandeja
+        # La ventana desaparece en el acto; el resto del cierre tiene un plazo acotado
+        self.root.withdraw()
+        shutdown_coordinator.run()
+
+        # Destruir la ventana de Tkinter y detener el bucle principal de GLib: main() termina
+        if self.root.winfo_exists():
+            self.root.destroy()
+        if self.main_loop and self.main_loop.is_running():
+            self.main_loop.quit()
+
+    def _register_shutdown_stages(self):
+        """
+        Etapas del cierre (ver ShutdownCoordinator). Fase 0, en paralelo: vigilancia de
+        montajes, montajes en curso, servicios en segundo plano, bandeja y guardado del
+        estado (en el hilo de Tk, que lee sus variables). Fase 1: desmontaje si la
+        configuración lo pide; el estado ya se guardó, así que el próximo arranque sabe qué
+        estaba montado. Fase 2: procesos hijos. Fase 3: cola de la interfaz y backend.
+        """
+        shutdown_coordinator.add_stage("monitor", self.mount_mgr.stop_mount_monitor)
+        shutdown_coordinator.add_stage("montajes en curso", self._cancel_mount_jobs)
+        shutdown_coordinator.add_stage("servicios", self._stop_background_services)
+        shutdown_coordinator.add_stage("bandeja", self._stop_tray)
+        shutdown_coordinator.add_stage("configuración", self._save_state, in_caller=True)
+        shutdown_coordinator.add_stage("desmontaje", self._unmount_on_exit, phase=1)
+        shutdown_coordinator.add_stage("procesos", process_manager.shutdown, phase=2)
+        shutdown_coordinator.add_stage("interfaz", ui_dispatcher.close, phase=3, in_caller=True)
+        shutdown_coordinator.add_stage("backend", backend.stop, phase=3)
+
+    def _cancel_mount_jobs(self):
+        """Cancela los montajes en curso y espera a que terminen (el plazo lo marca el cierre)."""
+        prewarmer.cancel_all()
+        jobs = list(self.mount_mgr.active_jobs().values())
+        for job in jobs:
+            job.cancel()
+        for job in jobs:
+            job.result()
+
+    def _stop_background_services(self):
+        mount_metrics.stop()
+        cache_budget.stop()
+        log_tailers.stop_all()
+
+    def _stop_tray(self):
         if self.tray_mgr.tray_icon:
             try:
                 self.tray_mgr.tray_icon.stop()
             except Exception as e:
                 print(f"Error al detener la bandeja del sistema: {e}")
-        
-        # Destruir la ventana de Tkinter de forma segura
-        if self.root.winfo_exists():
-            self.root.after(100, self.root.destroy) # Destruir después de un breve retraso
-
-        # Detener el bucle principal de GLib
-        if self.main_loop:
-            self.main_loop.quit()
 
-        # Salir del proceso
-        sys.exit(0)
+    def _unmount_on_exit(self):
+        if not self.unmount_on_exit or not self.mounted_accounts:
+            return
+        report = self.mount_mgr.unmount_many(dict(self.mounted_accounts))
+        for account, (ok, detail) in report.items():
+            if not ok:
+                print(f"No se pudo desmontar '{account}' al salir: {detail}")
 
     def change_language(self, lang):
         i18n_instance.update_language(lang)
@@ -1745,7 +2653,7 @@ class GoogleDriveManager:
         self.status_label.config(text=_("Verificando instalación..."))
         self.mounted_frame.config(text=_("Cuentas Montadas"))
         
-        columns = (_("Cuenta"), _( "Etiqueta"), _( "Punto de Montaje"), _( "Estado"))
+        columns = (_("Cuenta"), _( "Etiqueta"), _( "Punto de Montaje"), _( "Estado"), _( "Latencia p50/p99"))
         for i, col_text in enumerate(columns):
             self.mounted_tree.heading(self.mounted_tree["columns"][i], text=col_text)
 
@@ -1754,6 +2662,8 @@ class GoogleDriveManager:
         self.btn_unmount_all.config(text=_("Desmontar Todas"))
         self.btn_refresh_mounts.config(text=_("Actualizar"))
         self.btn_open_folder.config(text=_("Abrir Carpeta"))
+        self.btn_pinned_folders.config(text=_("Carpetas Fijadas"))
+        self.btn_benchmark.config(text=_("Benchmark"))
 
         self.new_account_frame.config(text=_("Agregar Nueva Cuenta"))
         self.label_label.config(text=_("Etiqueta:"))
@@ -1768,7 +2678,7 @@ class GoogleDriveManager:
         self.accounts_list_frame.config(text=_("Cuentas Configuradas"))
         
         # Actualizar encabezados del Treeview de cuentas
-        acc_columns = (_("Etiqueta"), _( "Client ID"), _( "Estado"), _( "Montar al iniciar"))
+        acc_columns = (_("Etiqueta"), _( "Client ID"), _( "Estado"), _( "Caché"), _( "Montar al iniciar"), _( "Remontar si cae"))
         for i, col_text in enumerate(acc_columns):
             self.accounts_tree.heading(self.accounts_tree["columns"][i], text=col_text)
 
@@ -1776,14 +2686,20 @@ class GoogleDriveManager:
         self.btn_reautorizar.config(text=_("Reautorizar"))
         self.btn_update_list.config(text=_("Actualizar Lista"))
         self.btn_restore_account.config(text=_("Restaurar Cuenta"))
+        self.btn_performance.config(text=_("Rendimiento"))
+        self.btn_view_log.config(text=_("Ver Log"))
+        self.btn_api_usage.config(text=_("Uso de API"))
+        self.btn_inspect_cache.config(text=_("Inspeccionar Caché"))
 
         self.create_menu() 
 
         self.check_installation()
 
-        # Actualizar las listas de cuentas y montajes
+        # Actualizar las listas de cuentas y montajes (y el menú de la bandeja, con el nuevo idioma)
         self.refresh_accounts()
         self.refresh_mounts()
+        if self.tray_mgr:
+            self.tray_mgr.update_menu(self.mounted_accounts)
     def _update_edit_menu_state(self, event=None):
         """Habilita o deshabilita el menú de edición según la pestaña activa."""
         if not hasattr(self, 'edit_menu'):
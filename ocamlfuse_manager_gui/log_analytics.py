@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from .constants import ANALYTICS_WINDOW_MINUTES
+from .logtail import log_tailers, SOURCE_LOG
+
+# Métricas por minuto
+REQUESTS = "requests"
+RETRIES = "retries"
+BACKOFFS = "backoffs"
+HTTP_403 = "http_403"
+HTTP_429 = "http_429"
+UPLOAD_BYTES = "upload_bytes"
+DOWNLOAD_BYTES = "download_bytes"
+METRICS = (REQUESTS, RETRIES, BACKOFFS, HTTP_403, HTTP_429, UPLOAD_BYTES, DOWNLOAD_BYTES)
+
+# Patrones sobre gdfuse.log. google-drive-ocamlfuse no tiene un formato estable, así que
+# son heurísticos: peticiones HTTP del modo depuración de curl, códigos de estado de las
+# respuestas, reintentos con retroceso y tamaños de subida/descarga.
+_REQUEST_RE = re.compile(r"(?:^|[\s>])(GET|POST|PUT|PATCH|DELETE) (?:https?://|/)")
+_STATUS_RE = re.compile(r"HTTP/\d(?:\.\d)? (\d{3})|\b(403|429)\b.*(?:rate|limit|quota|forbidden|too many)", re.IGNORECASE)
+_RATE_LIMIT_RE = re.compile(r"rateLimitExceeded|userRateLimitExceeded", re.IGNORECASE)
+_RETRY_RE = re.compile(r"\bretry(?:ing)?\b", re.IGNORECASE)
+_BACKOFF_RE = re.compile(r"backoff|back(?:ing)? off|waiting \d+(?:\.\d+)? ?s", re.IGNORECASE)
+_UPLOAD_RE = re.compile(r"upload\w*\b.*?\b(\d+) bytes", re.IGNORECASE)
+_DOWNLOAD_RE = re.compile(r"download\w*\b.*?\b(\d+) bytes", re.IGNORECASE)
+
+
+def analyze_line(text):
+    """Devuelve un Counter con las métricas que aporta una línea del log."""
+    counts = Counter()
+    if _REQUEST_RE.search(text):
+        counts[REQUESTS] += 1
+    match = _STATUS_RE.search(text)
+    status = (match.group(1) or match.group(2)) if match else None
+    if status == "403" or (status is None and _RATE_LIMIT_RE.search(text)):
+        counts[HTTP_403] += 1
+    elif status == "429":
+        counts[HTTP_429] += 1
+    if _RETRY_RE.search(text):
+        counts[RETRIES] += 1
+    if _BACKOFF_RE.search(text):
+        counts[BACKOFFS] += 1
+    match = _UPLOAD_RE.search(text)
+    if match:
+        counts[UPLOAD_BYTES] += int(match.group(1))
+    else:
+        match = _DOWNLOAD_RE.search(text)
+        if match:
+            counts[DOWNLOAD_BYTES] += int(match.group(1))
+    return counts
+
+
+class ApiUsageAnalyzer:
+    """
+    Cuenta, por cuenta y por minuto, las peticiones a la API de Drive, reintentos,
+    retrocesos, respuestas 403/429 y bytes subidos y descargados. Se alimenta de los
+    LogTailer de forma incremental: cada línea se analiza una sola vez al llegar y solo
+    se conservan los últimos `window` minutos.
+    """
+
+    def __init__(self, window=ANALYTICS_WINDOW_MINUTES):
+        self.window = window
+        self._lock = threading.Lock()
+        self._buckets = {}   # etiqueta -> OrderedDict {minuto (epoch // 60): Counter}
+        self._callbacks = {}
+
+    def watch(self, label):
+        """Empieza a analizar el log de `label` (no hace nada si ya se estaba analizando)."""
+        with self._lock:
+            if label in self._callbacks:
+                return
+            self._buckets.setdefault(label, OrderedDict())
+            callback = self._callbacks[label] = lambda lines: self._on_lines(label, lines)
+        log_tailers.get(label).subscribe(callback)
+
+    def unwatch(self, label):
+        with self._lock:
+            callback = self._callbacks.pop(label, None)
+            self._buckets.pop(label, None)
+        if callback:
+            log_tailers.get(label).unsubscribe(callback)
+
+    def labels(self):
+        with self._lock:
+            return list(self._buckets)
+
+    def _on_lines(self, label, lines):
+        with self._lock:
+            buckets = self._buckets.get(label)
+            if buckets is None:
+                return
+            for line in lines:
+                # El final que ya existía en el log no tiene hora fiable: solo se cuenta lo nuevo
+                if line.source != SOURCE_LOG:
+                    continue
+                counts = analyze_line(line.text)
+                if not counts:
+                    continue
+                minute = int(line.timestamp // 60)
+                bucket = buckets.get(minute)
+                if bucket is None:
+                    bucket = buckets[minute] = Counter()
+                bucket.update(counts)
+            self._expire(buckets, int(lines[-1].timestamp // 60) if lines else None)
+
+    def _expire(self, buckets, current_minute):
+        if current_minute is None:
+            return
+        while buckets and next(iter(buckets)) <= current_minute - self.window:
+            buckets.popitem(last=False)
+
+    def series(self, label, metric, minutes, now):
+        """Serie de `metric` de los últimos `minutes` minutos hasta `now`, con ceros donde no hubo actividad."""
+        current = int(now // 60)
+        with self._lock:
+            buckets = self._buckets.get(label, {})
+            return [
+                (minute * 60, buckets[minute][metric] if minute in buckets else 0)
+                for minute in range(current - minutes + 1, current + 1)
+            ]
+
+    def totals(self, label, minutes, now):
+        """Counter con la suma de cada métrica en los últimos `minutes` minutos."""
+        first = int(now // 60) - minutes + 1
+        total = Counter()
+        with self._lock:
+            for minute, bucket in self._buckets.get(label, {}).items():
+                if minute >= first:
+                    total.update(bucket)
+        return total
+
+
+# Instancia global compartida por toda la aplicación
+api_usage = ApiUsageAnalyzer()
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from .constants import GDFUSE_DIR, LOG_BUFFER_LINES, LOG_INITIAL_TAIL_BYTES, LOG_POLL_INTERVAL
+
+LOG_FILE_NAME = "gdfuse.log"
+
+# Niveles que se deducen de cada línea (google-drive-ocamlfuse no escribe un nivel explícito)
+ERROR = "ERROR"
+WARNING = "WARNING"
+INFO = "INFO"
+LEVELS = (ERROR, WARNING, INFO)
+
+_ERROR_RE = re.compile(r"error|exception|fail|denied|forbidden", re.IGNORECASE)
+_WARNING_RE = re.compile(r"warn|retry|backoff|timeout|rate ?limit", re.IGNORECASE)
+
+# Origen de la línea: el propio gdfuse.log, el final que ya existía al empezar a
+# seguirlo, o la salida del proceso de montaje
+SOURCE_LOG = "log"
+SOURCE_BACKLOG = "backlog"
+SOURCE_MOUNT = "mount"
+
+LogLine = namedtuple("LogLine", ["seq", "timestamp", "level", "text", "source"])
+
+
+def classify(text):
+    if _ERROR_RE.search(text):
+        return ERROR
+    if _WARNING_RE.search(text):
+        return WARNING
+    return INFO
+
+
+class _Inotify:
+    """Envoltorio mínimo de inotify(7) con ctypes. Lanza OSError si no está disponible."""
+
+    IN_MODIFY = 0x00000002
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_MOVE_SELF = 0x00000800
+    IN_IGNORED = 0x00008000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc no encontrada")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify no disponible")
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+    def watch_dir(self, directory, mask=None):
+        if mask is None:
+            mask = self.IN_MODIFY | self.IN_CREATE | self.IN_MOVED_TO | self.IN_MOVED_FROM | self.IN_DELETE
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask | self.IN_MOVE_SELF)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {directory}")
+        return wd
+
+    def unwatch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Devuelve los eventos pendientes como (wd, máscara, nombre), sin bloquear."""
+        events = []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            events.append((wd, mask, os.fsdecode(data[offset:offset + length].rstrip(b"\0"))))
+            offset += length
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LogTailer:
+    """
+    Sigue el gdfuse.log de una cuenta como `tail -F`: al arrancar solo lee el final del
+    archivo y después únicamente lo que se añade, así que nunca relee logs enormes. Detecta
+    la rotación (cambio de inodo o truncado) y guarda las últimas líneas en un búfer
+    circular acotado. Espera con inotify sin plazo (stop() lo despierta por una tubería) y,
+    si no está disponible, sondea periódicamente. Mientras el directorio de la cuenta no
+    exista se vigila GDFUSE_DIR para enterarse de cuándo se crea.
+    """
+
+    def __init__(self, label, gdfuse_dir=GDFUSE_DIR, maxlen=LOG_BUFFER_LINES):
+        self.label = label
+        self.parent = os.path.expanduser(gdfuse_dir)
+        self.directory = os.path.join(self.parent, label)
+        self.path = os.path.join(self.directory, LOG_FILE_NAME)
+        self._buffer = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._subscribers = []
+        self._running = False
+        self._thread = None
+        self._wake_w = None
+        self._dir_wd = None
+        self._parent_wd = None
+        self._file = None
+        self._inode = None
+        self._partial = ""
+
+    @property
+    def maxlen(self):
+        """Número máximo de líneas que se guardan en memoria."""
+        return self._buffer.maxlen
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            wake_r, self._wake_w = os.pipe()
+            wake_w = self._wake_w
+        self._thread = threading.Thread(target=self._run, args=(wake_r, wake_w), name=f"logtail-{self.label}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            if self._wake_w is not None:
+                try:
+                    os.write(self._wake_w, b"\0")
+                except OSError:
+                    pass
+
+    def subscribe(self, callback):
+        """Registra `callback(lines)` con cada lote de LogLine nuevas (desde el hilo del tailer)."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def lines_since(self, seq=0):
+        """LogLine del búfer con número de secuencia mayor que `seq`."""
+        with self._lock:
+            return [line for line in self._buffer if line.seq > seq]
+
+    def record(self, text, source=SOURCE_MOUNT):
+        """Añade texto que no viene del archivo (p. ej. la salida de un montaje fallido)."""
+        self._publish([line for line in text.splitlines() if line.strip()], source)
+
+    def _publish(self, texts, source=SOURCE_LOG):
+        if not texts:
+            return
+        now = time.time()
+        with self._lock:
+            lines = []
+            for text in texts:
+                self._seq += 1
+                lines.append(LogLine(self._seq, now, classify(text), text, source))
+            self._buffer.extend(lines)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(lines)
+            except Exception as e:
+                print(f"Error en suscriptor del log de '{self.label}': {e}")
+
+    def _open(self, from_start):
+        self._close()
+        try:
+            self._file = open(self.path, "rb")
+        except OSError:
+            return False
+        st = os.fstat(self._file.fileno())
+        self._inode = st.st_ino
+        self._partial = ""
+        if not from_start and st.st_size > LOG_INITIAL_TAIL_BYTES:
+            self._file.seek(st.st_size - LOG_INITIAL_TAIL_BYTES)
+            self._file.readline()  # descartar la primera línea, probablemente incompleta
+        return True
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _rotated(self):
+        """True si el archivo se reemplazó o se truncó desde que lo abrimos."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_ino != self._inode or st.st_size < self._file.tell()
+
+    def _read_new(self, source=SOURCE_LOG):
+        data = self._file.read()
+        if not data:
+            return
+        text = self._partial + data.decode("utf-8", errors="replace")
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        self._publish([line for line in lines if line.strip()], source)
+
+    def _watch(self, inotify):
+        """
+        Vigila GDFUSE_DIR (solo altas) y el directorio de la cuenta si ya existe. Devuelve el
+        plazo de espera: ninguno si algún evento avisará de los cambios, cero si el directorio
+        acaba de aparecer (el log pudo crearse antes de vigilarlo) o el del sondeo si ni
+        siquiera existe GDFUSE_DIR.
+        """
+        if self._parent_wd is None:
+            try:
+                self._parent_wd = inotify.watch_dir(self.parent, inotify.IN_CREATE | inotify.IN_MOVED_TO)
+            except OSError:
+                pass
+        if self._dir_wd is None:
+            try:
+                self._dir_wd = inotify.watch_dir(self.directory)
+                return 0
+            except OSError:
+                pass
+        if self._dir_wd is None and self._parent_wd is None:
+            return LOG_POLL_INTERVAL
+        return None
+
+    def _handle_events(self, inotify):
+        """Olvida los vigilantes de directorios que se han borrado o movido."""
+        for wd, mask, _name in inotify.read_events():
+            if not mask & (inotify.IN_IGNORED | inotify.IN_MOVE_SELF):
+                continue
+            if mask & inotify.IN_MOVE_SELF:
+                inotify.unwatch(wd)
+            if wd == self._dir_wd:
+                self._dir_wd = None
+            elif wd == self._parent_wd:
+                self._parent_wd = None
+
+    def _run(self, wake_r, wake_w):
+        inotify = None
+        self._dir_wd = self._parent_wd = None
+        try:
+            inotify = _Inotify()
+        except OSError as e:
+            print(f"inotify no disponible para el log de '{self.label}' ({e}); se sondeará el archivo")
+
+        try:
+            if self._open(from_start=False):
+                self._read_new(SOURCE_BACKLOG)
+            while self._running:
+                if self._file is None:
+                    self._open(from_start=True)
+                elif self._rotated():
+                    # Leer lo que quedara en el archivo antiguo antes de pasar al nuevo
+                    self._read_new()
+                    self._open(from_start=True)
+                if self._file is not None:
+                    self._read_new()
+
+                if inotify:
+                    timeout = self._watch(inotify)
+                    ready, _w, _x = select.select([inotify.fd, wake_r], [], [], timeout)
+                    if inotify.fd in ready:
+                        self._handle_events(inotify)
+                else:
+                    ready, _w, _x = select.select([wake_r], [], [], LOG_POLL_INTERVAL)
+                if wake_r in ready:
+                    os.read(wake_r, 64)
+        finally:
+            self._close()
+            if inotify:
+                inotify.close()
+            with self._lock:
+                if self._wake_w == wake_w:
+                    self._wake_w = None
+            os.close(wake_r)
+            os.close(wake_w)
+
+
+class LogTailerRegistry:
+    """Un LogTailer por cuenta, creado bajo demanda."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tailers = {}
+
+    def get(self, label):
+        with self._lock:
+            tailer = self._tailers.get(label)
+            if tailer is None:
+                tailer = self._tailers[label] = LogTailer(label)
+        tailer.start()
+        return tailer
+
+    def record(self, label, text, source=SOURCE_MOUNT):
+        self.get(label).record(text, source)
+
+    def stop_all(self):
+        with self._lock:
+            tailers, self._tailers = self._tailers, {}
+        for tailer in tailers.values():
+            tailer.stop()
+
+
+# Instancia global compartida por toda la aplicación
+log_tailers = LogTailerRegistry()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from .constants import METRICS_INTERVAL, METRICS_WINDOW, METRICS_READ_BYTES
+
+# Operaciones que se miden en cada muestra
+STATVFS = "statvfs"
+LISTDIR = "listdir"
+READ = "read"
+
+# Resumen de una operación: percentiles en segundos, rendimiento de lectura en bytes/s
+MetricSummary = namedtuple("MetricSummary", ["count", "p50", "p99", "last", "throughput"])
+
+
+class RollingHistogram:
+    """Ventana deslizante con las últimas `window` muestras de una operación."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._bytes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, latency, nbytes=0):
+        with self._lock:
+            self._samples.append(latency)
+            self._bytes.append(nbytes)
+
+    def summary(self):
+        with self._lock:
+            samples = list(self._samples)
+            total_bytes = sum(self._bytes)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        total_time = sum(samples)
+        throughput = total_bytes / total_time if total_bytes and total_time > 0 else None
+        return MetricSummary(
+            len(samples), _percentile(ordered, 50), _percentile(ordered, 99), samples[-1], throughput
+        )
+
+
+def _percentile(ordered, percent):
+    """Percentil por el método del rango más cercano sobre una lista ya ordenada."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class MountMetrics:
+    """
+    Recolector de latencias por punto de montaje. Cada montaje tiene su propio hilo que
+    mide statvfs, el listado de la raíz y, opcionalmente, la lectura de los primeros bytes
+    de un archivo pequeño. Un montaje colgado solo bloquea a su propio hilo, nunca a los
+    demás ni a la interfaz.
+    """
+
+    def __init__(self, interval=METRICS_INTERVAL, window=METRICS_WINDOW, read_sample=False):
+        self.interval = interval
+        self.window = window
+        self.read_sample = read_sample
+        self._lock = threading.Lock()
+        self._histograms = {}   # punto de montaje -> {operación: RollingHistogram}
+        self._samplers = {}     # punto de montaje -> threading.Event de parada
+        self._read_targets = {} # punto de montaje -> archivo elegido para medir lecturas
+
+    def track(self, mount_points):
+        """Ajusta los montajes vigilados: arranca hilos para los nuevos y detiene los que ya no están."""
+        mount_points = set(mount_points)
+        with self._lock:
+            for mount_point in set(self._samplers) - mount_points:
+                self._samplers.pop(mount_point).set()
+                self._histograms.pop(mount_point, None)
+                self._read_targets.pop(mount_point, None)
+            for mount_point in mount_points - set(self._samplers):
+                stop_event = threading.Event()
+                self._samplers[mount_point] = stop_event
+                self._histograms[mount_point] = {op: RollingHistogram(self.window) for op in (STATVFS, LISTDIR, READ)}
+                threading.Thread(
+                    target=self._sampler, args=(mount_point, stop_event),
+                    name="mount-metrics", daemon=True
+                ).start()
+
+    def stop(self):
+        """Detiene todos los hilos de muestreo (no espera a los que estén bloqueados en el kernel)."""
+        self.track(())
+
+    def summary(self, mount_point, operation=LISTDIR):
+        """MetricSummary de `operation` para `mount_point`, o None si aún no hay muestras."""
+        with self._lock:
+            histograms = self._histograms.get(mount_point)
+        if not histograms:
+            return None
+        return histograms[operation].summary()
+
+    def _sampler(self, mount_point, stop_event):
+        while not stop_event.is_set():
+            self._sample(mount_point)
+            stop_event.wait(self.interval)
+
+    def _sample(self, mount_point):
+        with self._lock:
+            histograms = self._histograms.get(mount_point)
+        if not histograms:
+            return
+
+        start = time.monotonic()
+        try:
+            os.statvfs(mount_point)
+            histograms[STATVFS].add(time.monotonic() - start)
+
+            start = time.monotonic()
+            names = os.listdir(mount_point)
+            histograms[LISTDIR].add(time.monotonic() - start)
+        except OSError:
+            # La salud del montaje la informa MountProbe; aquí solo se miden montajes que responden
+            return
+
+        if self.read_sample:
+            self._sample_read(mount_point, names, histograms[READ])
+
+    def _sample_read(self, mount_point, names, histogram):
+        target = self._read_targets.get(mount_point)
+        if target is None:
+            target = self._pick_read_target(mount_point, names)
+            if target is None:
+                return
+            self._read_targets[mount_point] = target
+        start = time.monotonic()
+        try:
+            with open(target, "rb") as f:
+                data = f.read(METRICS_READ_BYTES)
+        except OSError:
+            self._read_targets.pop(mount_point, None)
+            return
+        histogram.add(time.monotonic() - start, len(data))
+
+    def _pick_read_target(self, mount_point, names):
+        """Elige un archivo regular no vacío de la raíz, preferiblemente pequeño."""
+        best = None
+        for name in names:
+            path = os.path.join(mount_point, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path) or st.st_size == 0:
+                continue
+            if st.st_size <= METRICS_READ_BYTES:
+                return path
+            if best is None or st.st_size < best[1]:
+                best = (path, st.st_size)
+        return best[0] if best else None
+
+
+# Instancia global compartida por toda la aplicación
+mount_metrics = MountMetrics()
@@ -13,92 +13,300 @@
 # Debes haber recibido una copia de la Licencia Pública General GNU
 # junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
 
+import asyncio
 import os
+import shlex
 import subprocess
-from tkinter import messagebox
 import threading
 import time
-from gi.repository import GLib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .constants import (
+    AUTOMOUNT_MAX_WORKERS, AUTOMOUNT_TIMEOUT,
+    UNMOUNT_MAX_WORKERS, UNMOUNT_TIMEOUT, UNMOUNT_LAZY_FALLBACK,
+    MONITOR_MIN_INTERVAL, MONITOR_MAX_INTERVAL
+)
+from .mountinfo import mount_watcher
+from .mount_table import mount_table
+from .mount_monitor import MountMonitor
+from .gdfuse_config import gdfuse_index
+from .supervisor import RemountSupervisor
+from .prewarm import prewarmer
+from .cache_budget import cache_budget
+from .logtail import log_tailers
+from .dispatcher import ui_dispatcher
+from .backend import backend
+from .processes import process_manager
+from .mount_jobs import (
+    MountJob, SPAWNING, WAITING_FOR_FUSE, RETRYING_LAZY_UNMOUNT, RETRYING_NONEMPTY,
+    MOUNTED, FAILED, CANCELLED
+)
 from .i18n import i18n_instance
 _ = i18n_instance.gettext
 
 UNKNOWN_LABEL = "__UNKNOWN__"
 
+# Detalles de éxito que devuelve _unmount_one
+ALREADY_UNMOUNTED = "already-unmounted"
+LAZY_UNMOUNTED = "lazy-unmounted"
+
+# Opciones que las gestiona el propio gestor y no se pueden pasar por cuenta
+RESERVED_MOUNT_FLAGS = ("-label", "-headless", "-id", "-secret", "-redirect_uri", "-config")
+# Vacía la caché antes de montar; google-drive-ocamlfuse la ejecuta como orden aparte y sale
+CLEAR_CACHE_FLAG = "-cc"
+
+
+def parse_mount_options(mount_options):
+    """
+    Separa las opciones de montaje de una cuenta (p. ej. "-m -o max_read=131072,big_writes")
+    en (flags de google-drive-ocamlfuse, opciones FUSE de -o). Lanza ValueError si no son válidas.
+    """
+    flags, fuse_options = [], []
+    tokens = shlex.split(mount_options or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "-o":
+            if i + 1 >= len(tokens):
+                raise ValueError(_("Falta el valor de -o"))
+            fuse_options.extend(opt for opt in tokens[i + 1].split(",") if opt)
+            i += 2
+            continue
+        if token.startswith("-o") and len(token) > 2:
+            fuse_options.extend(opt for opt in token[2:].split(",") if opt)
+        elif not token.startswith("-"):
+            raise ValueError(_("Opción de montaje no válida: {}").format(token))
+        elif token in RESERVED_MOUNT_FLAGS:
+            raise ValueError(_("La opción {} la gestiona la aplicación").format(token))
+        else:
+            flags.append(token)
+        i += 1
+    return flags, fuse_options
+
+
+def build_mount_cmd(label, mount_point, mount_options="", extra_fuse_options=()):
+    """Orden de montaje de una cuenta con sus opciones propias más las que añada el reintento."""
+    flags, fuse_options = parse_mount_options(mount_options)
+    flags = [flag for flag in flags if flag != CLEAR_CACHE_FLAG]
+    for option in extra_fuse_options:
+        if option not in fuse_options:
+            fuse_options.append(option)
+    cmd = ["google-drive-ocamlfuse", "-label", label] + flags
+    if fuse_options:
+        cmd += ["-o", ",".join(fuse_options)]
+    cmd.append(mount_point)
+    return cmd
+
+
 class MountManager:
     def __init__(self, mounted_accounts_ref):
         self.mounted_accounts = mounted_accounts_ref
         self._internal_unmounting = set() # Etiquetas que se están desmontando internamente
+        self._jobs = {} # Montajes en curso {etiqueta: MountJob}
+        self._jobs_lock = threading.Lock()
+        self._mounted_listeners = [] # callback(etiqueta, punto_montaje) tras cada montaje correcto
+        # Remontaje automático tras desmontajes externos, solo en cuentas con 'auto_remount'
+        self.supervisor = RemountSupervisor(self, is_enabled=self._auto_remount_enabled)
+        self._monitor = None # MountMonitor, creado en start_mount_monitor
+        self._table_generation = -1 # Última generación de mount_table aplicada a mounted_accounts
+        mount_table.start()
+
+    def add_mounted_listener(self, callback):
+        """Registra `callback(label, mount_point)`, llamado desde el hilo del montaje al montar con éxito."""
+        self._mounted_listeners.append(callback)
 
-    def _run_safe_mount(self, mount_cmd, mount_point, timeout=45):
+    def _notify_mounted(self, label, mount_point):
+        self.wake_mount_monitor()
+        for callback in list(self._mounted_listeners):
+            try:
+                callback(label, mount_point)
+            except Exception as e:
+                print(f"Error en aviso de montaje de '{label}': {e}")
+
+    def _mount_options(self, label):
+        accounts = getattr(getattr(self, 'main_app', None), 'accounts', {})
+        return accounts.get(label, {}).get('mount_options', "")
+
+    def _mount_command(self, label, mount_point, extra_fuse_options=()):
+        """Construye la orden de montaje con las opciones guardadas de la cuenta."""
+        mount_options = self._mount_options(label)
+        try:
+            return build_mount_cmd(label, mount_point, mount_options, extra_fuse_options)
+        except ValueError as e:
+            print(_("Opciones de montaje de '{}' no válidas ({}); se ignoran").format(label, e))
+            return build_mount_cmd(label, mount_point, "", extra_fuse_options)
+
+    def _clear_cache_if_requested(self, label):
+        """Si la cuenta lleva -cc en sus opciones, vacía su caché antes de montarla."""
+        try:
+            flags, _fuse_options = parse_mount_options(self._mount_options(label))
+        except ValueError:
+            return
+        if CLEAR_CACHE_FLAG not in flags:
+            return
+        try:
+            process_manager.run_sync(["google-drive-ocamlfuse", CLEAR_CACHE_FLAG, "-label", label])
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(_("No se pudo vaciar la caché de '{}': {}").format(label, e))
+
+    def _mount_timeout(self, label, default, data=None):
+        """Timeout de montaje de la cuenta (clave 'mount_timeout', en segundos) o `default`."""
+        if data is None:
+            data = getattr(getattr(self, 'main_app', None), 'accounts', {}).get(label, {})
+        try:
+            return max(1, int(data.get('mount_timeout', default)))
+        except (TypeError, ValueError):
+            return default
+
+    def _auto_remount_enabled(self, label):
+        accounts = getattr(getattr(self, 'main_app', None), 'accounts', {})
+        return bool(accounts.get(label, {}).get('auto_remount', False))
+
+    def _run_safe_mount(self, mount_cmd, mount_point, timeout=45, job=None):
+        """Versión bloqueante de _safe_mount_async para los hilos de montaje (no desde el hilo de Tk)."""
+        try:
+            return backend.run(self._safe_mount_async(mount_cmd, mount_point, timeout, job))
+        except Exception as e:
+            return -1, "", str(e)
+
+    async def _safe_mount_async(self, mount_cmd, mount_point, timeout=45, job=None):
         """
-        Ejecuta el comando de montaje y verifica cada segundo si el montaje ya es efectivo.
+        Ejecuta el comando de montaje y espera a que el montaje sea efectivo.
         Si se detecta el montaje, retorna éxito inmediatamente sin esperar a que el proceso termine.
+        La espera la despiertan el vigilante de mountinfo o la salida del proceso, no un sondeo.
+        Si se pasa un MountJob, se informa de su estado y se aborta al cancelarlo.
+        Corre en el bucle del backend: el proceso se lanza con process_manager y no hace falta
+        ningún hilo por montaje para esperarlo. Un montaje activo no se mata al cerrar la aplicación.
         """
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        proc = None
+
+        def wake_threadsafe(*_args):
+            loop.call_soon_threadsafe(wake.set)
+
+        if job:
+            job.add_cancel_hook(wake_threadsafe)
+        # Cualquier cambio en la tabla despierta la espera, que vuelve a comprobar el punto
+        mount_watcher.subscribe(wake_threadsafe)
         try:
-            proc = subprocess.Popen(mount_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            start_time = time.time()
-            
-            while time.time() - start_time < timeout:
+            if job:
+                job.set_state(SPAWNING)
+            proc = await process_manager.spawn(mount_cmd, kill_on_quit=False)
+            # El gestor lee las tuberías y recoge el proceso; su final también despierta la espera
+            exited = backend.detach(proc.wait())
+            exited.add_done_callback(lambda _task: wake.set())
+            if job:
+                job.set_state(WAITING_FOR_FUSE)
+            # Si el vigilante no está activo volvemos a comprobar cada segundo
+            check_interval = None if mount_watcher.running else 1
+            deadline = loop.time() + timeout
+
+            while loop.time() < deadline:
+                if job and job.cancel_requested():
+                    await proc.kill()
+                    result = await exited
+                    return -1, result.stdout, result.stderr or "Montaje cancelado"
+
                 # 1. ¿El proceso terminó rápido? (Caso ideal/normal)
-                retcode = proc.poll()
-                if retcode is not None:
-                    stdout, stderr = proc.communicate()
-                    return retcode, stdout, stderr
+                if exited.done():
+                    result = exited.result()
+                    return result.returncode, result.stdout, result.stderr
 
                 # 2. ¿El montaje ya es visible para el SO? (Caso con retardo de demonización)
-                # Si os.path.ismount es True, el usuario ya puede usar los archivos.
-                if os.path.ismount(mount_point):
+                # Si el punto aparece en la tabla de montajes, el usuario ya puede usar los archivos.
+                # El proceso sigue en segundo plano y el gestor lo recoge cuando termine.
+                if self.is_mounted(mount_point):
                     print(f"[DEBUG] Montaje detectado en {mount_point}. Liberando UI...")
                     return 0, "", ""
-                
-                time.sleep(1) # Verificación rápida cada segundo
+
+                remaining = deadline - loop.time()
+                try:
+                    await asyncio.wait_for(wake.wait(), remaining if check_interval is None else min(check_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
 
             # 3. Timeout real: el proceso no terminó y no hay montaje visible
-            proc.kill()
-            stdout, stderr = proc.communicate()
-            return -1, stdout, stderr or "Timeout al montar la cuenta"
+            await proc.kill()
+            result = await exited
+            return -1, result.stdout, result.stderr or "Timeout al montar la cuenta"
         except Exception as e:
             return -1, "", str(e)
+        finally:
+            if proc is not None:
+                # Montado o terminado: deja plaza para otro montaje aunque el proceso siga vivo
+                proc.release()
+            mount_watcher.unsubscribe(wake_threadsafe)
+            if job:
+                job.remove_cancel_hook(wake_threadsafe)
+
+    def is_mounted(self, mount_point):
+        """Consulta la tabla de montajes del vigilante si está activo; si no, recurre a os.path.ismount."""
+        if mount_watcher.running:
+            return mount_watcher.is_mounted(mount_point)
+        return os.path.ismount(mount_point)
+
+    def submit_mount(self, label, mount_point):
+        """
+        Lanza el montaje de una cuenta en segundo plano y devuelve un MountJob con el que
+        seguir su progreso, esperar el resultado o cancelarlo. Si ya hay un montaje en
+        curso para esa etiqueta se devuelve el mismo trabajo.
+        """
+        with self._jobs_lock:
+            job = self._jobs.get(label)
+            if job and not job.done():
+                return job
+            # Normalizar el punto de montaje para evitar inconsistencias
+            job = MountJob(label, os.path.abspath(os.path.expanduser(mount_point)))
+            self._jobs[label] = job
+
+        def forget(finished_job):
+            with self._jobs_lock:
+                if self._jobs.get(label) is finished_job:
+                    del self._jobs[label]
+
+        job.add_done_callback(forget)
+        threading.Thread(target=self._mount_job_worker, args=(job,), name=f"mount-{label}", daemon=True).start()
+        return job
+
+    def active_jobs(self):
+        """Devuelve {etiqueta: MountJob} de los montajes que siguen en curso."""
+        with self._jobs_lock:
+            return {label: job for label, job in self._jobs.items() if not job.done()}
 
     def mount_account(self, label, mount_point):
-        """Montar una cuenta específica con verificaciones de seguridad"""
+        """Montar una cuenta específica y esperar el resultado (bloquea: no usar desde el hilo de Tk)"""
+        return self.submit_mount(label, mount_point).result()
+
+    def _mount_job_worker(self, job):
+        """Montar una cuenta específica con verificaciones de seguridad, informando del progreso en `job`"""
+        label = job.label
+        mount_point = job.mount_point
         try:
-            # Normalizar el punto de montaje para evitar inconsistencias
-            mount_point = os.path.abspath(os.path.expanduser(mount_point))
-            
-            # Si el directorio no existe, crearlo
-            if not os.path.exists(mount_point):
+            # Si el directorio no existe, crearlo (sin tocarlo si ya hay algo montado ahí)
+            if not self.is_mounted(mount_point) and not os.path.exists(mount_point):
                 os.makedirs(mount_point, exist_ok=True)
                 # En algunas distros como Fedora, asegurar permisos 755 ayuda a FUSE
                 os.chmod(mount_point, 0o755)
             
             # Verificar si ya está montado algo ahí
-            if os.path.ismount(mount_point):
+            if self.is_mounted(mount_point):
                 # Si ya está montado, comprobamos si es nuestra cuenta
                 self.refresh_mounts()
                 if label in self.mounted_accounts and self.mounted_accounts[label] == mount_point:
-                    messagebox.showinfo(_("Info"), _("La cuenta '{}' ya está montada en {}").format(label, mount_point))
-                    return True
+                    job.set_state(MOUNTED, _("La cuenta '{}' ya está montada en {}").format(label, mount_point))
                 else:
-                    messagebox.showwarning(_("Aviso"), _("El punto de montaje {} ya está en uso por otro proceso.").format(mount_point))
-                    return False
-
-            # --- Obtener client_secret desencriptado si es necesario ---
-            if hasattr(self, 'main_app') and hasattr(self.main_app, 'accounts'):
-                account_data = self.main_app.accounts.get(label)
-                if account_data:
-                    from .encryption import EncryptionManager
-                    enc_mgr = EncryptionManager()
-                    try:
-                        client_secret = enc_mgr.decrypt(account_data['client_secret'])
-                    except Exception:
-                        client_secret = account_data['client_secret']
+                    job.set_state(FAILED, _("El punto de montaje {} ya está en uso por otro proceso.").format(mount_point))
+                return
 
-            mount_cmd = ["google-drive-ocamlfuse", "-label", label, mount_point]
-            # Ejecutamos el montaje con nuestra lógica de verificación rápida
-            retcode, stdout, stderr = self._run_safe_mount(mount_cmd, mount_point, timeout=45)
+            # Mientras arranca, el presupuesto de caché no borra nada de esta cuenta
+            with cache_budget.mount_guard(label):
+                self._clear_cache_if_requested(label)
+                mount_cmd = self._mount_command(label, mount_point)
+                # Ejecutamos el montaje con nuestra lógica de verificación rápida
+                retcode, stdout, stderr = self._run_safe_mount(mount_cmd, mount_point, timeout=self._mount_timeout(label, 45), job=job)
 
-            if retcode != 0:
+            if retcode != 0 and not job.cancel_requested():
                 # Si falla, analizamos el error para intentar soluciones comunes
                 error_msg = stderr.lower()
                 
@@ -115,24 +323,31 @@ class MountManager:
                 if any(err in error_msg for err in dirty_mount_errors):
                     # 1. Intentar un desmontaje forzado (lazy unmount) por si es un montaje zombie
                     # Probamos con fusermount3 (común en Fedora) y luego fusermount
+                    job.set_state(RETRYING_LAZY_UNMOUNT)
                     for unmount_bin in ["fusermount3", "fusermount"]:
                         try:
-                            subprocess.run([unmount_bin, "-uz", mount_point], capture_output=True)
+                            process_manager.run_sync([unmount_bin, "-uz", mount_point])
                         except FileNotFoundError:
                             continue
+                        except subprocess.TimeoutExpired:
+                            pass
                     
                     time.sleep(1)
                     
                     # 2. Reintentar el montaje normal
-                    retcode, stdout, stderr = self._run_safe_mount(mount_cmd, mount_point, timeout=30)
+                    if not job.cancel_requested():
+                        retcode, stdout, stderr = self._run_safe_mount(mount_cmd, mount_point, timeout=30, job=job)
                     
                     # 3. Si sigue fallando con "invalid argument", intentar con la opción nonempty
                     # Esto es necesario en Fedora si el directorio tiene rastros de FUSE
-                    if retcode != 0 and any(err in stderr.lower() for err in ["invalid argument", "inválid", "invalida"]):
-                        mount_cmd_nonempty = ["google-drive-ocamlfuse", "-label", label, "-o", "nonempty", mount_point]
-                        retcode, stdout, stderr = self._run_safe_mount(mount_cmd_nonempty, mount_point, timeout=30)
+                    if retcode != 0 and not job.cancel_requested() and any(err in stderr.lower() for err in ["invalid argument", "inválid", "invalida"]):
+                        job.set_state(RETRYING_NONEMPTY)
+                        mount_cmd_nonempty = self._mount_command(label, mount_point, extra_fuse_options=("nonempty",))
+                        retcode, stdout, stderr = self._run_safe_mount(mount_cmd_nonempty, mount_point, timeout=30, job=job)
 
-            if retcode == 0:
+            if job.cancel_requested():
+                job.set_state(CANCELLED, _("Montaje de '{}' cancelado").format(label))
+            elif retcode == 0:
                 self.mounted_accounts[label] = mount_point
                 
                 # --- ACTUALIZAR ESTADO EN LA GUI ---
@@ -145,234 +360,281 @@ class MountManager:
                         app.accounts[label]['mount_point'] = mount_point
                     
                     if hasattr(app, '_save_state'):
-                        app._save_state()
-                    
-                    # Forzar refresco de la UI
-                    if hasattr(app, 'refresh_mounts'):
-                        GLib.idle_add(app.refresh_mounts)
-                    elif hasattr(app, 'refresh_accounts_ui'):
-                        app.refresh_accounts_ui()
-
-                messagebox.showinfo(_("Éxito"), _("Cuenta '{}' montada en {}").format(label, mount_point))
-                return True
+                        ui_dispatcher.post(app._save_state, coalesce=True)
+
+                job.set_state(MOUNTED, _("Cuenta '{}' montada en {}").format(label, mount_point))
+                self._notify_mounted(label, mount_point)
             else:
-                messagebox.showerror(_("Error"), _("Error al montar '{}':\n{}").format(label, stderr))
-                return False
+                # La salida del proceso queda en el búfer del log de la cuenta para poder revisarla
+                log_tailers.record(label, stdout + "\n" + stderr)
+                job.set_state(FAILED, _("Error al montar '{}':\n{}").format(label, stderr))
         except Exception as e:
-            messagebox.showerror(_("Error"), _("Error inesperado: {}").format(str(e)))
-            return False
+            job.set_state(FAILED, _("Error inesperado: {}").format(str(e)))
 
     def unmount_account(self, account, mount_point):
-        """Desmontar una cuenta específica con verificación previa"""
-        # Si ya no está montado (desmontaje externo previo), limpiar y salir
-        if not os.path.exists(mount_point) or not os.path.ismount(mount_point):
-            if account in self.mounted_accounts:
-                del self.mounted_accounts[account]
-            self._internal_unmounting.discard(account)
+        """
+        Desmontar una cuenta específica con verificación previa. Devuelve (éxito, detalle);
+        mostrar el error es cosa de la interfaz, aquí no se abre ningún diálogo.
+        """
+        ok, detail = self._unmount_one(account, mount_point, lazy_fallback=False)
+        self.wake_mount_monitor()
+        if ok and detail == ALREADY_UNMOUNTED:
             # Refrescar UI si es posible
-            if hasattr(self, 'main_app') and hasattr(self.main_app, 'refresh_mounts'):
-                self.main_app.refresh_mounts()
-            return True
+            if hasattr(self, 'main_app') and hasattr(self.main_app, 'request_refresh_mounts'):
+                ui_dispatcher.post(self.main_app.request_refresh_mounts, coalesce=True)
+        return ok, detail
+
+    def unmount_many(self, mounts, lazy_fallback=UNMOUNT_LAZY_FALLBACK, max_workers=UNMOUNT_MAX_WORKERS):
+        """
+        Desmonta en paralelo varias cuentas {etiqueta: punto_montaje}. Las que estén ocupadas
+        se reintentan con un desmontaje diferido (-uz) si `lazy_fallback` está activo.
+        No muestra diálogos: devuelve un informe {etiqueta: (éxito, detalle)} para que quien
+        llama presente un único resumen. El tiempo total lo marca el montaje más lento.
+        """
+        report = {}
+        if not mounts:
+            return report
+        workers = max(1, min(max_workers, len(mounts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="unmount") as pool:
+            futures = {
+                pool.submit(self._unmount_one, label, mount_point, lazy_fallback): label
+                for label, mount_point in mounts.items()
+            }
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    report[label] = future.result()
+                except Exception as e:
+                    report[label] = (False, str(e))
+        self.wake_mount_monitor()
+        return report
+
+    def _unmount_one(self, account, mount_point, lazy_fallback=False):
+        """
+        Desmonta una cuenta sin interacción con la UI. Devuelve (éxito, detalle), donde
+        detalle es ALREADY_UNMOUNTED, LAZY_UNMOUNTED, "" o el mensaje de error.
+        """
+        # Un desmontaje pedido por el usuario anula cualquier remontaje pendiente, y el
+        # precalentamiento se detiene (esperando a que sus hilos suelten el montaje) para
+        # que fusermount no lo encuentre ocupado
+        self.supervisor.cancel(account)
+        prewarmer.cancel(account)
+
+        # Si ya no está montado (desmontaje externo previo), limpiar y salir.
+        # Se consulta la tabla de montajes: un stat sobre un montaje FUSE colgado bloquearía.
+        if not self.is_mounted(mount_point):
+            self.mounted_accounts.pop(account, None)
+            self._internal_unmounting.discard(account)
+            return True, ALREADY_UNMOUNTED
 
         self._internal_unmounting.add(account)
         try:
-            unmount_cmd = ["fusermount", "-u", mount_point]
-            # Usamos subprocess.run para capturar el stderr
-            result = subprocess.run(unmount_cmd, capture_output=True, text=True)
+            result = self._run_fusermount(["-u", mount_point])
             
             if result.returncode == 0:
-                if account in self.mounted_accounts:
-                    del self.mounted_accounts[account]
-                # Damos un pequeño margen para que el monitor registre el cambio
-                time.sleep(0.3)
-                return True
-            else:
-                # Si el error es que no se encontró en mtab, lo tratamos como éxito (ya se desmontó)
-                if "not found in /etc/mtab" in result.stderr or "no se encuentra en /etc/mtab" in result.stderr:
-                    if account in self.mounted_accounts:
-                        del self.mounted_accounts[account]
-                    return True
-                
-                self._internal_unmounting.discard(account)
-                messagebox.showerror(
-                    _( "Error al desmontar"),
-                    _("No se pudo desmontar '{}' en '{}':\nAsegúrate de que ningún archivo esté usando la carpeta.\n\nDetalle: {}").format(account, mount_point, result.stderr.strip())
-                )
-                return False
+                self.mounted_accounts.pop(account, None)
+                return True, ""
+
+            # Si el error es que no se encontró en mtab, lo tratamos como éxito (ya se desmontó)
+            if "not found in /etc/mtab" in result.stderr or "no se encuentra en /etc/mtab" in result.stderr:
+                self.mounted_accounts.pop(account, None)
+                return True, ALREADY_UNMOUNTED
+
+            # Montaje ocupado: el desmontaje diferido lo separa del árbol ya y lo libera al cerrarse los archivos
+            busy = any(err in result.stderr.lower() for err in ["busy", "ocupado"])
+            if busy and lazy_fallback:
+                lazy_result = self._run_fusermount(["-uz", mount_point])
+                if lazy_result.returncode == 0:
+                    self.mounted_accounts.pop(account, None)
+                    return True, LAZY_UNMOUNTED
+                result = lazy_result
+
+            self._internal_unmounting.discard(account)
+            return False, result.stderr.strip()
         except Exception as e:
             self._internal_unmounting.discard(account)
-            messagebox.showerror(
-                _( "Error al desmontar"),
-                _("Error inesperado: {}").format(str(e))
-            )
-            return False
-
-    def unmount_all(self):
-        """Desmontar todas las cuentas y actualizar tabla"""
-        if not self.mounted_accounts:
-            messagebox.showinfo(_("Info"), _( "No hay cuentas montadas"))
-            return
+            return False, str(e)
 
-        if messagebox.askyesno(_("Confirmar"), _( "¿Desmontar todas las cuentas?")):
-            errores = []
-            for account, mount_point in list(self.mounted_accounts.items()):
-                ok = self.unmount_account(account, mount_point)
-                if not ok:
-                    errores.append(account)
-            
-            if errores:
-                messagebox.showwarning(
-                    _( "Algunas cuentas no se desmontaron"),
-                    _("No se pudieron desmontar las siguientes cuentas:\n{}\nVerifica que no estén en uso.").format(', '.join(errores))
-                )
-            else:
-                messagebox.showinfo(_("Éxito"), _( "Todas las cuentas fueron desmontadas correctamente."))
+    def _run_fusermount(self, args):
+        """Ejecuta fusermount (o fusermount3 si es el único disponible) con los argumentos dados."""
+        return backend.run(self._fusermount_async(args))
 
-    def refresh_mounts(self):
-        """Actualizar lista de montajes sin duplicados"""
-        seen_mount_points = set()
-        active_mounts = {}
-        
+    async def _fusermount_async(self, args):
+        for unmount_bin in ["fusermount", "fusermount3"]:
+            try:
+                return await process_manager.run([unmount_bin] + args, timeout=UNMOUNT_TIMEOUT)
+            except FileNotFoundError:
+                continue
+            except asyncio.TimeoutError:
+                return subprocess.CompletedProcess([unmount_bin] + args, -1, "", _("Timeout al desmontar"))
+        raise FileNotFoundError(_("No se encontró fusermount ni fusermount3"))
+
+    def refresh_mounts(self, label_for=None):
+        """
+        Pone al día mounted_accounts con los cambios de la tabla de montajes desde la última
+        generación vista; solo si el historial no alcanza se reconstruye entero. El diccionario
+        se modifica en sitio porque lo comparten la GUI y el monitor. `label_for(entry)`
+        resuelve la etiqueta de un montaje nuevo (por defecto, por el índice de ~/.gdfuse).
+        """
+        label_for = label_for or self._label_for_entry
         try:
-            result = subprocess.run(["mount"], capture_output=True, text=True, timeout=10)
-            mount_lines = result.stdout.split('\n')
-            
-            for line in mount_lines:
-                if 'google-drive-ocamlfuse' in line:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        mount_point = parts[2]
-                        seen_mount_points.add(mount_point)
-                        
-                        label = self.get_label_from_mount_point(mount_point)
-                        if label == _( "Desconocido"):
-                            device = parts[0]
-                            if '@' in device and 'google-drive-ocamlfuse' in device:
-                                label = device.split('@')[0]
-                            else:
-                                label = UNKNOWN_LABEL
-                        active_mounts[mount_point] = label
+            diff = mount_table.changes_since(self._table_generation)
         except Exception as e:
             print(_("Error al refrescar montajes: {}").format(e))
-        
-        for account, mount_point in list(self.mounted_accounts.items()):
-            if mount_point not in seen_mount_points:
-                try:
-                    if os.path.ismount(mount_point):
-                        seen_mount_points.add(mount_point)
-                        active_mounts[mount_point] = account
-                except Exception as e:
-                    print(_("Error comprobando punto de montaje {}: {}").format(mount_point, e))
-            elif mount_point in active_mounts and active_mounts[mount_point] == UNKNOWN_LABEL:
-                active_mounts[mount_point] = account
-        
-        self.mounted_accounts = {}
-        for mount_point, label in active_mounts.items():
-            self.mounted_accounts[label] = mount_point
-        
+            return self.mounted_accounts
+        self._table_generation = diff.generation
+
+        # Cuenta ya conocida para cada punto de montaje (p. ej. la que acaba de montar la aplicación)
+        known = {mount_point: account for account, mount_point in list(self.mounted_accounts.items())}
+        if diff.full:
+            active = {}
+            for entry in diff.added:
+                active[known.get(entry.mount_point) or label_for(entry)] = entry.mount_point
+            for account, mount_point in known.items():
+                # Montajes que la tabla no considera de ocamlfuse pero siguen activos
+                if account not in active and mount_point not in active.values() and self.is_mounted(mount_point):
+                    active[account] = mount_point
+            for account in [account for account in self.mounted_accounts if account not in active]:
+                self.mounted_accounts.pop(account, None)
+            self.mounted_accounts.update(active)
+            return self.mounted_accounts
+
+        for entry in diff.removed:
+            account = known.pop(entry.mount_point, None)
+            if account is not None and self.mounted_accounts.get(account) == entry.mount_point:
+                del self.mounted_accounts[account]
+        for entry in diff.added:
+            if entry.mount_point not in known:
+                self.mounted_accounts[label_for(entry)] = entry.mount_point
         return self.mounted_accounts
 
-    def automount_accounts(self, accounts, deleted_accounts=None):
+    def _label_for_entry(self, entry):
+        label = self.get_label_from_mount_point(entry.mount_point)
+        if label == UNKNOWN_LABEL and '@' in entry.source and 'google-drive-ocamlfuse' in entry.source:
+            label = entry.source.split('@')[0]
+        return label
+
+    def automount_accounts(self, accounts, deleted_accounts=None, max_workers=AUTOMOUNT_MAX_WORKERS, timeout=AUTOMOUNT_TIMEOUT):
         """
         Lógica de negocio para montar automáticamente las cuentas marcadas al inicio.
-        Mantenemos la lógica aquí para separar la funcionalidad de la interfaz.
+        Los montajes se lanzan en paralelo con un máximo de `max_workers` hilos, cada cuenta
+        con su propio timeout (clave 'mount_timeout' de la cuenta o `timeout` por defecto),
+        de modo que el arranque tarda lo que la cuenta más lenta y no la suma de todas.
+
+        Devuelve un dict {etiqueta: (éxito, mensaje)} con el resultado de cada cuenta.
         """
-        from .encryption import EncryptionManager
-        enc_mgr = EncryptionManager()
-        
+        pending = []
+        results = {}
+
         for label, data in accounts.items():
             # 1. Comprobar blacklist
             if deleted_accounts and label in deleted_accounts and deleted_accounts[label].get("blacklist"):
                 continue
             
             # 2. Validar que la cuenta esté lista para montar
-            if (
+            if not (
                 data.get("automount", False)
                 and data.get("configured", False)
                 and data.get("client_id")
                 and data.get("client_secret")
             ):
-                mount_point = data.get('mount_point')
-                if not mount_point:
-                    mount_point = os.path.expanduser(f"~/{label}")
-                    os.makedirs(mount_point, exist_ok=True)
-                    data['mount_point'] = mount_point
-                    if hasattr(self, 'main_app') and hasattr(self.main_app, '_save_state'):
-                        GLib.idle_add(self.main_app._save_state)
-
-                # 3. Comprobar si ya está montado físicamente en el sistema
-                if os.path.ismount(mount_point):
-                    print(f"[DEBUG] '{label}' ya estaba montada físicamente en {mount_point}. Sincronizando...")
-                    self.mounted_accounts[label] = mount_point
-                    if hasattr(self, 'main_app') and hasattr(self.main_app, 'refresh_mounts'):
-                        GLib.idle_add(self.main_app.refresh_mounts)
-                    continue
+                continue
 
-                # 4. Si no está montado, procedemos a montar
-                try:
-                    print(f"[DEBUG] Automontando cuenta '{label}' en {mount_point}...")
-                    
-                    mount_cmd = ["google-drive-ocamlfuse", "-label", label, mount_point]
-                    # Ejecutar montaje con nuestra lógica robusta (timeout 30s para automontaje)
-                    retcode, stdout, stderr = self._run_safe_mount(mount_cmd, mount_point, timeout=30)
-                    
-                    if retcode == 0:
-                        self.mounted_accounts[label] = mount_point
-                        # Notificar a la app principal para que guarde y refresque
-                        if hasattr(self, 'main_app'):
-                            if hasattr(self.main_app, '_save_state'):
-                                GLib.idle_add(self.main_app._save_state)
-                            
-                            # En Fedora/Linux, damos un pequeño margen para que FUSE registre el montaje
-                            # antes de pedirle a la UI que refresque la tabla
-                            time.sleep(0.5) 
-                            if hasattr(self.main_app, 'refresh_mounts'):
-                                GLib.idle_add(self.main_app.refresh_mounts)
-                        print(f"[DEBUG] '{label}' montada con éxito.")
-                    else:
-                        error_msg = stderr.strip()
-                        # Lógica de detección de errores específicos
-                        if "access_token" in error_msg or "invalid_grant" in error_msg:
-                            print(_("No se monta '{}' porque el token OAuth no es válido o ha caducado.").format(label))
-                        else:
-                            print(_("Error al montar '{}': {}").format(label, error_msg))
-                                
-                except Exception as e:
-                    print(_("Error crítico en automontaje de '{}': {}").format(label, e))
+            mount_point = data.get('mount_point')
+            if not mount_point:
+                mount_point = os.path.expanduser(f"~/{label}")
+                os.makedirs(mount_point, exist_ok=True)
+                data['mount_point'] = mount_point
+                if hasattr(self, 'main_app') and hasattr(self.main_app, '_save_state'):
+                    ui_dispatcher.post(self.main_app._save_state, coalesce=True)
+
+            # 3. Comprobar si ya está montado físicamente en el sistema
+            if self.is_mounted(mount_point):
+                print(f"[DEBUG] '{label}' ya estaba montada físicamente en {mount_point}. Sincronizando...")
+                self.mounted_accounts[label] = mount_point
+                results[label] = (True, _("Ya estaba montada"))
+                continue
+
+            pending.append((label, mount_point, self._mount_timeout(label, timeout, data)))
+
+        # 4. Montar en paralelo las cuentas pendientes
+        if pending:
+            workers = max(1, min(max_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="automount") as pool:
+                futures = {
+                    pool.submit(self._automount_one, label, mount_point, account_timeout): label
+                    for label, mount_point, account_timeout in pending
+                }
+                for future in as_completed(futures):
+                    label = futures[future]
+                    try:
+                        results[label] = future.result()
+                    except Exception as e:
+                        print(_("Error crítico en automontaje de '{}': {}").format(label, e))
+                        results[label] = (False, str(e))
+
+        # Notificar una sola vez a la app principal para que guarde y refresque
+        if results and hasattr(self, 'main_app'):
+            if hasattr(self.main_app, '_save_state'):
+                ui_dispatcher.post(self.main_app._save_state, coalesce=True)
+            if hasattr(self.main_app, 'request_refresh_mounts'):
+                ui_dispatcher.post(self.main_app.request_refresh_mounts, coalesce=True)
+
+        return results
+
+    def _automount_one(self, label, mount_point, timeout):
+        """Monta una única cuenta del automontaje. Devuelve (éxito, mensaje)."""
+        print(f"[DEBUG] Automontando cuenta '{label}' en {mount_point}...")
+        
+        with cache_budget.mount_guard(label):
+            self._clear_cache_if_requested(label)
+            mount_cmd = self._mount_command(label, mount_point)
+            # Ejecutar montaje con nuestra lógica robusta
+            retcode, stdout, stderr = self._run_safe_mount(mount_cmd, mount_point, timeout=timeout)
+        
+        if retcode == 0:
+            self.mounted_accounts[label] = mount_point
+            print(f"[DEBUG] '{label}' montada con éxito.")
+            self._notify_mounted(label, mount_point)
+            return True, ""
+
+        error_msg = stderr.strip()
+        log_tailers.record(label, stdout + "\n" + stderr)
+        # Lógica de detección de errores específicos
+        if "access_token" in error_msg or "invalid_grant" in error_msg:
+            print(_("No se monta '{}' porque el token OAuth no es válido o ha caducado.").format(label))
+        else:
+            print(_("Error al montar '{}': {}").format(label, error_msg))
+        return False, error_msg
 
     def get_label_from_mount_point(self, mount_point):
         """Intentar obtener etiqueta real para un punto de montaje"""
         try:
-            # Buscar en la configuración de google-drive-ocamlfuse
-            config_path = os.path.expanduser("~/.gdfuse")
-            if os.path.exists(config_path):
-                for label in os.listdir(config_path):
-                    config_file = os.path.join(config_path, label, "config")
-                    if os.path.isfile(config_file):
-                        with open(config_file, 'r') as f:
-                            for line in f:
-                                if line.startswith("mount_point="):
-                                    config_mount = line.split('=')[1].strip()
-                                    if config_mount == mount_point:
-                                        return label
+            # Buscar en el índice de configuraciones de google-drive-ocamlfuse (~/.gdfuse),
+            # que solo relee los archivos config cuando cambia su mtime
+            label = gdfuse_index.label_for_mount_point(mount_point)
+            if label:
+                return label
         except Exception as e:
             print(_("Error obteniendo etiqueta: {}").format(e))
         return UNKNOWN_LABEL
 
-    def start_mount_monitor(self, interval=5, on_unmount_callback=None, start_delay=30):
+    def start_mount_monitor(self, on_unmount_callback=None, min_interval=MONITOR_MIN_INTERVAL, max_interval=MONITOR_MAX_INTERVAL):
         """
-        Inicia un hilo que monitorea los puntos de montaje. Si detecta un desmontaje,
-        llama al callback y termina su ciclo para que la GUI actualice el estado.
-        
-        Args:
-            interval (int): Segundos entre cada comprobación.
-            on_unmount_callback (callable): Función a llamar cuando se detecta desmontaje externo.
-            start_delay (int): Tiempo de gracia al inicio antes de empezar a notificar (evita falsos positivos al arrancar).
+        Inicia el MountMonitor que detecta desmontajes externos y llama al callback con
+        cada cuenta caída. Comprueba al instante cuando cambia la tabla de montajes o tras
+        montar/desmontar desde la aplicación, y además cada `min_interval`..`max_interval`
+        segundos según lo estable que esté el sistema.
+
+        Solo se avisa de cuentas que el monitor llegó a ver montadas: las entradas antiguas
+        de la configuración que ya no están montadas al arrancar no son desmontajes externos,
+        así que no hace falta ningún tiempo de gracia inicial.
         """
-        if hasattr(self, '_monitoring') and self._monitoring:
+        if self._monitor is not None and self._monitor.running:
             return
 
-        self._monitoring = True
+        self._on_unmount_callback = on_unmount_callback
+        self._seen_mounted = {}
         self._already_encrypted = set() 
         
         # --- Pre-encriptar cuentas al inicio del monitor una sola vez ---
@@ -393,44 +655,75 @@ class MountManager:
             if hasattr(self.main_app, '_save_state'):
                 self.main_app._save_state()
 
-        def monitor():
-            # Tiempo de gracia inicial para permitir que los automontajes se completen
-            if start_delay > 0:
-                time.sleep(start_delay)
+        self._monitor = MountMonitor(self._check_mounts, min_interval, max_interval)
+        self._monitor.start()
+
+    def wake_mount_monitor(self):
+        if self._monitor is not None:
+            self._monitor.wake()
+
+    def _mounted_now(self):
+        """
+        {etiqueta: punto de montaje} de las cuentas que la tabla de montajes tiene montadas.
+        La etiqueta sale de mounted_accounts o, si no está ahí, del punto de montaje configurado.
+        """
+        labels = {mount_point: label for label, mount_point in list(self.mounted_accounts.items())}
+        accounts = getattr(getattr(self, 'main_app', None), 'accounts', None) or {}
+        for label, data in list(accounts.items()):
+            mount_point = data.get('mount_point')
+            if mount_point:
+                labels.setdefault(mount_point, label)
+        mounted = {}
+        for entry in mount_table.snapshot().entries:
+            label = labels.get(entry.mount_point)
+            if label:
+                mounted[label] = entry.mount_point
+        return mounted
 
-            while self._monitoring:
-                time.sleep(interval)
+    def _check_mounts(self):
+        """Una ronda del monitor (desde su hilo). Devuelve True si algo cambió."""
+        changed = False
+        unmounted_labels = []
 
-                if not self.mounted_accounts:
+        # El monitor lleva su propia cuenta de lo montado a partir de la tabla de montajes:
+        # mounted_accounts lo rehace la GUI y puede perder una etiqueta antes de que esta
+        # ronda la vea desmontada, y entonces el desmontaje externo pasaría desapercibido
+        mounted_now = self._mounted_now()
+        for label, mount_point in mounted_now.items():
+            if self._seen_mounted.get(label) != mount_point:
+                self._seen_mounted[label] = mount_point
+                changed = True
+
+        for label, mount_point in list(self._seen_mounted.items()):
+            try:
+                if mounted_now.get(label) == mount_point or self.is_mounted(mount_point):
                     continue
+                del self._seen_mounted[label]
+                # Si no está montado, comprobamos si fue un desmontaje interno
+                if label in self._internal_unmounting:
+                    # Es interno, lo eliminamos de la lista sin notificar
+                    self._internal_unmounting.discard(label)
+                    if self.mounted_accounts.get(label) == mount_point:
+                        self.mounted_accounts.pop(label, None)
+                    changed = True
+                else:
+                    unmounted_labels.append((label, mount_point))
+            except Exception as e:
+                print(_("Error in mount monitor while checking '{}': {}").format(label, e))
 
-                accounts_snapshot = list(self.mounted_accounts.items())
-                unmounted_labels = []
+        for label, mount_point in unmounted_labels:
+            if self.mounted_accounts.get(label) == mount_point:
+                self.mounted_accounts.pop(label, None)
 
-                for label, mount_point in accounts_snapshot:
-                    try:
-                        if not os.path.ismount(mount_point):
-                            # Si no está montado, comprobamos si fue un desmontaje interno
-                            if label in self._internal_unmounting:
-                                # Es interno, lo eliminamos de la lista sin notificar
-                                self._internal_unmounting.discard(label)
-                                if label in self.mounted_accounts:
-                                    del self.mounted_accounts[label]
-                                continue
-                            
-                            unmounted_labels.append((label, mount_point))
-                    except Exception as e:
-                        print(_("Error in mount monitor while checking '{}': {}").format(label, e))
-
-                if unmounted_labels:
-                    for label, mount_point in unmounted_labels:
-                        if label in self.mounted_accounts:
-                            del self.mounted_accounts[label]
-                        
-                        if on_unmount_callback:
-                            on_unmount_callback(label, mount_point)
-        
-        threading.Thread(target=monitor, daemon=True).start()
+            # Las cuentas con remontaje automático se entregan al supervisor
+            self.supervisor.handle_unmount(label, mount_point)
+
+            if self._on_unmount_callback:
+                self._on_unmount_callback(label, mount_point)
+
+        return changed or bool(unmounted_labels)
 
     def stop_mount_monitor(self):
-        self._monitoring = False
+        if self._monitor is not None:
+            self._monitor.stop()
+        self.supervisor.stop()
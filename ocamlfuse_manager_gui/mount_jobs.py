@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import threading
+
+# Estados por los que pasa un trabajo de montaje
+SPAWNING = "spawning"
+WAITING_FOR_FUSE = "waiting-for-fuse"
+RETRYING_LAZY_UNMOUNT = "retrying-lazy-unmount"
+RETRYING_NONEMPTY = "retrying-nonempty"
+MOUNTED = "mounted"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINAL_STATES = (MOUNTED, FAILED, CANCELLED)
+
+
+class MountJob:
+    """
+    Manejador de un montaje en curso, al estilo de un future: se consulta con done() y
+    result(), publica cada cambio de estado a los callbacks de progreso y admite cancel().
+    Los callbacks se ejecutan en el hilo del montaje; quien toque la UI debe reenviarlos
+    al hilo de Tk.
+    """
+
+    def __init__(self, label, mount_point):
+        self.label = label
+        self.mount_point = mount_point
+        self.state = SPAWNING
+        self.message = ""
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._cancel_requested = threading.Event()
+        self._progress_callbacks = []
+        self._done_callbacks = []
+        self._cancel_hooks = []
+
+    def __repr__(self):
+        return f"<MountJob {self.label} {self.state}>"
+
+    def add_progress_callback(self, callback):
+        """Registra `callback(job)`, llamado en cada cambio de estado."""
+        with self._lock:
+            self._progress_callbacks.append(callback)
+
+    def add_done_callback(self, callback):
+        """Registra `callback(job)`, llamado una sola vez al terminar (o ya, si terminó)."""
+        with self._lock:
+            if not self._done.is_set():
+                self._done_callbacks.append(callback)
+                return
+        callback(self)
+
+    def done(self):
+        return self._done.is_set()
+
+    def succeeded(self):
+        return self.state == MOUNTED
+
+    def result(self, timeout=None):
+        """Espera a que termine y devuelve True si la cuenta quedó montada."""
+        self._done.wait(timeout)
+        return self.state == MOUNTED
+
+    def cancel(self):
+        """Pide cancelar el montaje. Devuelve False si ya había terminado."""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._cancel_requested.set()
+            hooks = list(self._cancel_hooks)
+        for hook in hooks:
+            hook()
+        return True
+
+    def cancel_requested(self):
+        return self._cancel_requested.is_set()
+
+    def add_cancel_hook(self, hook):
+        """Registra una función que despierta a quien esté esperando cuando se cancela."""
+        with self._lock:
+            self._cancel_hooks.append(hook)
+
+    def remove_cancel_hook(self, hook):
+        with self._lock:
+            if hook in self._cancel_hooks:
+                self._cancel_hooks.remove(hook)
+
+    def set_state(self, state, message=""):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.state = state
+            self.message = message
+            callbacks = list(self._progress_callbacks)
+            finished = state in FINAL_STATES
+            if finished:
+                self._done.set()
+                done_callbacks, self._done_callbacks = self._done_callbacks, []
+                self._cancel_hooks = []
+            else:
+                done_callbacks = []
+
+        for callback in callbacks + done_callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Error en callback del montaje de '{self.label}': {e}")
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import threading
+from .constants import MONITOR_MIN_INTERVAL, MONITOR_MAX_INTERVAL
+from .mountinfo import mount_watcher
+
+
+class MountMonitor:
+    """
+    Hilo que ejecuta `check()` cuando hay motivo: en cuanto cambia la tabla de montajes
+    (aviso del vigilante de mountinfo), cuando alguien llama a wake() tras montar o
+    desmontar, y como red de seguridad cada cierto intervalo. El intervalo vuelve a
+    `min_interval` después de cada cambio y se duplica hasta `max_interval` mientras todo
+    sigue estable. `check()` devuelve True si detectó algún cambio.
+    """
+
+    def __init__(self, check, min_interval=MONITOR_MIN_INTERVAL, max_interval=MONITOR_MAX_INTERVAL):
+        self.check = check
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._wake.set()  # primera comprobación en cuanto arranca
+        mount_watcher.subscribe(self._on_mount_change)
+        self._thread = threading.Thread(target=self._run, name="mount-monitor", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Fuerza una comprobación inmediata (p. ej. justo después de montar o desmontar)."""
+        self._wake.set()
+
+    def stop(self, timeout=1):
+        """Detiene el hilo y espera a que termine; no hay que esperar al intervalo en curso."""
+        self._stopping.set()
+        self._wake.set()
+        mount_watcher.unsubscribe(self._on_mount_change)
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+        self._thread = None
+
+    def _on_mount_change(self, added, removed):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            woken = self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                changed = self.check()
+            except Exception as e:
+                print(f"Error en el monitor de montajes: {e}")
+                changed = False
+            if changed or woken:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * 2)
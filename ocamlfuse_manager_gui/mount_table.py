@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import threading
+from collections import deque, namedtuple
+from .mountinfo import mount_watcher, read_mountinfo, is_gdfuse_entry
+
+# Foto inmutable de los montajes de google-drive-ocamlfuse
+MountSnapshot = namedtuple("MountSnapshot", ["generation", "entries"])
+
+# Cambios entre dos generaciones. `full` indica que el historial no alcanza y el
+# consumidor debe reconstruir su estado a partir de `added` (la tabla completa).
+MountDiff = namedtuple("MountDiff", ["generation", "added", "removed", "full"])
+
+
+class MountTable:
+    """
+    Servicio único con la tabla de montajes de google-drive-ocamlfuse. La foto solo se
+    reconstruye cuando el vigilante de mountinfo avisa de un cambio en el kernel, y cada
+    foto lleva un número de generación para que la GUI, MountManager y AccountManager
+    puedan pedir únicamente lo que cambió desde la última vez que miraron.
+    """
+
+    def __init__(self, watcher=mount_watcher, history=64):
+        self._watcher = watcher
+        self._lock = threading.Lock()
+        self._snapshot = MountSnapshot(0, ())
+        self._history = deque(maxlen=history)  # (generación, añadidos, eliminados)
+        self._subscribers = []
+        self._started = False
+
+    def start(self):
+        """Enlaza la tabla con el vigilante. Sin vigilante, la foto se rehace bajo demanda."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if self._watcher.start():
+            self._watcher.subscribe(self._on_watcher_change)
+            self._rebuild(self._watcher.entries)
+        else:
+            self.refresh()
+
+    def subscribe(self, callback):
+        """Registra `callback(diff)`, invocado desde el hilo del vigilante con cada nueva generación."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    @property
+    def generation(self):
+        return self._snapshot.generation
+
+    def snapshot(self):
+        """Devuelve la foto actual. Si no hay vigilante activo, relee mountinfo antes."""
+        if not self._watcher.running:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self):
+        """Relee mountinfo manualmente (solo necesario cuando el vigilante no está disponible)."""
+        try:
+            self._rebuild(read_mountinfo())
+        except OSError as e:
+            print(f"Error al leer la tabla de montajes: {e}")
+
+    def changes_since(self, generation):
+        """Devuelve un MountDiff con los montajes añadidos y eliminados desde `generation`."""
+        if not self._watcher.running:
+            self.refresh()
+        with self._lock:
+            current = self._snapshot
+            if generation == current.generation:
+                return MountDiff(current.generation, (), (), False)
+            oldest = self._history[0][0] if self._history else None
+            if oldest is None or generation < oldest - 1 or generation > current.generation:
+                return MountDiff(current.generation, current.entries, (), True)
+
+            added = {}
+            removed = {}
+            for gen, gen_added, gen_removed in self._history:
+                if gen <= generation:
+                    continue
+                for entry in gen_removed:
+                    if entry.mount_id in added:
+                        del added[entry.mount_id]
+                    else:
+                        removed[entry.mount_id] = entry
+                for entry in gen_added:
+                    added[entry.mount_id] = entry
+            return MountDiff(current.generation, tuple(added.values()), tuple(removed.values()), False)
+
+    def find(self, mount_point):
+        """Devuelve la entrada montada en `mount_point` o None."""
+        for entry in self.snapshot().entries:
+            if entry.mount_point == mount_point:
+                return entry
+        return None
+
+    def _on_watcher_change(self, added, removed):
+        self._rebuild(self._watcher.entries)
+
+    def _rebuild(self, entries):
+        entries = tuple(entry for entry in entries if is_gdfuse_entry(entry))
+        with self._lock:
+            previous = {entry.mount_id: entry for entry in self._snapshot.entries}
+            current = {entry.mount_id: entry for entry in entries}
+            if previous.keys() == current.keys():
+                # El kernel cambió otros montajes: la foto de ocamlfuse sigue siendo válida
+                return
+            added = tuple(entry for mount_id, entry in current.items() if mount_id not in previous)
+            removed = tuple(entry for mount_id, entry in previous.items() if mount_id not in current)
+            generation = self._snapshot.generation + 1
+            self._snapshot = MountSnapshot(generation, entries)
+            self._history.append((generation, added, removed))
+            diff = MountDiff(generation, added, removed, False)
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(diff)
+            except Exception as e:
+                print(f"Error en suscriptor de la tabla de montajes: {e}")
+
+
+# Instancia global compartida por toda la aplicación
+mount_table = MountTable()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import select
+import threading
+from collections import namedtuple
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+_OCTAL_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+def _unescape(field):
+    """El kernel escapa espacios, tabuladores, saltos de línea y '\\' como \\ooo en octal."""
+    return _OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def _read_fd(fd):
+    """Relee desde el principio el archivo abierto en `fd` y devuelve su contenido como texto."""
+    os.lseek(fd, 0, os.SEEK_SET)
+    chunks = []
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks).decode("utf-8", errors="surrogateescape")
+
+
+# Una línea de mountinfo (ver proc(5)):
+# 36 35 98:0 /mnt1 /mnt2 rw,noatime master:1 - ext3 /dev/root rw,errors=continue
+MountEntry = namedtuple("MountEntry", [
+    "mount_id",       # int: identificador único del montaje
+    "parent_id",      # int: identificador del montaje padre
+    "device",         # str: major:minor
+    "root",           # str: raíz del montaje dentro del sistema de archivos
+    "mount_point",    # str: punto de montaje (ya sin escapes)
+    "options",        # tuple: opciones por montaje (rw, nosuid, ...)
+    "fstype",         # str: tipo de sistema de archivos (p. ej. fuse.google-drive-ocamlfuse)
+    "source",         # str: origen del montaje (ya sin escapes)
+    "super_options",  # tuple: opciones del superbloque
+])
+
+
+def parse_mountinfo(text):
+    """Convierte el contenido de mountinfo en una lista de MountEntry, ignorando líneas mal formadas."""
+    entries = []
+    for line in text.splitlines():
+        fields = line.split(" ")
+        try:
+            separator = fields.index("-", 6)
+            entries.append(MountEntry(
+                mount_id=int(fields[0]),
+                parent_id=int(fields[1]),
+                device=fields[2],
+                root=_unescape(fields[3]),
+                mount_point=_unescape(fields[4]),
+                options=tuple(fields[5].split(",")),
+                fstype=_unescape(fields[separator + 1]),
+                source=_unescape(fields[separator + 2]),
+                super_options=tuple(fields[separator + 3].split(",")) if len(fields) > separator + 3 else (),
+            ))
+        except (ValueError, IndexError):
+            continue
+    return entries
+
+
+def read_mountinfo(path=MOUNTINFO_PATH):
+    """Lee y analiza la tabla de montajes del proceso sin lanzar ningún subproceso."""
+    with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+        return parse_mountinfo(f.read())
+
+
+def is_gdfuse_entry(entry):
+    """Indica si la entrada corresponde a un montaje de google-drive-ocamlfuse."""
+    return (
+        entry.fstype.endswith("google-drive-ocamlfuse")
+        or "google-drive-ocamlfuse" in entry.source
+        or "gdfuse" in entry.source
+    )
+
+
+def gdfuse_mounts(path=MOUNTINFO_PATH):
+    """Devuelve solo las entradas de mountinfo que pertenecen a google-drive-ocamlfuse."""
+    return [entry for entry in read_mountinfo(path) if is_gdfuse_entry(entry)]
+
+
+class MountInfoWatcher:
+    """
+    Vigila /proc/self/mountinfo con poll(). El kernel marca el archivo con POLLPRI/POLLERR
+    cada vez que cambia la tabla de montajes, así que el hilo duerme sin consumir CPU hasta
+    que se monta o desmonta algo y entonces avisa a los suscriptores con los cambios.
+    """
+
+    def __init__(self, path=MOUNTINFO_PATH):
+        self.path = path
+        self._subscribers = []
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._entries = ()
+        self._mount_points = frozenset()
+        self._mount_keys = frozenset()   # (mount_id, mount_point): distingue un remontaje en la misma ruta
+        self._thread = None
+        self._running = False
+        self._fd = None
+        self._wake_r = None
+        self._wake_w = None
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def generation(self):
+        """Contador que aumenta con cada cambio detectado en la tabla de montajes."""
+        return self._generation
+
+    @property
+    def mount_points(self):
+        return self._mount_points
+
+    @property
+    def entries(self):
+        """Última tabla de montajes leída, como tupla de MountEntry."""
+        return self._entries
+
+    def start(self):
+        """Arranca el hilo de vigilancia. Devuelve False si mountinfo no está disponible."""
+        with self._cond:
+            if self._running:
+                return True
+            try:
+                self._fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+                self._entries = tuple(parse_mountinfo(_read_fd(self._fd)))
+                self._mount_points = frozenset(entry.mount_point for entry in self._entries)
+                self._mount_keys = frozenset((entry.mount_id, entry.mount_point) for entry in self._entries)
+            except OSError as e:
+                print(f"No se puede vigilar {self.path}: {e}")
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                return False
+            self._wake_r, self._wake_w = os.pipe2(os.O_CLOEXEC | os.O_NONBLOCK)
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="mountinfo-watcher", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout=1):
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            os.write(self._wake_w, b"x")
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def subscribe(self, callback):
+        """
+        Registra `callback(added, removed)`, que recibe los conjuntos de puntos de montaje
+        que aparecieron y desaparecieron. Un desmontaje seguido de un remontaje en la misma
+        ruta (otro mount_id) la incluye en ambos. Se invoca desde el hilo del vigilante.
+        """
+        with self._cond:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._cond:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def is_mounted(self, path):
+        """Comprueba si `path` es un punto de montaje sin tocar el sistema de archivos montado."""
+        if path in self._mount_points:
+            return True
+        # Resolver enlaces simbólicos solo en el directorio padre: hacer stat sobre el propio
+        # punto de montaje podría bloquearse si el proceso FUSE está colgado.
+        parent, name = os.path.split(os.path.abspath(path))
+        return os.path.join(os.path.realpath(parent), name) in self._mount_points
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self._fd, select.POLLPRI | select.POLLERR)
+        poller.register(self._wake_r, select.POLLIN)
+        try:
+            while self._running:
+                events = poller.poll()
+                if any(fd == self._wake_r for fd, _mask in events):
+                    break
+                try:
+                    entries = tuple(parse_mountinfo(_read_fd(self._fd)))
+                except OSError as e:
+                    print(f"Error leyendo {self.path}: {e}")
+                    continue
+
+                current = frozenset((entry.mount_id, entry.mount_point) for entry in entries)
+                with self._cond:
+                    added = {mount_point for _id, mount_point in current - self._mount_keys}
+                    removed = {mount_point for _id, mount_point in self._mount_keys - current}
+                    if not added and not removed:
+                        continue
+                    self._entries = entries
+                    self._mount_keys = current
+                    self._mount_points = frozenset(entry.mount_point for entry in entries)
+                    self._generation += 1
+                    self._cond.notify_all()
+                    subscribers = list(self._subscribers)
+
+                for callback in subscribers:
+                    try:
+                        callback(added, removed)
+                    except Exception as e:
+                        print(f"Error en suscriptor de montajes: {e}")
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+                os.close(self._fd)
+                os.close(self._wake_r)
+                os.close(self._wake_w)
+                self._fd = self._wake_r = self._wake_w = None
+
+
+# Instancia global compartida por toda la aplicación
+mount_watcher = MountInfoWatcher()
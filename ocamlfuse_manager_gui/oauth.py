@@ -1,25 +1,16 @@
 # -*- coding: utf-8 -*-
-import http.server
-import socketserver
+import asyncio
+import errno
 import urllib.parse
-import threading
-import time
 import webbrowser
 from .i18n import i18n_instance
+from .backend import run_blocking
 _ = i18n_instance.gettext
 
+# Tiempo máximo para recibir la petición del navegador una vez abierta la conexión
+REQUEST_TIMEOUT = 10
 
-class OAuthHandler(http.server.BaseHTTPRequestHandler):
-    """Handler para capturar el código OAuth"""
-    def __init__(self, oauth_manager, *args, **kwargs):
-        self.oauth_manager = oauth_manager
-        super().__init__(*args, **kwargs)
-    
-    def do_GET(self):
-        parsed_url = urllib.parse.urlparse(self.path)
-        params = urllib.parse.parse_qs(parsed_url.query)
-
-        common_style = """
+COMMON_STYLE = """
         <style>
             body {
                 background-color: #2d2d2d; /* Gris oscuro */
@@ -37,112 +28,44 @@ class OAuthHandler(http.server.BaseHTTPRequestHandler):
         </style>
         """
 
-        # Manejar cancelación explícita desde Google
-        if 'error' in params:
-            # Llamar al callback de la ventana si existe (para cerrar y setear evento)
-            if hasattr(self.oauth_manager, 'on_cancel') and self.oauth_manager.on_cancel:
-                try:
-                    import tkinter
-                    def safe_close():
-                        try:
-                            self.oauth_manager.on_cancel()
-                        except Exception as e:
-                            print(f"Error llamando a on_cancel: {e}")
-                    # Si hay al menos una ventana Tk, usar after
-                    if tkinter._default_root:
-                        tkinter._default_root.after(0, safe_close)
-                    else:
-                        safe_close()
-                except Exception as e:
-                    print(f"Error llamando a on_cancel (after): {e}")
-            self.oauth_manager.cancel_auth()
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.end_headers()
-            
-            title = _("Autorización Cancelada")
-            subtitle = _("Autorización Cancelada")
-            message = _("Cancelaste el acceso en Google. Puedes cerrar esta ventana y volver a la aplicación.")
-            
-            html_response = f"""
-            <html>
-            <head>
-                <title>{title}</title>
-                {common_style}
-            </head>
-            <body>
-                <div>
-                    <h2>✗ {subtitle}</h2>
-                    <p>{message}</p>
-                </div>
-                <script>setTimeout(function(){{window.close();}}, 3000);</script>
-            </body>
-            </html>
-            """
-            self.wfile.write(html_response.encode("utf-8"))
-            return
 
-        if 'code' in params:
-            auth_code = params['code'][0]
-            self.oauth_manager.set_auth_code(auth_code)
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.end_headers()
-            
-            title = _("Autorización Completada")
-            subtitle = _("Autorización Completada")
-            message = _("El código de autorización ha sido capturado correctamente.")
-            close_message = _("Puedes cerrar esta ventana y volver a la aplicación.")
-            
-            html_response = f"""
+def _render_page(title, heading, paragraphs):
+    body = "".join(f"<p>{text}</p>" for text in paragraphs)
+    return f"""
             <html>
             <head>
                 <title>{title}</title>
-                {common_style}
+                {COMMON_STYLE}
             </head>
             <body>
                 <div>
-                    <h2>✓ {subtitle}</h2>
-                    <p>{message}</p>
-                    <p>{close_message}</p>
+                    <h2>{heading}</h2>
+                    {body}
                 </div>
                 <script>setTimeout(function(){{window.close();}}, 3000);</script>
             </body>
             </html>
             """
-            self.wfile.write(html_response.encode("utf-8"))
-        elif parsed_url.path in ['/', '/oauth2callback']:
-            # Si estamos en la ruta correcta pero no hay código ni error previo
-            error_msg = _("No se encontró el código de autorización")
-            self.send_error(400, error_msg)
-        else:
-            not_found_msg = _("Página no encontrada")
-            self.send_error(404, not_found_msg)
-    
-    def log_message(self, format, *args):
-        pass
+
 
 class OAuthServer:
-    """Servidor OAuth para capturar códigos de autorización"""
+    """
+    Servidor OAuth para capturar códigos de autorización. Es un servidor asyncio mínimo
+    que corre en el bucle del backend: atiende la redirección de Google y resuelve un
+    futuro con el código (o con la cancelación), sin hilo propio ni sondeo.
+    """
     def __init__(self, port=8080):
         self.port = port
         self.server = None
         self.auth_code = None
-        self.server_thread = None
-        self.running = False
-        self.stopped = False
         self.cancelled = False
-    
-    def start_server(self):
+        self.last_error = None
+        self._result = None
+
+    async def start_server(self):
+        self._result = asyncio.get_running_loop().create_future()
         try:
-            import errno
-            socketserver.TCPServer.allow_reuse_address = True
-            handler = lambda *args, **kwargs: OAuthHandler(self, *args, **kwargs)
-            self.server = socketserver.TCPServer(("", self.port), handler)
-            self.running = True
-            self.stopped = False  
-            self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-            self.server_thread.start()
+            self.server = await asyncio.start_server(self._handle, host="", port=self.port, reuse_address=True)
             print(_("Servidor OAuth iniciado en http://localhost:{}").format(self.port))
             return True
         except OSError as e:
@@ -159,37 +82,103 @@ class OAuthServer:
             print(error_msg)
             self.last_error = error_msg
             return False
-    
-    def stop_server(self):
-        if self.server and self.running and not self.stopped:
-            self.server.shutdown()
-            self.server.server_close()
-            self.running = False
-            self.stopped = True
+
+    async def stop_server(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
             print(_("Servidor OAuth detenido"))
-    
+
     def set_auth_code(self, code):
         self.auth_code = code
         print(_("Código OAuth capturado: {}...").format(code[:10]))
-    
+        if not self._result.done():
+            self._result.set_result(code)
+
     def cancel_auth(self):
         self.cancelled = True
         print(_("Autorización cancelada por el usuario."))
+        if not self._result.done():
+            self._result.set_result(None)
 
-    def wait_for_code(self, timeout=125):
-        start_time = time.time()
-        while self.auth_code is None and not self.cancelled and (time.time() - start_time < timeout):
-            time.sleep(0.5)
-        return self.auth_code
+    async def wait_for_code(self, timeout=125):
+        """Espera al código; devuelve None si Google informó de cancelación o vence el timeout."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._result), timeout)
+        except asyncio.TimeoutError:
+            return None
 
-def authenticate(client_id, client_secret, port, cancel_event, timeout=120):
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            # Descartar las cabeceras: solo interesa la ruta
+            while True:
+                line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, page = 400, None
+            else:
+                status, page = self._respond(parts[1])
+            self._write_response(writer, status, page)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            print(f"Petición OAuth incompleta: {e}")
+        finally:
+            writer.close()
+
+    def _respond(self, path):
+        """Devuelve (estado HTTP, html) para la ruta pedida por el navegador."""
+        parsed_url = urllib.parse.urlparse(path)
+        params = urllib.parse.parse_qs(parsed_url.query)
+
+        # Manejar cancelación explícita desde Google
+        if 'error' in params:
+            self.cancel_auth()
+            title = _("Autorización Cancelada")
+            return 200, _render_page(title, "✗ " + _("Autorización Cancelada"), [
+                _("Cancelaste el acceso en Google. Puedes cerrar esta ventana y volver a la aplicación."),
+            ])
+
+        if 'code' in params:
+            self.set_auth_code(params['code'][0])
+            title = _("Autorización Completada")
+            return 200, _render_page(title, "✓ " + _("Autorización Completada"), [
+                _("El código de autorización ha sido capturado correctamente."),
+                _("Puedes cerrar esta ventana y volver a la aplicación."),
+            ])
+        if parsed_url.path in ['/', '/oauth2callback']:
+            # Si estamos en la ruta correcta pero no hay código ni error previo
+            return 400, _("No se encontró el código de autorización")
+        return 404, _("Página no encontrada")
+
+    def _write_response(self, writer, status, page):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+        if status == 200:
+            content_type = "text/html; charset=utf-8"
+        else:
+            content_type = "text/plain; charset=utf-8"
+            page = page or reasons.get(status, "")
+        body = page.encode("utf-8")
+        writer.write(
+            f"HTTP/1.0 {status} {reasons.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+
+async def authenticate(client_id, client_secret, port, cancel_token, timeout=120):
+    """
+    Corrutina (bucle del backend) que abre el navegador y espera el código de autorización.
+    `cancel_token` es un CancelToken que la ventana de progreso activa al pulsar Cancelar.
+    Devuelve (código, None) o (None, motivo del error).
+    """
     oauth_server = OAuthServer(port=port)
-    server_started = False
+    if not await oauth_server.start_server():
+        return None, "server_error"
     try:
-        if not oauth_server.start_server():
-            return None, "server_error"
-        server_started = True
-
         redirect_url = f"http://localhost:{oauth_server.port}"
         auth_url = (
             "https://accounts.google.com/o/oauth2/auth?"
@@ -204,7 +193,7 @@ def authenticate(client_id, client_secret, port, cancel_event, timeout=120):
         # Intentar abrir el navegador con manejo de errores
         try:
             print(_("Intentando abrir navegador para autorización..."))
-            if not webbrowser.open(auth_url):
+            if not await run_blocking(webbrowser.open, auth_url):
                 # Si webbrowser.open devuelve False (algunas plataformas), informamos
                 print(_("Error: No se pudo detectar un navegador predeterminado para abrir la URL."))
                 # No cancelamos aquí porque a veces devuelve False pero sí lo abre, 
@@ -214,23 +203,21 @@ def authenticate(client_id, client_secret, port, cancel_event, timeout=120):
             # Aquí sí es un fallo real de la librería, informamos pero dejamos que el usuario 
             # tenga la oportunidad de cancelar manualmente en la GUI.
 
-        start_time = time.time()
-        auth_code = None
-        while not cancel_event.is_set() and not oauth_server.cancelled and (time.time() - start_time < timeout):
-            if oauth_server.auth_code is not None:
-                auth_code = oauth_server.auth_code
-                break
-            time.sleep(0.2)
+        # Esperar al primero de: código (o cancelación desde Google), cancelación en la GUI o timeout
+        code_task = asyncio.ensure_future(oauth_server.wait_for_code(timeout))
+        cancel_task = asyncio.ensure_future(cancel_token.wait_async().wait())
+        await asyncio.wait([code_task, cancel_task], return_when=asyncio.FIRST_COMPLETED)
+        for task in (code_task, cancel_task):
+            task.cancel()
+        auth_code = code_task.result() if code_task.done() and not code_task.cancelled() else None
 
         if oauth_server.cancelled:
             return None, "cancelled"
-        if cancel_event.is_set():
+        if cancel_token.is_set():
             return None, "user_cancel"
         if not auth_code:
             return None, "timeout"
         
         return auth_code, None
     finally:
-        if server_started:
-            oauth_server.stop_server()
-            time.sleep(0.5)
\ No newline at end of file
+        await oauth_server.stop_server()
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .constants import (
+    PREWARM_MAX_WORKERS, PREWARM_BANDWIDTH_MB, PREWARM_MAX_FILE_MB, PREWARM_CHUNK_SIZE,
+    PREWARM_CANCEL_TIMEOUT
+)
+
+# Estados de un precalentamiento
+RUNNING = "running"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+
+class TokenBucket:
+    """Limitador de ancho de banda compartido: `rate` bytes por segundo con ráfagas de un segundo."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount, cancel_event=None):
+        """Espera hasta poder gastar `amount` bytes. Devuelve False si se canceló mientras esperaba."""
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= min(amount, self.rate):
+                    self._tokens -= amount
+                    return True
+                wait = (min(amount, self.rate) - self._tokens) / self.rate
+            if cancel_event is not None:
+                if cancel_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class PrewarmJob:
+    """
+    Precalentamiento de las carpetas fijadas de una cuenta. Recorre los árboles con un
+    pool de hilos, hace stat de cada entrada para cargar los metadatos en la caché de
+    google-drive-ocamlfuse y, si se pide, lee el contenido de los archivos.
+    """
+
+    def __init__(self, label, mount_point, folders, read_contents, bucket,
+                 max_workers=PREWARM_MAX_WORKERS, max_file_size=PREWARM_MAX_FILE_MB * 1024 * 1024):
+        self.label = label
+        self.mount_point = mount_point
+        self.folders = list(folders)
+        self.read_contents = read_contents
+        self.state = RUNNING
+        self.dirs = 0
+        self.files = 0
+        self.bytes_read = 0
+        self.errors = 0
+        self._bucket = bucket
+        self._max_workers = max_workers
+        self._max_file_size = max_file_size
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = 0
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._stopped = threading.Event()
+        self._progress_callbacks = []
+        self._last_report = 0.0
+
+    def __repr__(self):
+        return f"<PrewarmJob {self.label} {self.state} dirs={self.dirs} files={self.files}>"
+
+    def add_progress_callback(self, callback):
+        """Registra `callback(job)`, llamado como mucho dos veces por segundo y al terminar."""
+        self._progress_callbacks.append(callback)
+
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def join(self, timeout=None):
+        """
+        Espera a que terminen todos los hilos del pool, es decir, a que ninguno tenga ya
+        abierto nada dentro del montaje. Devuelve False si vence el plazo.
+        """
+        return self._stopped.wait(timeout)
+
+    def run(self):
+        """Ejecuta el recorrido completo (bloquea hasta terminar o cancelarse)."""
+        try:
+            with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="prewarm") as pool:
+                self._pool = pool
+                roots = [os.path.join(self.mount_point, folder.lstrip("/")) for folder in self.folders]
+                for root in roots:
+                    self._submit(root)
+                if not roots:
+                    self._finish()
+                self._done.wait()
+        finally:
+            self._stopped.set()
+
+    def _submit(self, path):
+        with self._lock:
+            self._pending += 1
+        self._pool.submit(self._visit, path)
+
+    def _visit(self, path):
+        try:
+            if not self._cancel.is_set():
+                self._scan_dir(path)
+        except Exception as e:
+            print(f"Error precalentando {path}: {e}")
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+                finished = self._pending == 0
+            if finished:
+                self._finish()
+            else:
+                self._report()
+
+    def _scan_dir(self, path):
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            with self._lock:
+                self.errors += 1
+            return
+        with self._lock:
+            self.dirs += 1
+
+        for entry in entries:
+            if self._cancel.is_set():
+                return
+            try:
+                # El stat es lo que hace que ocamlfuse descargue y guarde los metadatos
+                st = entry.stat(follow_symlinks=False)
+                if entry.is_dir(follow_symlinks=False):
+                    self._submit(entry.path)
+                    continue
+                with self._lock:
+                    self.files += 1
+                if self.read_contents and 0 < st.st_size <= self._max_file_size:
+                    self._read_file(entry.path)
+            except OSError:
+                with self._lock:
+                    self.errors += 1
+
+    def _read_file(self, path):
+        with open(path, "rb") as f:
+            while not self._cancel.is_set():
+                if not self._bucket.consume(PREWARM_CHUNK_SIZE, self._cancel):
+                    return
+                chunk = f.read(PREWARM_CHUNK_SIZE)
+                if not chunk:
+                    return
+                with self._lock:
+                    self.bytes_read += len(chunk)
+                self._report()
+
+    def _report(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_report < 0.5:
+            return
+        self._last_report = now
+        for callback in list(self._progress_callbacks):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Error en callback del precalentamiento de '{self.label}': {e}")
+
+    def _finish(self):
+        if self._done.is_set():
+            return
+        self.state = CANCELLED if self._cancel.is_set() else FINISHED
+        self._done.set()
+        self._report(force=True)
+
+
+class Prewarmer:
+    """
+    Lanza y sigue los precalentamientos de todas las cuentas. Todas comparten un mismo
+    límite de ancho de banda; cada cuenta tiene como mucho un precalentamiento activo.
+    """
+
+    def __init__(self, bandwidth_mb=PREWARM_BANDWIDTH_MB, max_workers=PREWARM_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._bucket = TokenBucket(int(bandwidth_mb * 1024 * 1024))
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def set_bandwidth(self, bandwidth_mb):
+        self._bucket.rate = int(bandwidth_mb * 1024 * 1024)
+
+    def start(self, label, mount_point, folders, read_contents=False, progress_callback=None):
+        """Inicia el precalentamiento de `folders` (relativas al punto de montaje) y devuelve el PrewarmJob."""
+        job = PrewarmJob(label, mount_point, folders, read_contents, self._bucket, self.max_workers)
+        if progress_callback:
+            job.add_progress_callback(progress_callback)
+        with self._lock:
+            previous = self._jobs.get(label)
+            self._jobs[label] = job
+        # El anterior se cancela sin esperarlo: el montaje sigue en uso igualmente
+        if previous:
+            previous.cancel()
+        threading.Thread(target=job.run, name=f"prewarm-{label}", daemon=True).start()
+        return job
+
+    def cancel(self, label, timeout=PREWARM_CANCEL_TIMEOUT):
+        """
+        Cancela el precalentamiento de `label` y espera hasta `timeout` segundos a que sus
+        hilos salgan del montaje. Devuelve False si alguno sigue dentro al vencer el plazo.
+        """
+        with self._lock:
+            job = self._jobs.pop(label, None)
+        if not job:
+            return True
+        job.cancel()
+        if job.join(timeout):
+            return True
+        print(f"El precalentamiento de '{label}' no se detuvo en {timeout} s")
+        return False
+
+    def cancel_all(self, timeout=PREWARM_CANCEL_TIMEOUT):
+        """Cancela todos los precalentamientos y espera a todos con un plazo común."""
+        with self._lock:
+            jobs, self._jobs = self._jobs, {}
+        for job in jobs.values():
+            job.cancel()
+        end = time.monotonic() + timeout
+        for label, job in jobs.items():
+            if not job.join(max(0, end - time.monotonic())):
+                print(f"El precalentamiento de '{label}' no se detuvo en {timeout} s")
+
+    def job(self, label):
+        """Precalentamiento en curso de `label`, o None."""
+        with self._lock:
+            job = self._jobs.get(label)
+        return job if job and not job.done() else None
+
+
+# Instancia global compartida por toda la aplicación
+prewarmer = Prewarmer()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import errno
+import os
+import threading
+import time
+from collections import namedtuple
+
+# Clasificación de un punto de montaje
+HEALTHY = "healthy"   # statvfs respondió a tiempo
+SLOW = "slow"         # respondió, pero por encima del umbral de lentitud
+STALE = "stale"       # el proceso FUSE murió: "transport endpoint is not connected" u otro error
+HUNG = "hung"         # no respondió antes del plazo; el proceso FUSE está colgado
+
+STALE_ERRNOS = (errno.ENOTCONN, errno.ECONNABORTED, errno.EIO)
+
+ProbeResult = namedtuple("ProbeResult", ["status", "latency", "checked_at", "error"])
+
+
+class MountProbe:
+    """
+    Comprueba la salud de los puntos de montaje sin bloquear nunca a quien pregunta.
+    Cada sondeo hace statvfs en un hilo aparte con un plazo máximo; si el plazo vence el
+    montaje se marca como colgado. Un hilo atascado en el kernel no se puede matar, así que
+    nunca se lanza un segundo sondeo sobre un montaje que sigue sin responder.
+    """
+
+    def __init__(self, deadline=3.0, slow_threshold=0.5):
+        self.deadline = deadline
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._results = {}    # punto de montaje -> ProbeResult
+        self._inflight = {}   # punto de montaje -> instante de inicio del sondeo en curso
+
+    def status(self, mount_point):
+        """Último ProbeResult conocido para `mount_point`, o None si nunca se sondeó."""
+        with self._lock:
+            return self._results.get(mount_point)
+
+    def forget(self, mount_point):
+        with self._lock:
+            self._results.pop(mount_point, None)
+
+    def probe(self, mount_point, callback=None):
+        """
+        Lanza un sondeo en segundo plano y vuelve de inmediato. `callback(mount_point, result)`
+        se llama desde el hilo del sondeo solo si la clasificación cambió.
+        """
+        with self._lock:
+            if mount_point in self._inflight:
+                return
+            started = time.monotonic()
+            self._inflight[mount_point] = started
+
+        worker = threading.Thread(
+            target=self._probe_worker, args=(mount_point, callback),
+            name="mount-probe", daemon=True
+        )
+        worker.start()
+        timer = threading.Timer(self.deadline, self._on_deadline, args=(mount_point, started, callback))
+        timer.daemon = True
+        timer.start()
+
+    def probe_all(self, mount_points, callback=None):
+        for mount_point in mount_points:
+            self.probe(mount_point, callback)
+
+    def _probe_worker(self, mount_point, callback):
+        start = time.monotonic()
+        error = None
+        try:
+            os.statvfs(mount_point)
+            latency = time.monotonic() - start
+            status = SLOW if latency > self.slow_threshold else HEALTHY
+        except OSError as e:
+            latency = time.monotonic() - start
+            status = STALE
+            error = e.strerror if e.errno in STALE_ERRNOS else str(e)
+        with self._lock:
+            self._inflight.pop(mount_point, None)
+        # Aunque el plazo ya haya vencido, la respuesta tardía actualiza el estado
+        self._store(mount_point, ProbeResult(status, latency, time.time(), error), callback)
+
+    def _on_deadline(self, mount_point, started, callback):
+        with self._lock:
+            # El sondeo ya terminó (o el que sigue en curso es otro posterior)
+            if self._inflight.get(mount_point) != started:
+                return
+        self._store(mount_point, ProbeResult(HUNG, time.monotonic() - started, time.time(), None), callback)
+
+    def _store(self, mount_point, result, callback):
+        with self._lock:
+            previous = self._results.get(mount_point)
+            self._results[mount_point] = result
+        if callback and (previous is None or previous.status != result.status):
+            try:
+                callback(mount_point, result)
+            except Exception as e:
+                print(f"Error en callback del sondeo de {mount_point}: {e}")
+
+
+# Instancia global compartida por toda la aplicación
+mount_probe = MountProbe()
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from .constants import PROCESS_LIMITS, PROCESS_DEFAULT_LIMIT, PROCESS_OUTPUT_LIMIT, PROCESS_KILL_GRACE
+from .backend import backend, decode
+
+# Segundos que se espera a leer el resto de la salida una vez terminado el proceso: un
+# hijo demonizado (google-drive-ocamlfuse) puede heredar las tuberías y no cerrarlas nunca
+OUTPUT_DRAIN_TIMEOUT = 1
+
+READ_CHUNK = 4096
+
+# Valor por defecto de `timeout`: el de PROCESS_LIMITS para el programa
+DEFAULT_TIMEOUT = object()
+
+
+class _BoundedBuffer:
+    """Guarda los últimos `limit` bytes de una tubería y cuántos se descartaron."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = bytearray()
+        self.dropped = 0
+
+    def append(self, chunk):
+        self.data += chunk
+        excess = len(self.data) - self.limit
+        if excess > 0:
+            del self.data[:excess]
+            self.dropped += excess
+
+    def text(self):
+        text = decode(bytes(self.data))
+        return f"[... {self.dropped} bytes omitidos ...]\n{text}" if self.dropped else text
+
+
+class ManagedProcess:
+    """
+    Proceso hijo lanzado por ProcessManager. Su salida se lee en tareas del backend a
+    medida que llega (nunca llena la tubería ni la memoria) y el proceso se recoge en
+    cuanto termina, aunque nadie espere su resultado, así que no quedan zombis.
+    """
+
+    def __init__(self, manager, cmd, proc, slot, kill_on_quit, on_output):
+        self.cmd = list(cmd)
+        self.program = os.path.basename(cmd[0])
+        self.proc = proc
+        self.pid = proc.pid
+        self.started = time.monotonic()
+        self.kill_on_quit = kill_on_quit
+        self.stdout = _BoundedBuffer(manager.output_limit)
+        self.stderr = _BoundedBuffer(manager.output_limit)
+        self._manager = manager
+        self._slot = slot
+        self._on_output = on_output
+        self._readers = [
+            backend.detach(self._pump(proc.stdout, self.stdout, False)),
+            backend.detach(self._pump(proc.stderr, self.stderr, True)),
+        ]
+        self._exited = backend.detach(self._reap())
+
+    @property
+    def returncode(self):
+        return self.proc.returncode
+
+    async def _pump(self, stream, buffer, is_stderr):
+        if stream is None:
+            return
+        while True:
+            if self._on_output is None:
+                data = await stream.read(READ_CHUNK)
+            else:
+                try:
+                    data = await stream.readline()
+                except ValueError:
+                    # Línea más larga que el límite del StreamReader: se entrega por trozos
+                    data = await stream.read(READ_CHUNK)
+            if not data:
+                return
+            buffer.append(data)
+            if self._on_output is not None:
+                try:
+                    self._on_output(decode(data), is_stderr)
+                except Exception as e:
+                    print(f"Error en el callback de salida de {self.program}: {e}")
+
+    async def _reap(self):
+        try:
+            return await self.proc.wait()
+        finally:
+            self.release()
+            self._manager._forget(self)
+
+    def release(self):
+        """Libera la plaza del programa antes de que termine el proceso (p. ej. un montaje ya activo)."""
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            slot.release()
+
+    def completed(self):
+        return subprocess.CompletedProcess(self.cmd, self.returncode, self.stdout.text(), self.stderr.text())
+
+    async def wait(self, timeout=None):
+        """
+        Espera a que termine y devuelve un subprocess.CompletedProcess con la salida como
+        texto. Si vence el timeout o se cancela la espera, mata el proceso y propaga la
+        excepción (asyncio.TimeoutError o CancelledError).
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(self._exited), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await self.kill()
+            raise
+        await asyncio.wait(self._readers, timeout=OUTPUT_DRAIN_TIMEOUT)
+        return self.completed()
+
+    async def kill(self, grace=0):
+        """Termina el proceso (SIGTERM y, pasado `grace`, SIGKILL) y espera a recogerlo."""
+        if self.returncode is None and grace:
+            try:
+                self.proc.terminate()
+                await asyncio.wait_for(asyncio.shield(self._exited), grace)
+            except (ProcessLookupError, asyncio.TimeoutError):
+                pass
+        if self.returncode is None:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+        await asyncio.shield(self._exited)
+
+    def done(self):
+        return self._exited.done()
+
+
+class ProcessManager:
+    """
+    Punto único para lanzar programas externos (google-drive-ocamlfuse, fusermount,
+    xdg-open, zenity, kdialog, pkexec...). Limita las instancias simultáneas de cada
+    programa y les aplica un timeout por defecto (PROCESS_LIMITS), guarda solo el final de
+    su salida y mantiene un registro de los hijos vivos para poder terminarlos al salir.
+    Todo corre en el bucle del backend; run_sync() y start() sirven desde otros hilos.
+    """
+
+    def __init__(self, limits=PROCESS_LIMITS, default_limit=PROCESS_DEFAULT_LIMIT, output_limit=PROCESS_OUTPUT_LIMIT):
+        self.limits = dict(limits)
+        self.default_limit = default_limit
+        self.output_limit = output_limit
+        self._lock = threading.Lock()
+        self._running = {}      # pid -> ManagedProcess
+        self._slots = {}        # programa -> asyncio.Semaphore (solo desde el bucle del backend)
+
+    def limits_for(self, program):
+        """(instancias simultáneas, timeout por defecto) de `program`."""
+        return self.limits.get(os.path.basename(program), self.default_limit)
+
+    def _slot_for(self, program):
+        slot = self._slots.get(program)
+        if slot is None:
+            slot = self._slots[program] = asyncio.Semaphore(self.limits_for(program)[0])
+        return slot
+
+    async def spawn(self, cmd, input=None, env=None, kill_on_quit=True, on_output=None):
+        """
+        Lanza `cmd` sin shell (esperando plaza si el programa está en su límite) y devuelve
+        el ManagedProcess. La plaza se libera al terminar el proceso o con release().
+        `on_output(texto, es_stderr)` recibe la salida línea a línea desde el hilo del backend.
+        FileNotFoundError si no existe el ejecutable.
+        """
+        program = os.path.basename(cmd[0])
+        slot = self._slot_for(program)
+        await slot.acquire()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+            )
+        except BaseException:
+            slot.release()
+            raise
+        managed = ManagedProcess(self, cmd, proc, slot, kill_on_quit, on_output)
+        with self._lock:
+            if not managed.done():
+                self._running[managed.pid] = managed
+        if input is not None:
+            try:
+                proc.stdin.write(input.encode())
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                proc.stdin.close()
+        return managed
+
+    async def run(self, cmd, timeout=DEFAULT_TIMEOUT, input=None, env=None, on_output=None):
+        """
+        Ejecuta `cmd` y devuelve un subprocess.CompletedProcess con stdout y stderr como
+        texto (acotados a output_limit). Con el timeout por defecto se usa el del programa;
+        si vence, el proceso se mata y se lanza asyncio.TimeoutError.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.limits_for(cmd[0])[1]
+        managed = await self.spawn(cmd, input=input, env=env, on_output=on_output)
+        return await managed.wait(timeout)
+
+    def run_sync(self, cmd, timeout=DEFAULT_TIMEOUT, input=None, env=None, on_output=None):
+        """
+        Versión bloqueante de run() con la interfaz de subprocess.run(capture_output=True,
+        text=True): lanza subprocess.TimeoutExpired si vence el timeout.
+        """
+        try:
+            return backend.run(self.run(cmd, timeout=timeout, input=input, env=env, on_output=on_output))
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(cmd, timeout if timeout is not DEFAULT_TIMEOUT else self.limits_for(cmd[0])[1])
+
+    def start(self, cmd, timeout=DEFAULT_TIMEOUT):
+        """Lanza `cmd` sin esperarlo (p. ej. xdg-open); los errores solo se registran."""
+        def done(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                print(f"Error al ejecutar {os.path.basename(cmd[0])}: {error or type(error).__name__}")
+            elif future.result().returncode != 0:
+                print(f"{os.path.basename(cmd[0])} terminó con código {future.result().returncode}")
+
+        future = backend.submit(self.run(cmd, timeout=timeout))
+        future.add_done_callback(done)
+        return future
+
+    def _forget(self, managed):
+        with self._lock:
+            if self._running.get(managed.pid) is managed:
+                del self._running[managed.pid]
+
+    def running(self):
+        """Procesos hijos vivos en este momento."""
+        with self._lock:
+            return list(self._running.values())
+
+    async def kill_all(self, grace=PROCESS_KILL_GRACE):
+        """Termina y recoge todos los hijos marcados kill_on_quit (los montajes siguen vivos)."""
+        victims = [managed for managed in self.running() if managed.kill_on_quit]
+        for managed in victims:
+            print(f"Terminando {managed.program} (pid {managed.pid})")
+        await asyncio.gather(*(managed.kill(grace) for managed in victims), return_exceptions=True)
+
+    def shutdown(self, grace=PROCESS_KILL_GRACE):
+        """Versión bloqueante de kill_all() para el cierre de la aplicación."""
+        if not any(managed.kill_on_quit for managed in self.running()):
+            return
+        try:
+            backend.run(self.kill_all(grace), timeout=grace + 1)
+        except Exception as e:
+            print(f"No se pudieron terminar todos los procesos hijos: {e or type(e).__name__}")
+
+
+# Instancia global compartida por toda la aplicación
+process_manager = ProcessManager()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+import time
+from collections import namedtuple
+from .constants import SHUTDOWN_DEADLINE, SHUTDOWN_SLOW_STAGE, SHUTDOWN_EXIT_GRACE
+
+ShutdownStage = namedtuple("ShutdownStage", ["name", "func", "phase", "in_caller"])
+
+
+class ShutdownCoordinator:
+    """
+    Cierre ordenado y con tiempo acotado. Cada parte de la aplicación registra sus etapas
+    con add_stage(); run() las ejecuta por fases en orden creciente y, dentro de una fase,
+    en paralelo (una etapa por hilo, o en el propio hilo que llama si `in_caller`, para lo
+    que deba tocar Tk). Todas comparten un único plazo: una etapa que no termina a tiempo
+    se abandona (su hilo es de tipo daemon) y se registra, igual que las que son lentas.
+    """
+
+    def __init__(self, deadline=SHUTDOWN_DEADLINE, slow_threshold=SHUTDOWN_SLOW_STAGE):
+        self.deadline = deadline
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._stages = []
+        self._started = False
+
+    def add_stage(self, name, func, phase=0, in_caller=False):
+        """Registra `func()` como etapa `name` de la fase `phase`."""
+        with self._lock:
+            self._stages.append(ShutdownStage(name, func, phase, in_caller))
+
+    @property
+    def started(self):
+        return self._started
+
+    def run(self):
+        """
+        Ejecuta todas las etapas una sola vez (las llamadas siguientes no hacen nada) y
+        devuelve los nombres de las que no terminaron dentro del plazo.
+        """
+        with self._lock:
+            if self._started:
+                return []
+            self._started = True
+            stages = list(self._stages)
+
+        start = time.monotonic()
+        end = start + self.deadline
+        unfinished = []
+        for phase in sorted({stage.phase for stage in stages}):
+            threads = []
+            for stage in (s for s in stages if s.phase == phase and not s.in_caller):
+                thread = threading.Thread(target=self._run_stage, args=(stage,), name=f"shutdown-{stage.name}", daemon=True)
+                thread.start()
+                threads.append((stage, thread))
+            for stage in (s for s in stages if s.phase == phase and s.in_caller):
+                self._run_stage(stage)
+            for stage, thread in threads:
+                # Agotado el plazo las fases siguientes se lanzan igualmente, pero sin esperarlas
+                thread.join(max(0, end - time.monotonic()))
+                if thread.is_alive():
+                    print(f"Cierre: la etapa '{stage.name}' no terminó dentro del plazo de {self.deadline} s")
+                    unfinished.append(stage.name)
+
+        return unfinished
+
+    def _run_stage(self, stage):
+        start = time.monotonic()
+        try:
+            stage.func()
+        except Exception as e:
+            print(f"Cierre: error en la etapa '{stage.name}': {e}")
+        elapsed = time.monotonic() - start
+        if elapsed >= self.slow_threshold:
+            print(f"Cierre: la etapa '{stage.name}' tardó {elapsed:.2f} s")
+
+    def arm_exit_watchdog(self, grace=SHUTDOWN_EXIT_GRACE):
+        """
+        Fuerza la salida si, `grace` segundos después, el intérprete sigue esperando a algún
+        hilo que no es daemon (p. ej. un ejecutor con una petición de red colgada).
+        """
+        def watchdog():
+            time.sleep(grace)
+            print("Cierre: quedan hilos activos; forzando la salida", flush=True)
+            os._exit(0)
+
+        threading.Thread(target=watchdog, name="shutdown-watchdog", daemon=True).start()
+
+
+# Instancia global compartida por toda la aplicación
+shutdown_coordinator = ShutdownCoordinator()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2025 ayalarol
+#
+# Este programa es software libre: puedes redistribuirlo y/o modificarlo
+# bajo los términos de la Licencia Pública General GNU tal como ha sido
+# publicada por la Free Software Foundation
+# Este programa se distribuye con la esperanza de que sea útil, pero
+# SIN GARANTÍA ALGUNA; ni siquiera la garantía implícita
+# MERCANTIL o de APTITUD PARA UN PROPÓSITO PARTICULAR.
+# Consulta los detalles de la Licencia Pública General GNU para más información ve a LICENSE.txt
+# Debes haber recibido una copia de la Licencia Pública General GNU
+# junto a este programa. En caso contrario, consulta <http://www.gnu.org/licenses/>.
+
+import random
+import threading
+import time
+from collections import deque
+from .constants import (
+    REMOUNT_BASE_DELAY, REMOUNT_MAX_DELAY, REMOUNT_MAX_ATTEMPTS,
+    REMOUNT_WINDOW, REMOUNT_STABLE_AFTER, REMOUNT_CRASH_LOOP_LIMIT
+)
+from .mount_jobs import CANCELLED
+
+# Motivos por los que el supervisor deja de reintentar una cuenta
+GAVE_UP_ATTEMPTS = "attempts"      # se agotaron los intentos de la ventana de tiempo
+GAVE_UP_CRASH_LOOP = "crash-loop"  # el montaje se cae una y otra vez nada más volver
+
+
+class _Supervised:
+    """Estado del supervisor para una cuenta."""
+
+    def __init__(self):
+        self.attempts = deque()      # instantes (monotonic) de los intentos recientes
+        self.failures = 0            # intentos fallidos seguidos: exponente del retroceso
+        self.crash_loops = 0         # caídas seguidas poco después de montar
+        self.mounted_at = None       # instante del último montaje conseguido
+        self.timer = None
+        self.next_attempt_at = None
+        self.gave_up = None
+
+
+class RemountSupervisor:
+    """
+    Vuelve a montar las cuentas que se desmontan sin que el usuario lo pida (un proceso
+    FUSE que muere, un corte de red). Solo actúa sobre las cuentas para las que
+    `is_enabled(label)` es verdadero. Los reintentos usan retroceso exponencial con jitter,
+    tienen un máximo por ventana de tiempo y se abandonan si el montaje entra en un bucle
+    de caídas. Cualquier acción manual sobre la cuenta cancela la supervisión en curso.
+    """
+
+    def __init__(self, mount_mgr, is_enabled, on_remounted=None, on_give_up=None,
+                 base_delay=REMOUNT_BASE_DELAY, max_delay=REMOUNT_MAX_DELAY,
+                 max_attempts=REMOUNT_MAX_ATTEMPTS, window=REMOUNT_WINDOW,
+                 stable_after=REMOUNT_STABLE_AFTER, crash_loop_limit=REMOUNT_CRASH_LOOP_LIMIT):
+        self.mount_mgr = mount_mgr
+        self.is_enabled = is_enabled
+        self.on_remounted = on_remounted   # callback(label, mount_point)
+        self.on_give_up = on_give_up       # callback(label, motivo)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.window = window
+        self.stable_after = stable_after
+        self.crash_loop_limit = crash_loop_limit
+        self._lock = threading.Lock()
+        self._states = {}
+        self._stopped = False
+
+    def handle_unmount(self, label, mount_point):
+        """
+        Llamado por el monitor al detectar un desmontaje externo. Devuelve True si el
+        supervisor se encarga de volver a montar la cuenta.
+        """
+        try:
+            if self._stopped or not self.is_enabled(label):
+                return False
+        except Exception as e:
+            print(f"Error comprobando la supervisión de '{label}': {e}")
+            return False
+
+        with self._lock:
+            state = self._states.setdefault(label, _Supervised())
+            now = time.monotonic()
+            if state.mounted_at is not None and now - state.mounted_at < self.stable_after:
+                state.crash_loops += 1
+            else:
+                # El montaje aguantó: la caída se trata como un fallo aislado
+                state.crash_loops = 0
+                state.failures = 0
+            state.mounted_at = None
+            state.gave_up = None
+
+            if state.crash_loops >= self.crash_loop_limit:
+                state.gave_up = GAVE_UP_CRASH_LOOP
+                reason = GAVE_UP_CRASH_LOOP
+            else:
+                reason = self._schedule_locked(label, mount_point, state)
+
+        if reason:
+            self._give_up(label, reason)
+            return False
+        return True
+
+    def cancel(self, label):
+        """Deja de supervisar `label` y olvida su historial (acción manual del usuario)."""
+        with self._lock:
+            state = self._states.pop(label, None)
+        if state and state.timer:
+            state.timer.cancel()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            states, self._states = self._states, {}
+        for state in states.values():
+            if state.timer:
+                state.timer.cancel()
+
+    def pending(self):
+        """Devuelve {etiqueta: segundos hasta el próximo intento} de las cuentas en espera."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                label: max(0.0, state.next_attempt_at - now)
+                for label, state in self._states.items()
+                if state.next_attempt_at is not None
+            }
+
+    def status(self, label):
+        """Devuelve (intentos en la ventana, bucles de caídas, motivo de abandono) o None."""
+        with self._lock:
+            state = self._states.get(label)
+            if state is None:
+                return None
+            return len(state.attempts), state.crash_loops, state.gave_up
+
+    def _schedule_locked(self, label, mount_point, state):
+        """Programa el siguiente intento. Devuelve el motivo de abandono si ya no quedan intentos."""
+        now = time.monotonic()
+        while state.attempts and now - state.attempts[0] > self.window:
+            state.attempts.popleft()
+        if len(state.attempts) >= self.max_attempts:
+            state.gave_up = GAVE_UP_ATTEMPTS
+            state.next_attempt_at = None
+            return GAVE_UP_ATTEMPTS
+
+        # Retroceso exponencial con jitter: evita que varias cuentas reintenten a la vez
+        delay = min(self.max_delay, self.base_delay * (2 ** state.failures))
+        delay = random.uniform(delay / 2, delay)
+        state.next_attempt_at = now + delay
+        state.timer = threading.Timer(delay, self._attempt, args=(label, mount_point, state))
+        state.timer.daemon = True
+        state.timer.start()
+        return None
+
+    def _attempt(self, label, mount_point, state):
+        with self._lock:
+            if self._states.get(label) is not state:
+                return
+            state.timer = None
+            state.next_attempt_at = None
+            state.attempts.append(time.monotonic())
+
+        if self.mount_mgr.is_mounted(mount_point):
+            # Alguien la montó mientras esperábamos
+            self.mount_mgr.mounted_accounts[label] = mount_point
+            self._on_attempt_done(label, mount_point, state, mounted=True)
+            return
+
+        print(f"Supervisor: remontando '{label}' (intento {len(state.attempts)})")
+        job = self.mount_mgr.submit_mount(label, mount_point)
+        job.add_done_callback(
+            lambda finished: self._on_attempt_done(
+                label, mount_point, state, mounted=finished.succeeded(),
+                cancelled=finished.state == CANCELLED
+            )
+        )
+
+    def _on_attempt_done(self, label, mount_point, state, mounted, cancelled=False):
+        reason = None
+        with self._lock:
+            if self._states.get(label) is not state:
+                return
+            if mounted:
+                state.failures = 0
+                state.mounted_at = time.monotonic()
+            elif cancelled:
+                self._states.pop(label, None)
+                return
+            else:
+                state.failures += 1
+                reason = self._schedule_locked(label, mount_point, state)
+
+        if mounted:
+            if self.on_remounted:
+                self.on_remounted(label, mount_point)
+        elif reason:
+            self._give_up(label, reason)
+
+    def _give_up(self, label, reason):
+        print(f"Supervisor: se deja de remontar '{label}' ({reason})")
+        if self.on_give_up:
+            try:
+                self.on_give_up(label, reason)
+            except Exception as e:
+                print(f"Error en callback del supervisor para '{label}': {e}")
@@ -2,9 +2,10 @@
 import threading
 import sys
 import os
-import subprocess
 from PIL import Image
 from .i18n import i18n_instance
+from .dispatcher import ui_dispatcher
+from .processes import process_manager
 _ = i18n_instance.gettext
 
 # Intentar importar pystray de forma segura, ya que puede fallar por librerías de sistema ausentes
@@ -80,7 +81,8 @@ class TrayIconManager:
 
     def _make_open_folder_cb(self, path):
         """Crea un callback que abre la carpeta especificada."""
-        return lambda: self.root.after(0, lambda: self._open_folder(path))
+        # pystray llama desde su propio hilo: la acción se lleva al hilo de Tk
+        return lambda: ui_dispatcher.post(self._open_folder, path)
 
     def _open_folder(self, path):
         try:
@@ -88,9 +90,9 @@ class TrayIconManager:
                 if sys.platform == 'win32':
                     os.startfile(path)
                 elif sys.platform == 'darwin':
-                    subprocess.Popen(['open', path])
+                    process_manager.start(['open', path])
                 else:
-                    subprocess.Popen(['xdg-open', path])
+                    process_manager.start(['xdg-open', path])
         except Exception as e:
             print(f"Error al abrir carpeta desde tray: {e}")
 
@@ -104,7 +106,7 @@ class TrayIconManager:
                 print(f"Error actualizando menú de bandeja: {e}")
 
     def show_window(self, icon=None, item=None):
-        self.root.after(0, self._do_show_window)
+        ui_dispatcher.post(self._do_show_window, coalesce=True)
 
     def _do_show_window(self):
         try:
@@ -19,6 +19,7 @@ import os
 import threading
 import requests
 from ocamlfuse_manager_gui.constants import APP_VERSION
+from .processes import process_manager
 from .i18n import i18n_instance
 _ = i18n_instance.gettext
 
@@ -109,8 +110,7 @@ def centrar_ventana(ventana, respecto_a=None):
 def verificar_ocamlfuse():
     #Devuelve (estado, mensaje, color)
     try:
-        result = subprocess.run(['google-drive-ocamlfuse', "-version"],
-                                capture_output=True, text=True, timeout=10)
+        result = process_manager.run_sync(['google-drive-ocamlfuse', "-version"], timeout=10)
         if result.returncode == 0:
             return True, _("✓ google-drive-ocamlfuse instalado correctamente"), "green"
         else:
@@ -210,67 +210,25 @@ def ejecutar_instalacion_ocamlfuse(install_cmd, use_pkexec=True, output_callback
             # Para ayudantes AUR que manejan sudo/pkexec internamente
             full_cmd = ["sh", "-c", install_cmd]
 
-        process = subprocess.Popen(
-            full_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE, # Cambiado a PIPE para capturar stderr por separado
-            text=True,
-            # Añadir env=os.environ para asegurar que se hereden las variables de entorno
-            env=os.environ
-        )
-
         if status_callback:
             status_callback(_("Instalando..."))
         if output_callback:
             output_callback(_("> Ejecutando: ") + install_cmd + "\n")
 
-        # Leer salida en tiempo real y capturar stderr
-        stdout_lines = []
-        stderr_lines = []
-        
-        # Usar select para leer de ambos pipes sin bloquear
-        import select
-        
-        while True:
-            reads = [process.stdout.fileno(), process.stderr.fileno()]
-            ret = select.select(reads, [], [])
-            
-            for fd in ret[0]:
-                if fd == process.stdout.fileno():
-                    line = process.stdout.readline()
-                    if line:
-                        stdout_lines.append(line)
-                        if output_callback:
-                            output_callback(line)
-                if fd == process.stderr.fileno():
-                    line = process.stderr.readline()
-                    if line:
-                        stderr_lines.append(line)
-                        if output_callback: # También mostrar stderr en la salida
-                            output_callback(_("[ERROR] ") + line)
-            
-            if process.poll() is not None: # Proceso terminado
-                # Leer cualquier salida restante
-                for line in process.stdout.readlines():
-                    if line:
-                        stdout_lines.append(line)
-                        if output_callback:
-                            output_callback(line)
-                for line in process.stderr.readlines():
-                    if line:
-                        stderr_lines.append(line)
-                        if output_callback:
-                            output_callback(_("[ERROR] ") + line)
-                break
+        def on_output(line, is_stderr):
+            # Salida en tiempo real; stderr también se muestra, marcado como error
+            if output_callback:
+                output_callback(_("[ERROR] ") + line if is_stderr else line)
+
+        # Añadir env=os.environ para asegurar que se hereden las variables de entorno
+        result = process_manager.run_sync(full_cmd, env=os.environ, on_output=on_output)
+        returncode = result.returncode
 
-        returncode = process.returncode
-        
-        if returncode != 0 and stderr_lines:
+        if returncode != 0 and result.stderr:
             # Si hay un error y stderr no está vacío, añadirlo al output
             if output_callback:
                 output_callback(_("\n--- Errores de pkexec/instalación ---\n"))
-                for line in stderr_lines:
-                    output_callback(line)
+                output_callback(result.stderr if result.stderr.endswith("\n") else result.stderr + "\n")
                 output_callback(_("-------------------------------------\n"))
 
         return returncode